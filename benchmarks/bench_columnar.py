@@ -0,0 +1,57 @@
+"""
+Measures the throughput and peak memory of exporting outputs to columns in chunks
+
+Run with: python benchmarks/bench_columnar.py [num_rows] [chunk_size]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from typegpt import BaseLLMArrayElement, BaseLLMResponse
+from typegpt.columnar import iter_columns
+
+
+class Output(BaseLLMResponse):
+    class Item(BaseLLMArrayElement):
+        name: str
+        quantity: int
+        price: float | None
+
+    title: str
+    score: float
+    is_valid: bool
+    count: int | None
+    tags: list[str]
+    items: list[Item]
+
+
+def generate_outputs(num_rows: int):
+    """Creates outputs lazily, as they would be read from storage"""
+    items = [Output.Item(name="apple", quantity=2, price=0.5), Output.Item(name="flour", quantity=1, price=None)]
+    for i in range(num_rows):
+        yield Output(title=f"Title {i}", score=i / 10, is_valid=i % 2 == 0, count=None if i % 3 else i, tags=["a", "b"], items=items)
+
+
+def main(num_rows: int = 1_000_000, chunk_size: int = 100_000):
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    num_exported = 0
+    for batch in iter_columns(generate_outputs(num_rows), output_type=Output, chunk_size=chunk_size):
+        num_exported += batch.num_rows  # a real job would aggregate or write the chunk here
+
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"exported {num_exported} rows in chunks of {chunk_size}")
+    print(f"  throughput: {num_exported / duration:9.0f} rows per second")
+    print(f"  peak memory: {peak / 1e6:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
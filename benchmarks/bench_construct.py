@@ -0,0 +1,62 @@
+"""
+Compares the cost per field of constructing objects through the validating `__init__` and through the fast `_construct` path
+that is used for values produced by the parser
+
+Run with: python benchmarks/bench_construct.py [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from typegpt import BaseLLMArrayElement, BaseLLMResponse
+
+
+class Item(BaseLLMArrayElement):
+    name: str
+    quantity: int
+    price: float | None
+
+
+class Output(BaseLLMResponse):
+    title: str
+    description: str | None
+    count: int
+    score: float
+    is_valid: bool
+    tags: list[str]
+    ratings: list[int]
+    items: list[Item]
+
+
+def main(iterations: int = 20_000):
+    items = [Item(name="apple", quantity=3, price=1.5), Item(name="pear", quantity=1, price=None)]
+
+    # values as they are produced by the parser (strings for scalars)
+    values = {
+        "title": "Some title",
+        "description": "Some description",
+        "count": "12",
+        "score": "0.75",
+        "is_valid": "yes",
+        "tags": ["a", "b", "c"],
+        "ratings": ["1", "2", "3"],
+        "items": items,
+    }
+    num_fields = len(Output.__fields__)
+
+    results = {
+        "__init__": timeit.timeit(lambda: Output(**dict(values)), number=iterations),
+        "_construct": timeit.timeit(lambda: Output._construct(values), number=iterations),
+    }
+
+    print(f"construction cost per field ({num_fields} fields, {iterations} objects)")
+    for name, duration in results.items():
+        print(f"{name:>12}: {duration / iterations / num_fields * 1e9:7.0f} ns")
+    print(f"speedup: {results['__init__'] / results['_construct']:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,250 @@
+"""
+End-to-end benchmark of `generate_output` against a local stand-in of the OpenAI API (see `mock_openai_server.py`), so it runs
+offline. Reports throughput and p50/p95/p99 latency of `TypeOpenAI` (threads) and `AsyncTypeOpenAI` (tasks) at several
+concurrency levels, the time per request spent in building the messages, counting tokens, the network and parsing, and
+the time to the first chunk of streamed completions.
+
+If the tiktoken encodings can't be loaded (offline without a cache), tokens are approximated by characters / 4.
+
+Run with: python benchmarks/bench_end_to_end.py [num_requests] [latency_ms]
+"""
+
+import asyncio
+import functools
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from mock_openai_server import MockOpenAIServer, MockServerConfig
+from openai import APIError
+
+from typegpt import BaseLLMArrayElement, BaseLLMResponse, LLMArrayOutput, PromptTemplate
+from typegpt.example_builder import ExampleOutputFactory
+from typegpt.openai import AsyncTypeOpenAI, TypeOpenAI
+
+CONCURRENCY_LEVELS = (1, 4, 16)
+
+
+class Product(BaseLLMArrayElement):
+    product_name: str
+    description_short: str
+    price_in_dollars: float
+    is_available: bool
+
+
+class CatalogPrompt(PromptTemplate):
+    def __init__(self, text: str):
+        self.text = text
+
+    def system_prompt(self) -> str:
+        return "You extract product catalogs from web pages."
+
+    def user_prompt(self) -> str:
+        return f"Extract the products of this page:\n\n{self.text}"
+
+    class Output(BaseLLMResponse):
+        title: str
+        summary: str
+        products: list[Product] = LLMArrayOutput((1, 20), lambda pos: f"The {pos.ordinal} product")
+
+
+def canned_completions(num_items: int = 10) -> list[str]:
+    completions = []
+    for variant in range(4):
+        products = [
+            Product(product_name=f"Lamp {variant}-{i}", description_short="A small desk lamp", price_in_dollars=19.99, is_available=i % 2 == 0)
+            for i in range(num_items)
+        ]
+        output = CatalogPrompt.Output(title=f"Lamps {variant}", summary="Desk lamps of all sizes.", products=products)
+        completions.append(ExampleOutputFactory(output).generate())
+    return completions
+
+
+@functools.cache
+def tiktoken_available() -> bool:
+    try:
+        TypeOpenAI.num_tokens_from_messages([{"role": "user", "content": "test"}], model="gpt-4o")
+        return True
+    except Exception:
+        print("tiktoken encodings are not available, tokens are approximated by characters / 4\n")
+        return False
+
+
+def approximate_tokens_if_offline(completions: Any):
+    if not tiktoken_available():
+        completions.num_tokens_from_messages = lambda messages, model=None: sum(len(m["content"]) for m in messages) // 4 + 3
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def report(label: str, latencies: list[float], failures: int, duration: float):
+    latencies = sorted(latencies)
+    p50, p95, p99 = (percentile(latencies, q) * 1e3 for q in (0.5, 0.95, 0.99))
+    print(f"{label:<16} {len(latencies) / duration:>10.1f} {p50:>9.1f} {p95:>9.1f} {p99:>9.1f} {failures:>8}")
+
+
+# - Breakdown
+
+
+class Breakdown:
+    """Wall time spent in each phase, measured by wrapping the methods that `generate_output` calls (for sequential requests only)"""
+
+    def __init__(self):
+        self.totals: dict[str, float] = defaultdict(float)
+        self._local = threading.local()
+
+    def wrap(self, phase: str, function: Callable) -> Callable:
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            nested_before = self._nested
+            try:
+                return function(*args, **kwargs)
+            finally:
+                duration = time.perf_counter() - start
+                nested = self._nested - nested_before
+                self.totals[phase] += duration - nested  # time of wrapped calls inside is only counted for their own phase
+                self._local.nested = nested_before + duration
+
+        return timed
+
+    @property
+    def _nested(self) -> float:
+        return getattr(self._local, "nested", 0.0)
+
+    def print(self, num_requests: int):
+        print("\nTime per request (sequential, synchronous client):")
+        for phase in ("message build", "token count", "network", "parse"):
+            print(f"  {phase:<14} {self.totals[phase] / num_requests * 1e3:8.3f} ms")
+
+
+def measure_breakdown(base_url: str, num_requests: int):
+    client = TypeOpenAI(api_key="mock", base_url=base_url, max_retries=5)
+    completions = client.chat.completions
+    approximate_tokens_if_offline(completions)
+    breakdown = Breakdown()
+
+    completions.num_tokens_from_messages = breakdown.wrap("token count", completions.num_tokens_from_messages)
+    completions.create = breakdown.wrap("network", completions.create)
+    CatalogPrompt.Output.parse_response = breakdown.wrap("parse", CatalogPrompt.Output.parse_response)
+    try:
+        for i in range(num_requests):
+            prompt = CatalogPrompt(f"Page {i}")
+            prompt.generate_messages = breakdown.wrap("message build", prompt.generate_messages)
+            try:
+                completions.generate_output("gpt-4o", prompt=prompt, max_output_tokens=1000)
+            except APIError:
+                pass
+    finally:
+        del CatalogPrompt.Output.parse_response
+
+    breakdown.print(num_requests)
+
+
+# - Throughput
+
+
+def run_sync(base_url: str, num_requests: int, concurrency: int):
+    client = TypeOpenAI(api_key="mock", base_url=base_url, max_retries=5)
+    approximate_tokens_if_offline(client.chat.completions)
+    latencies: list[float] = []
+    failures = 0
+
+    def request(i: int):
+        nonlocal failures
+        start = time.perf_counter()
+        try:
+            client.chat.completions.generate_output("gpt-4o", prompt=CatalogPrompt(f"Page {i}"), max_output_tokens=1000)
+        except APIError:
+            failures += 1
+            return
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(request, range(num_requests)))
+    report(f"sync x{concurrency}", latencies, failures, time.perf_counter() - start)
+
+
+async def run_async(base_url: str, num_requests: int, concurrency: int):
+    client = AsyncTypeOpenAI(api_key="mock", base_url=base_url, max_retries=5)
+    approximate_tokens_if_offline(client.chat.completions)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    failures = 0
+
+    async def request(i: int):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await client.chat.completions.generate_output("gpt-4o", prompt=CatalogPrompt(f"Page {i}"), max_output_tokens=1000)
+            except APIError:
+                failures += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(request(i) for i in range(num_requests)))
+    report(f"async x{concurrency}", latencies, failures, time.perf_counter() - start)
+    await client.close()
+
+
+def run_streaming(base_url: str, num_requests: int):
+    client = TypeOpenAI(api_key="mock", base_url=base_url, max_retries=5)
+    first_chunk, total = [], []
+
+    for i in range(num_requests):
+        start = time.perf_counter()
+        pieces = []
+        for chunk in client.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": f"Page {i}"}], stream=True):
+            if not pieces:
+                first_chunk.append(time.perf_counter() - start)
+            pieces.append((chunk.choices[0].delta.content or "") if chunk.choices else "")
+        CatalogPrompt.Output.parse_response("".join(pieces))
+        total.append(time.perf_counter() - start)
+
+    first_chunk.sort()
+    total.sort()
+    print(f"\nStreaming ({num_requests} sequential requests): first chunk p50 {percentile(first_chunk, 0.5) * 1e3:.1f} ms, ", end="")
+    print(f"complete and parsed p50 {percentile(total, 0.5) * 1e3:.1f} ms")
+
+
+def main(num_requests: int = 200, latency_ms: int = 20):
+    config = MockServerConfig(
+        completions=canned_completions(),
+        latency=latency_ms / 1000,
+        latency_jitter=latency_ms / 4000,
+        chunk_size=32,
+        chunk_interval=0.001,
+        error_rate=0.01,
+        rate_limit_rate=0.02,
+    )
+
+    tiktoken_available()
+
+    with MockOpenAIServer(config) as server:
+        print(f"{'client':<16} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'failures':>8}")
+        for concurrency in CONCURRENCY_LEVELS:
+            run_sync(server.base_url, num_requests, concurrency)
+        for concurrency in CONCURRENCY_LEVELS:
+            asyncio.run(run_async(server.base_url, num_requests, concurrency))
+
+        measure_breakdown(server.base_url, min(num_requests, 50))
+        run_streaming(server.base_url, min(num_requests, 20))
+
+        statistics = server.statistics
+        print(f"\nServer: {statistics.requests} requests, {statistics.errors} errors, {statistics.rate_limited} rate limited")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,59 @@
+"""
+Measures the cold import time of the package with `python -X importtime` and fails if it exceeds a threshold
+
+Run with: python benchmarks/bench_import.py [threshold_ms] [num_runs]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+MODULES = ["typegpt", "typegpt.openai"]
+
+
+def import_times(module: str) -> list[tuple[str, int, int]]:
+    """Imports the module in a fresh interpreter and returns (name, nesting level, cumulative microseconds) of the modules it imported"""
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+    entries: list[tuple[str, int, int]] = []
+    for line in result.stderr.splitlines()[1:]:  # skip the header
+        _, cumulative, name = line.split("|")
+        entries.append((name.strip(), len(name) - len(name.lstrip()), int(cumulative)))
+
+    # modules are listed after their dependencies, so the dependencies of the module are the deeper entries right before it
+    end = next(i for i, (name, level, _) in enumerate(entries) if name == module and level == 1)
+    start = end
+    while start > 0 and entries[start - 1][1] > 1:
+        start -= 1
+    return entries[start : end + 1]
+
+
+def main(threshold_ms: int = 150, num_runs: int = 5) -> int:
+    import_times(MODULES[-1])  # warm up the bytecode cache
+
+    exceeded = False
+    for module in MODULES:
+        runs = [import_times(module) for _ in range(num_runs)]
+        median_ms = statistics.median(run[-1][2] for run in runs) / 1000
+
+        direct_imports = [(name, us) for name, level, us in runs[-1] if level == 3]
+        slowest = sorted(direct_imports, key=lambda item: item[1], reverse=True)[:5]
+
+        print(f"import {module}: {median_ms:.1f} ms (median of {num_runs})")
+        for name, us in slowest:
+            print(f"  {name:45s} {us / 1000:7.1f} ms")
+
+        if module == "typegpt" and median_ms > threshold_ms:
+            print(f"  exceeds the threshold of {threshold_ms} ms")
+            exceeded = True
+
+    return 1 if exceeded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*[int(arg) for arg in sys.argv[1:3]]))
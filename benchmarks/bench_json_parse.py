@@ -0,0 +1,53 @@
+"""
+Compares parsing the same output from a labeled completion (`parse_response`) and from a completion generated with the JSON
+schema of the output class (`parse_json_response`)
+
+Run with: python benchmarks/bench_json_parse.py [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from typegpt import BaseLLMArrayElement, BaseLLMResponse
+from typegpt.example_builder import ExampleOutputFactory
+
+
+class Product(BaseLLMArrayElement):
+    product_name: str
+    description_short: str
+    price_in_dollars: float
+    is_available: bool
+
+
+class Catalog(BaseLLMResponse):
+    title: str
+    products: list[Product]
+
+
+def main(iterations: int = 10):
+    print(f"{'items':>6} {'format':<8} {'chars':>9} {'parse':>12}")
+
+    for num_items in (10, 100, 500):
+        products = [
+            Product(product_name=f"Lamp {i}", description_short="A small desk lamp", price_in_dollars=19.99, is_available=i % 2 == 0)
+            for i in range(num_items)
+        ]
+        output = Catalog(title="Lamps", products=products)
+
+        labeled_completion = ExampleOutputFactory(output).generate()
+        json_completion = output.to_json()
+        assert Catalog.parse_response(labeled_completion).to_dict() == Catalog.parse_json_response(json_completion).to_dict()
+
+        for name, parse, completion in (
+            ("labeled", Catalog.parse_response, labeled_completion),
+            ("json", Catalog.parse_json_response, json_completion),
+        ):
+            duration = timeit.timeit(lambda: parse(completion), number=iterations)
+            print(f"{num_items:>6} {name:<8} {len(completion):>9} {duration / iterations * 1e3:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,71 @@
+"""
+Compares the memory used per instance by regular response objects and response objects defined with `compact=True`
+
+Run with: python benchmarks/bench_memory.py [num_objects]
+"""
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from typegpt import BaseLLMArrayElement, BaseLLMResponse
+
+
+class Item(BaseLLMArrayElement):
+    name: str
+    quantity: int
+    price: float
+
+
+class CompactItem(BaseLLMArrayElement, compact=True):
+    name: str
+    quantity: int
+    price: float
+
+
+class Output(BaseLLMResponse):
+    title: str
+    items: list[Item]
+
+
+class CompactOutput(BaseLLMResponse, compact=True):
+    title: str
+    items: list[CompactItem]
+
+
+def measure(factory, num_objects: int) -> float:
+    """Returns the number of bytes allocated per object"""
+
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    objects = [factory(i) for i in range(num_objects)]
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del objects
+    return (end - start) / num_objects
+
+
+def main(num_objects: int = 100_000):
+    name, quantity, price = "item", 1, 1.5  # shared values, so only the object overhead is measured
+
+    results = {
+        "array element": (
+            measure(lambda _: Item(name=name, quantity=quantity, price=price), num_objects),
+            measure(lambda _: CompactItem(name=name, quantity=quantity, price=price), num_objects),
+        ),
+        "response": (
+            measure(lambda _: Output(title=name, items=[]), num_objects),
+            measure(lambda _: CompactOutput(title=name, items=[]), num_objects),
+        ),
+    }
+
+    print(f"bytes per instance ({num_objects} objects)")
+    for kind, (regular, compact) in results.items():
+        print(f"{kind:>14}: {regular:7.1f} regular, {compact:7.1f} compact ({1 - compact / regular:.0%} less)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
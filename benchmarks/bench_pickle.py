@@ -0,0 +1,62 @@
+"""
+Measures pickling of response objects and the throughput of parsing completions in a process pool compared to a single process
+
+Run with: python benchmarks/bench_pickle.py [num_completions] [num_workers]
+"""
+
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from typegpt import BaseLLMArrayElement, BaseLLMResponse
+
+
+class Output(BaseLLMResponse):
+    class Item(BaseLLMArrayElement):
+        name: str
+        quantity: int
+
+    title: str
+    description: str
+    items: list[Item]
+    tags: list[str]
+
+
+def create_completion(i: int) -> str:
+    items = "\n".join(f"ITEM {j} NAME: item {j}\nITEM {j} QUANTITY: {j}" for j in range(1, 6))
+    return f"TITLE: Title {i}\nDESCRIPTION: Some description\n{items}\nTAG 1: a\nTAG 2: b"
+
+
+def parse(completion: str) -> Output:
+    return Output.parse_response(completion)
+
+
+def main(num_completions: int = 20_000, num_workers: int = os.cpu_count() or 2):
+    completions = [create_completion(i) for i in range(num_completions)]
+
+    start = time.perf_counter()
+    outputs = [parse(c) for c in completions]
+    serial_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    data = pickle.dumps(outputs)
+    pickle.loads(data)
+    pickle_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        list(executor.map(parse, completions, chunksize=256))
+    pool_duration = time.perf_counter() - start
+
+    print(f"pickle round trip: {pickle_duration / num_completions * 1e6:.1f} us and {len(data) / num_completions:.0f} bytes per object")
+    print(f"parsing {num_completions} completions:")
+    print(f"  1 process:    {num_completions / serial_duration:8.0f} per second")
+    print(f"  {num_workers} processes: {num_completions / pool_duration:8.0f} per second")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,64 @@
+"""
+Measures dict and JSON round trips of response objects (uses `orjson` for JSON if installed)
+
+Run with: python benchmarks/bench_serialization.py [num_objects]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from typegpt import BaseLLMArrayElement, BaseLLMResponse
+from typegpt import serialization
+
+
+class Item(BaseLLMArrayElement):
+    name: str
+    quantity: int
+    price: float | None
+
+
+class Details(BaseLLMResponse):
+    summary: str
+    is_vegan: bool
+
+
+class Output(BaseLLMResponse):
+    title: str
+    count: int
+    details: Details | None
+    tags: list[str]
+    items: list[Item]
+
+
+def create_output(i: int) -> Output:
+    return Output(
+        title=f"Recipe {i}",
+        count=i,
+        details=Details(summary="Some summary", is_vegan=i % 2 == 0),
+        tags=["quick", "easy"],
+        items=[Item(name="apple", quantity=2, price=0.5), Item(name="flour", quantity=1, price=None)],
+    )
+
+
+def measure(name: str, function, num_objects: int):
+    start = time.perf_counter()
+    function()
+    duration = time.perf_counter() - start
+    print(f"{name:>30}: {duration:6.2f}s ({duration / num_objects * 1e6:5.1f} us per object)")
+
+
+def main(num_objects: int = 100_000):
+    outputs = [create_output(i) for i in range(num_objects)]
+
+    print(f"round trips of {num_objects} objects (JSON backend: {'orjson' if serialization.orjson else 'json'})")
+    measure("to_dict + from_dict", lambda: [Output.from_dict(o.to_dict()) for o in outputs], num_objects)
+    measure("to_dict + from_dict (trusted)", lambda: [Output.from_dict(o.to_dict(), validate=False) for o in outputs], num_objects)
+    measure("to_json + from_json", lambda: [Output.from_json(o.to_json()) for o in outputs], num_objects)
+    measure("to_json + from_json (trusted)", lambda: [Output.from_json(o.to_json(), validate=False) for o in outputs], num_objects)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
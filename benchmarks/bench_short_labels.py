@@ -0,0 +1,92 @@
+"""
+Compares the size of schema prompts and completions with the default labels and with short labels (`short_labels=True`).
+Counts tokens with the o200k_base encoding of tiktoken if it can be loaded, otherwise only characters
+
+Run with: python benchmarks/bench_short_labels.py [num_items]
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from typegpt import BaseLLMArrayElement, BaseLLMResponse, LLMArrayOutput
+from typegpt.example_builder import ExampleOutputFactory
+from typegpt.prompt_builder import OutputPromptFactory
+
+
+def define_schemas(short_labels: bool) -> dict[str, type[BaseLLMResponse]]:
+    class Article(BaseLLMResponse, short_labels=short_labels):
+        title: str
+        summary_sentence: str
+        main_topic: str
+        sentiment_score: float
+        is_opinion_piece: bool
+        keywords: list[str]
+
+    class Product(BaseLLMArrayElement, short_labels=short_labels):
+        product_name: str
+        description_short: str
+        price_in_dollars: float
+        is_available: bool
+
+    class Catalog(BaseLLMResponse, short_labels=short_labels):
+        catalog_title: str
+        products: list[Product] = LLMArrayOutput((1, None), lambda pos: f"The {pos.ordinal} product")
+
+    return {"article": Article, "catalog": Catalog}
+
+
+def example_completion(name: str, output_type: type[BaseLLMResponse], num_items: int) -> str:
+    if name == "article":
+        example = output_type(
+            title="Rates rise again",
+            summary_sentence="The central bank raised rates.",
+            main_topic="economy",
+            sentiment_score=-0.2,
+            is_opinion_piece=False,
+            keywords=["rates", "inflation", "bank"],
+        )
+    else:
+        product_type = output_type.__fields__["products"].descriptor.array_element_type
+        products = [
+            product_type(product_name=f"Lamp {i}", description_short="A small desk lamp", price_in_dollars=19.99, is_available=True)
+            for i in range(num_items)
+        ]
+        example = output_type(catalog_title="Lamps", products=products)
+    return ExampleOutputFactory(example).generate()
+
+
+def token_counter():
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text))
+    except Exception as e:
+        print(f"token counts unavailable ({type(e).__name__}), comparing characters only\n")
+        return None
+
+
+def main(num_items: int = 50):
+    count_tokens = token_counter()
+    default_schemas, short_schemas = define_schemas(short_labels=False), define_schemas(short_labels=True)
+
+    print(f"{'schema':<10} {'part':<19} {'default':>9} {'short':>9} {'saved':>7}")
+    for name in default_schemas:
+        texts = {}
+        for variant, output_type in (("default", default_schemas[name]), ("short", short_schemas[name])):
+            texts[variant] = {
+                "prompt": OutputPromptFactory(list(output_type.__fields__.values())).generate(),
+                "completion": example_completion(name, output_type, num_items),
+            }
+
+        for part in ("prompt", "completion"):
+            measures = [("chars", len)] + ([("tokens", count_tokens)] if count_tokens else [])
+            for unit, measure in measures:
+                default, short = measure(texts["default"][part]), measure(texts["short"][part])
+                print(f"{name:<10} {f'{part} ({unit})':<19} {default:>9} {short:>9} {1 - short / default:>6.0%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
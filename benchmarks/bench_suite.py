@@ -0,0 +1,209 @@
+"""
+Micro-benchmarks of the CPU cost inside the library: parsing (flat, nested, wide, long-array and multiline schemas), rendering
+schema prompts and few-shot examples, generating messages with prompt reduction and counting tokens.
+Results are stored as JSON and can be compared against a saved baseline, failing if any case got slower than the threshold.
+
+Run with: python benchmarks/bench_suite.py [--output results.json] [--baseline baseline.json] [--threshold 0.2] [--filter parse]
+
+Typical workflow: save a baseline on the main branch (`--output baseline.json`), then run the branch with `--baseline baseline.json`.
+Timings are the minimum over several repeats, so compare runs on the same machine only.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from typegpt import BaseLLMArrayElement, BaseLLMResponse, LLMArrayOutput, LLMOutput, PromptTemplate
+from typegpt.dynamic import create_output_type
+from typegpt.example_builder import ExampleOutputFactory
+from typegpt.message_collection_builder import MessageCollectionFactory
+from typegpt.parser import Parser
+from typegpt.prompt_builder import OutputPromptFactory
+
+
+class Item(BaseLLMArrayElement):
+    name: str
+    quantity: int
+    price: float | None
+
+
+class FlatOutput(BaseLLMResponse):
+    title: str
+    description: str
+    count: int
+    score: float
+    is_valid: bool
+    category: str | None
+    author: str
+    language: str
+
+
+class NestedOutput(BaseLLMResponse):
+    class Details(BaseLLMResponse):
+        difficulty: int
+        is_vegan: bool
+        cuisine: str
+
+    title: str
+    details: Details
+    tags: list[str]
+    items: list[Item]
+
+
+class LongArrayOutput(BaseLLMResponse):
+    title: str
+    items: list[Item] = LLMArrayOutput((1, None), lambda pos: f"The {pos.ordinal} item")
+
+
+class MultilineOutput(BaseLLMResponse):
+    title: str
+    summary: str = LLMOutput("Put the summary here", multiline=True)
+    body: str = LLMOutput("Put the full text here", multiline=True)
+
+
+WideOutput = create_output_type({"name": "Wide", "fields": [{"key": f"field_{i}", "type": "int"} for i in range(200)]}, cache=None)
+
+
+def example_outputs() -> dict[str, BaseLLMResponse]:
+    items = [Item(name=f"apple {i}", quantity=3, price=1.5) for i in range(5)]
+    paragraph = "This is a sentence of the text that goes on for a while. " * 8
+
+    return {
+        "flat": FlatOutput(
+            title="Some title", description="Some description", count=3, score=0.5, is_valid=True, category=None, author="A", language="en"
+        ),
+        "nested": NestedOutput(
+            title="Pie", details=NestedOutput.Details(difficulty=2, is_vegan=True, cuisine="french"), tags=["sweet", "baked"], items=items
+        ),
+        "wide": WideOutput(**{f"field_{i}": i for i in range(200)}),
+        "long_array": LongArrayOutput(title="Apples", items=[Item(name=f"apple {i}", quantity=i, price=None) for i in range(500)]),
+        "multiline": MultilineOutput(title="Essay", summary="\n".join([paragraph] * 3), body="\n\n".join([paragraph] * 40)),
+    }
+
+
+class ReducingPrompt(PromptTemplate):
+    def __init__(self, num_lines: int):
+        self.lines = [f"This is line {i} of the document." for i in range(num_lines)]
+
+    def system_prompt(self) -> str:
+        return "Summarize the document."
+
+    def user_prompt(self) -> str:
+        return "\n".join(self.lines)
+
+    def reduce_if_possible(self) -> bool:
+        if len(self.lines) <= 10:
+            return False
+        self.lines = self.lines[: len(self.lines) - 10]
+        return True
+
+    Output = NestedOutput
+
+
+def approximate_token_counter(messages: list[dict[str, str]]) -> int:
+    return sum(len(message["content"]) for message in messages) // 4
+
+
+def benchmark_cases() -> dict[str, Callable[[], Any]]:
+    """Functions to time by case name, with all setup done up front"""
+
+    cases: dict[str, Callable[[], Any]] = {}
+    outputs = example_outputs()
+
+    for name, output in outputs.items():
+        completion = ExampleOutputFactory(output).generate()
+        parser = Parser.for_type(type(output))
+        parser.parse(completion)  # warm up the lazily built state of the parser
+        cases[f"parse/{name}"] = lambda parser=parser, completion=completion: parser.parse(completion)
+
+    for name in ("flat", "nested", "wide"):
+        fields = list(type(outputs[name]).__fields__.values())
+        cases[f"schema_prompt/{name}"] = lambda fields=fields: OutputPromptFactory(fields).generate()  # uncached rendering
+
+    for name in ("nested", "long_array"):
+        cases[f"example_output/{name}"] = lambda output=outputs[name]: ExampleOutputFactory(output).generate()
+
+    prompt = ReducingPrompt(1000)
+    cases["messages/reduction"] = lambda: MessageCollectionFactory(prompt, approximate_token_counter).generate_messages(token_limit=1500)
+
+    token_messages = MessageCollectionFactory(ReducingPrompt(200), approximate_token_counter).generate_messages(token_limit=100_000)
+    try:
+        from typegpt.openai.base_chat_completion import BaseChatCompletions
+
+        BaseChatCompletions.num_tokens_from_messages(token_messages, model="gpt-4o")
+        cases["tokens/gpt-4o"] = lambda: BaseChatCompletions.num_tokens_from_messages(token_messages, model="gpt-4o")
+    except Exception as e:  # the encodings of tiktoken need to be downloaded once
+        print(f"Skipping token counting, as the tiktoken encoding can't be loaded ({type(e).__name__})\n")
+
+    return cases
+
+
+def measure(function: Callable[[], Any], repeat: int) -> dict[str, float]:
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()  # calls per repeat that take at least 0.2 seconds
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+    return {"seconds": best, "number": number}
+
+
+def compare(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], threshold: float) -> list[str]:
+    """Prints the change of every case against the baseline and returns the names of the cases that regressed"""
+
+    regressions = []
+    print(f"\n{'case':<28} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<28} {'-':>12} {result['seconds'] * 1e6:9.1f} µs {'new':>8}")
+            continue
+
+        change = result["seconds"] / baseline[name]["seconds"] - 1
+        marker = ""
+        if change > threshold:
+            regressions.append(name)
+            marker = "  REGRESSION"
+        print(f"{name:<28} {baseline[name]['seconds'] * 1e6:9.1f} µs {result['seconds'] * 1e6:9.1f} µs {change:+8.1%}{marker}")
+
+    return regressions
+
+
+def main(argv: list[str]) -> int:
+    arguments = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip(), formatter_class=argparse.RawDescriptionHelpFormatter)
+    arguments.add_argument("--output", help="file to store the results as JSON")
+    arguments.add_argument("--baseline", help="JSON file of an earlier run to compare against")
+    arguments.add_argument("--threshold", type=float, default=0.2, help="relative slowdown that counts as regression (default: 0.2)")
+    arguments.add_argument("--repeat", type=int, default=5, help="number of repeats, of which the fastest is used (default: 5)")
+    arguments.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    args = arguments.parse_args(argv)
+
+    cases = benchmark_cases()
+    results: dict[str, dict[str, float]] = {}
+    print(f"{'case':<28} {'time':>12} {'calls':>8}")
+    for name, function in cases.items():
+        if args.filter not in name:
+            continue
+        results[name] = measure(function, args.repeat)
+        print(f"{name:<28} {results[name]['seconds'] * 1e6:9.1f} µs {results[name]['number']:>8}")
+
+    if args.output:
+        report = {"python": platform.python_version(), "platform": platform.platform(), "results": results}
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"\nStored results in {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        if regressions := compare(results, baseline, args.threshold):
+            print(f"\n{len(regressions)} case(s) are more than {args.threshold:.0%} slower than the baseline")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,53 @@
+"""
+Compares arrays of elements in the labeled format (one line per field of each element) and in the tabular format
+(`LLMArrayOutput(..., tabular=True)`): the size of the completion and the time to parse it
+
+Run with: python benchmarks/bench_tabular.py [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from typegpt import BaseLLMArrayElement, BaseLLMResponse, LLMArrayOutput
+from typegpt.example_builder import ExampleOutputFactory
+
+
+class Product(BaseLLMArrayElement):
+    product_name: str
+    description_short: str
+    price_in_dollars: float
+    is_available: bool
+
+
+class LabeledCatalog(BaseLLMResponse):
+    title: str
+    products: list[Product]
+
+
+class TabularCatalog(BaseLLMResponse):
+    title: str
+    products: list[Product] = LLMArrayOutput((1, None), lambda pos: f"The {pos.ordinal} product", tabular=True)
+
+
+def main(iterations: int = 10):
+    print(f"{'items':>6} {'format':<8} {'chars':>9} {'parse':>12}")
+
+    for num_items in (10, 100, 500):
+        products = [
+            Product(product_name=f"Lamp {i}", description_short="A small desk lamp", price_in_dollars=19.99, is_available=i % 2 == 0)
+            for i in range(num_items)
+        ]
+
+        for name, output_type in (("labeled", LabeledCatalog), ("tabular", TabularCatalog)):
+            completion = ExampleOutputFactory(output_type(title="Lamps", products=products)).generate()
+            assert len(output_type.parse_response(completion).products) == num_items
+
+            duration = timeit.timeit(lambda: output_type.parse_response(completion), number=iterations)
+            print(f"{num_items:>6} {name:<8} {len(completion):>9} {duration / iterations * 1e3:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,59 @@
+"""
+Measures how class creation, prompt rendering and parsing scale with the number of fields. The time per field should stay
+roughly constant from 10 to 1000 fields
+
+Run with: python benchmarks/bench_wide_schema.py [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from typegpt import BaseLLMResponse
+from typegpt.parser import Parser
+from typegpt.prompt_builder import OutputPromptFactory
+
+
+def create_output_type(num_fields: int) -> type[BaseLLMResponse]:
+    annotations = {f"field_{i}": str for i in range(num_fields)}
+    annotations |= {f"number_{i}": int | None for i in range(num_fields // 10)}
+    annotations |= {f"list_{i}s": list[str] for i in range(num_fields // 10)}
+    return type(BaseLLMResponse)(f"Wide{num_fields}", (BaseLLMResponse,), {"__module__": __name__, "__annotations__": annotations})
+
+
+def completion_for(output_type: type[BaseLLMResponse]) -> str:
+    lines = []
+    for field in output_type.__fields__.values():
+        if field.descriptor.is_array:
+            lines.extend(f"{field.name} {i}: item {i}" for i in range(1, 4))
+        elif field.descriptor.base_type is int:
+            lines.append(f"{field.name}: 42")
+        else:
+            lines.append(f"{field.name}: some value of {field.key}")
+    return "\n".join(lines)
+
+
+def main(iterations: int = 5):
+    print(f"{'fields':>6} {'create':>12} {'prompt':>12} {'parse':>12}   (per field)")
+
+    for num_fields in (10, 100, 1000):
+        output_type = create_output_type(num_fields)
+        total_fields = len(output_type.__fields__)
+        completion = completion_for(output_type)
+        assert output_type.parse_response(completion).field_0 == "some value of field_0"
+
+        results = {
+            "create": timeit.timeit(lambda: create_output_type(num_fields), number=iterations),
+            # a new factory and parser every time, so nothing is reused between iterations
+            "prompt": timeit.timeit(lambda: OutputPromptFactory(list(output_type.__fields__.values())).generate(), number=iterations),
+            "parse": timeit.timeit(lambda: Parser(output_type).parse(completion), number=iterations),
+        }
+
+        per_field = [f"{duration / iterations / total_fields * 1e6:9.1f} us" for duration in results.values()]
+        print(f"{total_fields:>6} " + " ".join(per_field))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
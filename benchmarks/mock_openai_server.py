@@ -0,0 +1,190 @@
+"""
+Local stand-in for the chat completion endpoint of the OpenAI API, for benchmarks that run offline.
+It answers every request with one of the canned completions after a configurable latency, streams it in chunks if the
+request asks for it, and fails a configurable share of the requests with 500 or 429 errors.
+
+Usage:
+    with MockOpenAIServer(MockServerConfig(completions=["TITLE: Hello"], latency=0.05)) as server:
+        client = TypeOpenAI(api_key="mock", base_url=server.base_url)
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+
+@dataclass
+class MockServerConfig:
+    completions: list[str]  # answered in turn
+    latency: float = 0.0  # seconds until the response (or its first chunk) is sent
+    latency_jitter: float = 0.0  # additional random latency of up to this many seconds
+    chunk_size: int = 16  # characters per chunk of streamed responses
+    chunk_interval: float = 0.0  # seconds between two chunks of streamed responses
+    error_rate: float = 0.0  # share of requests that fail with a 500 error
+    rate_limit_rate: float = 0.0  # share of requests that fail with a 429 error
+    retry_after: float = 0.01  # seconds sent as `retry-after-ms` with 429 errors
+    seed: int = 0
+
+
+@dataclass
+class MockServerStatistics:
+    requests: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, status: int):
+        with self.lock:
+            self.requests += 1
+            if status == 429:
+                self.rate_limited += 1
+            elif status >= 500:
+                self.errors += 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: _Server
+    protocol_version = "HTTP/1.1"  # keeps connections of the client's pool alive
+    disable_nagle_algorithm = True  # headers and body are written separately, which would otherwise wait for delayed ACKs
+
+    def log_message(self, format: str, *args: Any):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            return self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+        config = self.server.config
+        failure, completion, delay = self.server.next_request()
+        time.sleep(delay)
+
+        if failure == 429:
+            return self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                headers={"retry-after-ms": str(int(config.retry_after * 1000))},
+            )
+        if failure == 500:
+            return self._send_json(500, {"error": {"message": "The server had an error", "type": "server_error"}})
+
+        model = body.get("model", "gpt-4o")
+        if body.get("stream"):
+            self._send_stream(model, completion)
+        else:
+            self._send_json(200, _completion_body(model, completion))
+
+    def _send_json(self, status: int, data: dict[str, Any], headers: dict[str, str] | None = None):
+        self.server.statistics.record(status)
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_stream(self, model: str, completion: str):
+        config = self.server.config
+        self.server.statistics.record(200)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        pieces = [completion[i : i + config.chunk_size] for i in range(0, len(completion), config.chunk_size)]
+        for i, piece in enumerate(pieces):
+            if i and config.chunk_interval:
+                time.sleep(config.chunk_interval)
+            self._write_chunk(_chunk_body(model, {"content": piece}, None))
+        self._write_chunk(_chunk_body(model, {}, "stop"))
+        self._write_event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data: dict[str, Any]):
+        self._write_event(json.dumps(data))
+
+    def _write_event(self, data: str):
+        event = f"data: {data}\n\n".encode()
+        self.wfile.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+        self.wfile.flush()
+
+
+def _completion_body(model: str, completion: str) -> dict[str, Any]:
+    return {
+        "id": "chatcmpl-mock",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": completion}}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def _chunk_body(model: str, delta: dict[str, Any], finish_reason: str | None) -> dict[str, Any]:
+    return {
+        "id": "chatcmpl-mock",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, config: MockServerConfig):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.config = config
+        self.statistics = MockServerStatistics()
+        self._random = random.Random(config.seed)
+        self._completions = itertools.cycle(config.completions)
+        self._lock = threading.Lock()
+
+    def next_request(self) -> tuple[int | None, str, float]:
+        """Failure status (or None), completion and delay of the next request, drawn under a lock to be reproducible"""
+        with self._lock:
+            draw = self._random.random()
+            delay = self.config.latency + self._random.random() * self.config.latency_jitter
+            completion = next(self._completions)
+
+        if draw < self.config.rate_limit_rate:
+            return 429, completion, delay
+        if draw < self.config.rate_limit_rate + self.config.error_rate:
+            return 500, completion, delay
+        return None, completion, delay
+
+
+class MockOpenAIServer:
+    """Runs the stand-in on a free local port in a background thread while used as context manager"""
+
+    def __init__(self, config: MockServerConfig):
+        self._server = _Server(config)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def statistics(self) -> MockServerStatistics:
+        return self._server.statistics
+
+    def __enter__(self) -> MockOpenAIServer:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args: Any):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
@@ -18,6 +18,9 @@ setuptools.setup(
         "tiktoken>=0.7.0",
         "openai>=1.1.0",
     ],
+    extras_require={
+        "orjson": ["orjson>=3.0.0"],  # faster `to_json`/`from_json`
+    },
     packages=setuptools.find_packages(),
     classifiers=["Programming Language :: Python :: 3", "License :: OSI Approved :: MIT License", "Operating System :: OS Independent"],
     python_requires=">=3.10",
@@ -0,0 +1,83 @@
+import os
+import sys
+
+myPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, myPath + "/../")
+
+import json
+
+from typegpt import BaseLLMArrayElement, BaseLLMResponse
+from typegpt.batch import iter_parse, main, parse_batch
+from typegpt.exceptions import LLMOutputFieldMissing, LLMOutputFieldWrongType, LLMParseBudgetExceeded
+from typegpt.parser import ParseBudget
+
+
+class BatchTestOutput(BaseLLMResponse):
+    class Item(BaseLLMArrayElement):
+        name: str
+
+    title: str
+    count: int
+    items: list[Item]
+
+
+class TestBatch:
+    completions = [
+        "TITLE: First\nCOUNT: 1\nITEM 1 NAME: apple",
+        "COUNT: 2",
+        "TITLE: Third\nCOUNT: three",
+        "TITLE: Fourth\nCOUNT: 4",
+    ]
+
+    def check_result(self, result):
+        assert [index for index, _ in result.successes] == [0, 3]
+        assert result.successes[0][1].title == "First"
+        assert result.successes[0][1].items[0].name == "apple"
+        assert result.successes[1][1].count == 4
+
+        assert [index for index, _ in result.failures] == [1, 2]
+        assert isinstance(result.failures[0][1], LLMOutputFieldMissing)
+        assert isinstance(result.failures[1][1], LLMOutputFieldWrongType)
+        assert result.failures[1][1].field_name == "COUNT"
+        assert result.failures[1][1].raw_completion == self.completions[2]
+
+    def test_parse_batch(self):
+        self.check_result(parse_batch(self.completions, BatchTestOutput, chunk_size=3))
+
+    def test_parse_batch_with_workers(self):
+        self.check_result(parse_batch(iter(self.completions), BatchTestOutput, workers=2, chunk_size=1))
+
+        results = list(iter_parse(self.completions * 50, BatchTestOutput, workers=2, chunk_size=7))
+        assert [index for index, _ in results] == list(range(200))
+        assert [type(output) for _, output in results] == [type(output) for _, output in iter_parse(self.completions * 50, BatchTestOutput)]
+
+    def test_parse_batch_with_budget(self):
+        completions = self.completions + ["TITLE: Huge\nCOUNT: 5\n" + "ITEM 1 NAME: spam\n" * 1000]
+        result = parse_batch(completions, BatchTestOutput, workers=1, budget=ParseBudget(max_length=1000))
+
+        assert [index for index, _ in result.successes] == [0, 3]
+        assert [index for index, _ in result.failures] == [1, 2, 4]
+        assert isinstance(result.failures[2][1], LLMParseBudgetExceeded)
+
+    def test_command_line(self, tmp_path, capsys):
+        input_path = tmp_path / "completions.jsonl"
+        output_path = tmp_path / "results.jsonl"
+
+        lines = [json.dumps({"completion": self.completions[0], "id": "a"}), "", json.dumps(self.completions[2])]
+        input_path.write_text("\n".join(lines) + "\n")
+
+        assert main(["test_batch:BatchTestOutput", str(input_path), str(output_path)]) == 0
+
+        results = [json.loads(line) for line in output_path.read_text().splitlines()]
+        assert results == [
+            {"index": 0, "output": {"title": "First", "count": 1, "items": [{"name": "apple"}]}},
+            {
+                "index": 1,
+                "error": {"type": "LLMOutputFieldWrongType", "message": '"three" is not a valid integer value', "field_name": "COUNT"},
+            },
+        ]
+        assert "1 succeeded, 1 failed" in capsys.readouterr().err
+
+        input_path.write_text("")
+        assert main(["test_batch:BatchTestOutput", str(input_path), str(output_path), "--workers", "2"]) == 0
+        assert output_path.read_text() == ""
@@ -0,0 +1,108 @@
+import os
+import sys
+
+myPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, myPath + "/../")
+
+from array import array
+
+import pytest
+
+from typegpt import BaseLLMArrayElement, BaseLLMResponse
+from typegpt.columnar import iter_columns, to_columns
+
+
+class TestColumnar:
+    class Output(BaseLLMResponse):
+        class Item(BaseLLMArrayElement):
+            name: str
+            price: float | None
+            ratings: list[int]
+
+        class Details(BaseLLMResponse):
+            summary: str
+            is_vegan: bool
+
+        title: str
+        count: int | None
+        details: Details | None
+        tags: list[str]
+        items: list[Item]
+
+    def outputs(self) -> list[Output]:
+        return [
+            self.Output(
+                title="First",
+                count=None,
+                details=self.Output.Details(summary="Some summary", is_vegan=True),
+                tags=["a"],
+                items=[self.Output.Item(name="apple", price=None, ratings=[1, 2]), self.Output.Item(name="pear", price=0.5, ratings=[])],
+            ),
+            self.Output(title="Second", count=3, details=None, tags=["b", "c"], items=[]),
+            self.Output(title="Third", count=7, details=None, tags=[], items=[self.Output.Item(name="plum", price=2.0, ratings=[5])]),
+        ]
+
+    def test_to_columns(self):
+        batch = to_columns(self.outputs())
+
+        assert batch.output_type is self.Output
+        assert batch.num_rows == 3
+        assert set(batch.columns) == {
+            "title",
+            "count",
+            "details.summary",
+            "details.is_vegan",
+            "tags",
+            "items.name",
+            "items.price",
+            "items.ratings",
+        }
+
+        assert batch.columns["title"].values == ["First", "Second", "Third"]
+        assert batch.columns["title"].mask is None
+
+        assert batch.columns["count"].values == array("q", [0, 3, 7])
+        assert batch.columns["count"].mask == array("b", [1, 0, 0])
+
+        # missing optional nested objects mask all of their columns
+        assert batch.columns["details.summary"].values == ["Some summary", "", ""]
+        assert batch.columns["details.summary"].mask == array("b", [0, 1, 1])
+        assert batch.columns["details.is_vegan"].values == array("b", [1, 0, 0])
+
+        assert batch.columns["tags"].values == ["a", "b", "c"]
+        assert batch.offsets["tags"] == array("q", [0, 1, 3, 3])
+
+        assert batch.offsets["items"] == array("q", [0, 2, 2, 3])
+        assert batch.columns["items.name"].values == ["apple", "pear", "plum"]
+        assert batch.columns["items.price"].values == array("d", [0.0, 0.5, 2.0])
+        assert batch.columns["items.price"].mask == array("b", [1, 0, 0])
+
+        # lists inside array elements are offset per element
+        assert batch.columns["items.ratings"].values == array("q", [1, 2, 5])
+        assert batch.offsets["items.ratings"] == array("q", [0, 2, 2, 3])
+
+    def test_iter_columns_in_chunks(self):
+        batches = list(iter_columns(self.outputs() * 3, chunk_size=4))
+
+        assert [batch.num_rows for batch in batches] == [4, 4, 1]
+        assert batches[1].columns["title"].values == ["Second", "Third", "First", "Second"]
+        assert batches[1].offsets["tags"] == array("q", [0, 2, 2, 3, 5])
+        assert batches[2].offsets["items"] == array("q", [0, 1])
+
+        assert list(iter_columns([], output_type=self.Output)) == []
+        assert to_columns([], output_type=self.Output).num_rows == 0
+
+        with pytest.raises(TypeError):
+            list(iter_columns([self.outputs()[0], self.Output.Details(summary="x", is_vegan=False)]))
+
+    def test_numpy_columns(self):
+        numpy = pytest.importorskip("numpy")
+
+        batch = to_columns(self.outputs(), use_numpy=True)
+
+        assert batch.columns["count"].values.dtype == numpy.int64
+        assert batch.columns["count"].mask.tolist() == [True, False, False]
+        assert batch.columns["details.is_vegan"].values.tolist() == [True, False, False]
+        assert batch.columns["items.price"].values.tolist() == [0.0, 0.5, 2.0]
+        assert batch.columns["title"].values.tolist() == ["First", "Second", "Third"]
+        assert batch.offsets["items"].tolist() == [0, 2, 2, 3]
@@ -0,0 +1,160 @@
+import os
+import sys
+
+myPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, myPath + "/../")
+
+import gc
+import json
+import pickle
+import weakref
+
+import pytest
+
+from typegpt import BaseLLMArrayElement, BaseLLMResponse
+from typegpt.batch import parse_batch
+from typegpt.dynamic import OutputTypeCache, create_output_type
+from typegpt.exceptions import LLMOutputFieldWrongType
+from typegpt.prompt_builder import OutputPromptFactory
+
+
+class TestDynamic:
+    spec = {
+        "name": "Recipe",
+        "fields": [
+            {"key": "title", "instruction": "Put the recipe title here"},
+            {"key": "servings", "type": "int", "optional": True},
+            {"key": "tags", "type": "list[str]", "count": [1, 3], "instruction": "Put the {ordinal} tag here"},
+            {
+                "key": "ingredients",
+                "type": "list[object]",
+                "name": "Ingredient",
+                "fields": [
+                    {"key": "name"},
+                    {"key": "amount", "type": "float", "default": 1.0, "instruction": "Put the amount of the {ordinal} ingredient here"},
+                ],
+            },
+            {"key": "notes", "optional": True, "multiline": True},
+            {"key": "details", "type": "object", "optional": True, "fields": [{"key": "difficulty", "type": "int"}]},
+        ],
+    }
+
+    def test_create_output_type(self):
+        output_type = create_output_type(self.spec, cache=None)
+
+        class Recipe(BaseLLMResponse):
+            class Ingredient(BaseLLMArrayElement):
+                name: str
+                amount: float = 1.0
+
+            class Details(BaseLLMResponse):
+                difficulty: int
+
+            title: str
+            servings: int | None
+            tags: list[str]
+            ingredients: list[Ingredient]
+            notes: str | None
+            details: Details | None
+
+        assert output_type.__name__ == "Recipe"
+        assert list(output_type.__fields__) == list(Recipe.__fields__)
+        assert output_type.__fields__["notes"].info.multiline
+        assert output_type.__fields__["tags"].info.min_count == 1 and output_type.__fields__["tags"].info.max_count == 3
+
+        schema_prompt = OutputPromptFactory.for_type(output_type).generate()
+        assert "TITLE: <Put the recipe title here>" in schema_prompt
+        assert "TAG 2: <Put the second tag here>" in schema_prompt
+        assert "INGREDIENT 2 AMOUNT: <Put the amount of the second ingredient here>" in schema_prompt
+
+        completion = "TITLE: Pie\nTAG 1: sweet\nINGREDIENT 1 NAME: flour\nINGREDIENT 1 AMOUNT: 2\nINGREDIENT 2 NAME: salt\nNOTES: a\nb\nDETAILS DIFFICULTY: 3"
+        output = output_type.parse_response(completion)
+        assert output.to_dict() == {
+            "title": "Pie",
+            "servings": None,
+            "tags": ["sweet"],
+            "ingredients": [{"name": "flour", "amount": 2.0}, {"name": "salt", "amount": 1.0}],
+            "notes": "a\nb",
+            "details": {"difficulty": 3},
+        }
+
+        with pytest.raises(LLMOutputFieldWrongType):
+            output_type.parse_response("TITLE: Pie\nSERVINGS: many")
+
+        # short labels apply to the nested classes too
+        short_output_type = create_output_type(self.spec | {"short_labels": True}, cache=None)
+        assert "I 2 A: <Put the amount of the second ingredient here>" in OutputPromptFactory.for_type(short_output_type).generate()
+        short_output = short_output_type.parse_response("T: Pie\nTA 1: sweet\nI 1 N: flour\nI 1 A: 2\nI 2 N: salt\nN: a\nb\nD D: 3")
+        assert short_output.to_dict() == output.to_dict()
+
+        tabular_spec = self.spec | {"fields": [field | {"tabular": True} if field["key"] == "ingredients" else field for field in self.spec["fields"]]}
+        tabular_output_type = create_output_type(tabular_spec, cache=None)
+        assert "INGREDIENT: NAME | AMOUNT" in OutputPromptFactory.for_type(tabular_output_type).generate()
+        tabular_output = tabular_output_type.parse_response("TITLE: Pie\nTAG 1: sweet\nINGREDIENT: NAME | AMOUNT\nflour | 2\nsalt\nNOTES: a\nb\nDETAILS DIFFICULTY: 3")
+        assert tabular_output.to_dict() == output.to_dict()
+
+    def test_invalid_spec(self):
+        with pytest.raises(ValueError, match="unsupported type"):
+            create_output_type({"fields": [{"key": "title", "type": "date"}]})
+        with pytest.raises(ValueError, match="unknown spec keys"):
+            create_output_type({"fields": [{"key": "title", "requird": True}]})
+        with pytest.raises(ValueError, match="can't be optional"):
+            create_output_type({"fields": [{"key": "tags", "type": "list[str]", "optional": True}]})
+        with pytest.raises(ValueError, match="non-empty list"):
+            create_output_type({"fields": [{"key": "details", "type": "object"}]})
+        with pytest.raises(ValueError, match="valid identifier"):
+            create_output_type({"fields": [{"key": "not valid"}]})
+        with pytest.raises(ValueError, match="invalid count"):
+            create_output_type({"fields": [{"key": "tags", "type": "list[str]", "count": "3"}]})
+        with pytest.raises(ValueError, match="invalid count"):
+            create_output_type({"fields": [{"key": "tags", "type": "list[str]", "count": [1, 2, 3]}]})
+        with pytest.raises(ValueError, match="invalid count"):
+            create_output_type({"fields": [{"key": "tags", "type": "list[str]", "count": [None, 2]}]})
+        with pytest.raises(ValueError, match="can't be tabular"):
+            create_output_type({"fields": [{"key": "tags", "type": "list[str]", "tabular": True}]})
+
+    def test_cache(self):
+        cache = OutputTypeCache(maxsize=2)
+
+        output_type = cache.get(self.spec)
+        assert cache.get(json.dumps(self.spec)) is output_type
+
+        # equivalent after filling in the defaults
+        assert cache.get({"fields": [{"key": "title"}]}) is cache.get({"name": "Output", "fields": [{"key": "title", "type": "str", "optional": False}]})
+        assert cache.get({"fields": [{"key": "title"}]}) is not cache.get({"fields": [{"key": "title", "optional": True}]})
+
+    def test_cache_memory_is_bounded(self):
+        cache = OutputTypeCache(maxsize=10)
+
+        kept = cache.get({"name": "Kept", "fields": [{"key": "title"}]})
+        references = [weakref.ref(cache.get({"name": f"Tenant{i}", "fields": [{"key": f"field_{i}"}]})) for i in range(500)]
+        gc.collect()
+
+        assert sum(reference() is not None for reference in references) == 10
+        assert len(cache) == 11  # still referenced classes stay shared
+        assert cache.get({"name": "Kept", "fields": [{"key": "title"}]}) is kept
+
+    def test_pickle(self):
+        output_type = create_output_type(self.spec)
+        completion = "TITLE: Pie\nTAG 1: sweet\nINGREDIENT 1 NAME: flour\nINGREDIENT 1 AMOUNT: 2\nDETAILS DIFFICULTY: 3"
+        output = output_type.parse_response(completion)
+
+        restored = pickle.loads(pickle.dumps(output))
+        assert type(restored) is output_type
+        assert type(restored.ingredients[0]) is type(output.ingredients[0])
+        assert restored.to_dict() == output.to_dict()
+
+        # classes that are not cached are recreated from their spec
+        uncached_output = create_output_type(self.spec | {"name": "Uncached"}, cache=None).parse_response(completion)
+        restored = pickle.loads(pickle.dumps(uncached_output))
+        assert type(restored).__name__ == "Uncached"
+        assert restored.to_dict() == uncached_output.to_dict()
+
+    def test_parse_batch_with_workers(self):
+        output_type = create_output_type(self.spec)
+        completions = [f"TITLE: Pie {i}\nTAG 1: sweet\nINGREDIENT 1 NAME: flour" for i in range(4)]
+
+        result = parse_batch(completions, output_type, workers=2, chunk_size=1)
+        assert not result.failures
+        assert [output.title for _, output in result.successes] == [f"Pie {i}" for i in range(4)]
+        assert all(type(output) is output_type for _, output in result.successes)
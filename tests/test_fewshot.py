@@ -87,6 +87,15 @@ TITLE: <Put the title here>
             {"role": "user", "content": "Some user prompt"},
         ]
 
+        # JSON output has no format instructions and JSON examples
+        messages_json = prompt_one.generate_messages(token_limit=1000, token_counter=lambda x: 0, json_output=True)
+        assert messages_json == [
+            {"role": "system", "content": "Some system prompt"},
+            {"role": "system", "name": "example_user", "content": "Some input 0"},
+            {"role": "system", "name": "example_assistant", "content": '{"title":"Some title 0"}'},
+            {"role": "user", "content": "Some user prompt"},
+        ]
+
     class ComplexPrompt(PromptTemplate):
         class Output(BaseLLMResponse):
             class Item(BaseLLMArrayElement):
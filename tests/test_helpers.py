@@ -172,3 +172,32 @@ class TestHelpers:
         assert is_supported_output_type(Union[str, int, None]) == False
 
         assert is_supported_output_type(Literal["a", "b", "c"]) == False  # type: ignore # TODO: support in future
+
+    def test_describe_type(self):
+        descriptor = describe_type(int | None)
+        assert descriptor.base_type == int
+        assert descriptor.is_optional == True
+        assert descriptor.is_array == False
+        assert descriptor.item_type is None
+        assert descriptor.response_type is None
+        assert descriptor.array_element_type is None
+
+        descriptor = describe_type(List[float])
+        assert descriptor.is_optional == False
+        assert descriptor.is_array == True
+        assert descriptor.item_type == float
+        assert descriptor.array_element_type is None
+
+        descriptor = describe_type(Optional[self.SomeResponseOutput])
+        assert descriptor.base_type == self.SomeResponseOutput
+        assert descriptor.response_type == self.SomeResponseOutput
+
+        descriptor = describe_type(list[self.SomeArrayElement])
+        assert descriptor.item_type == self.SomeArrayElement
+        assert descriptor.array_element_type == self.SomeArrayElement
+        assert descriptor.response_type is None
+
+        class Output(BaseLLMResponse):
+            items: list[TestHelpers.SomeArrayElement]
+
+        assert Output.__fields__["items"].descriptor == descriptor
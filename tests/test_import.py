@@ -0,0 +1,39 @@
+import os
+import sys
+
+myPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, myPath + "/../")
+
+import json
+import subprocess
+
+
+def loaded_modules(code: str) -> set[str]:
+    """Runs the code in a fresh interpreter and returns the top-level names of all modules imported afterwards"""
+    code += "\nimport json, sys\nprint(json.dumps(sorted({name.split('.')[0] for name in sys.modules})))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=myPath + "/../", capture_output=True, text=True, check=True)
+    return set(json.loads(result.stdout))
+
+
+class TestImport:
+    def test_lazy_dependencies(self):
+        modules = loaded_modules("import typegpt")
+        assert "typegpt" in modules
+        assert not {"inflect", "typeguard", "tiktoken", "openai"} & modules
+
+        modules = loaded_modules("import typegpt.openai")
+        assert "openai" in modules
+        assert not {"inflect", "tiktoken"} & modules
+
+    def test_dependencies_loaded_on_first_use(self):
+        modules = loaded_modules(
+            """
+from typegpt import BaseLLMResponse
+
+class Output(BaseLLMResponse):
+    mice: list[str]
+
+assert Output.__fields__["mice"].name == "MOUSE"
+"""
+        )
+        assert "inflect" in modules
@@ -0,0 +1,138 @@
+import os
+import sys
+
+myPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, myPath + "/../")
+
+import json
+
+import pytest
+
+from typegpt import BaseLLMArrayElement, BaseLLMResponse, LLMArrayOutput, LLMOutput
+from typegpt.exceptions import LLMOutputFieldInvalidLength, LLMOutputFieldMissing, LLMOutputFieldWrongType, LLMParseException
+from typegpt.json_schema import generate_json_schema, response_format_for_type, tool_choice_for_type, tool_for_type
+
+
+class TestJSONSchema:
+    class RecipeOutput(BaseLLMResponse):
+        class Ingredient(BaseLLMArrayElement):
+            name: str
+            amount: float = 1.0
+
+        class Details(BaseLLMResponse):
+            difficulty: int
+            is_vegan: bool
+
+        title: str = LLMOutput("Put the recipe title here")
+        servings: int | None
+        tags: list[str] = LLMArrayOutput((1, 3), lambda pos: f"The {pos.ordinal} tag")
+        ingredients: list[Ingredient]
+        details: Details | None
+
+    def test_strict_schema(self):
+        ingredient_schema = {
+            "type": "object",
+            "properties": {"name": {"type": "string"}, "amount": {"anyOf": [{"type": "number"}, {"type": "null"}]}},
+            "required": ["name", "amount"],
+            "additionalProperties": False,
+        }
+        details_schema = {
+            "type": "object",
+            "properties": {
+                "difficulty": {"type": "integer", "description": "Put the difficulty here"},
+                "is_vegan": {"type": "boolean", "description": "'true' if is vegan, else 'false'"},
+            },
+            "required": ["difficulty", "is_vegan"],
+            "additionalProperties": False,
+        }
+
+        assert generate_json_schema(self.RecipeOutput) == {
+            "type": "object",
+            "properties": {
+                "title": {"type": "string", "description": "Put the recipe title here"},
+                "servings": {"anyOf": [{"type": "integer", "description": "Put the servings here"}, {"type": "null"}]},
+                "tags": {"type": "array", "items": {"type": "string"}, "description": "between 1 and 3 items"},
+                "ingredients": {"type": "array", "items": ingredient_schema},
+                "details": {"anyOf": [details_schema, {"type": "null"}]},
+            },
+            "required": ["title", "servings", "tags", "ingredients", "details"],
+            "additionalProperties": False,
+        }
+
+        response_format = response_format_for_type(self.RecipeOutput)
+        assert response_format["type"] == "json_schema"
+        assert response_format["json_schema"]["name"] == "RecipeOutput"
+        assert response_format["json_schema"]["strict"] is True
+        assert response_format_for_type(self.RecipeOutput) is response_format  # generated only once
+
+    def test_non_strict_schema(self):
+        schema = generate_json_schema(self.RecipeOutput, strict=False)
+
+        assert schema["required"] == ["title", "tags", "ingredients"]
+        assert schema["properties"]["tags"] == {"type": "array", "items": {"type": "string"}, "minItems": 1, "maxItems": 3}
+        assert schema["properties"]["ingredients"]["items"]["required"] == ["name"]
+
+    def test_tool(self):
+        tool = tool_for_type(self.RecipeOutput)
+
+        assert tool == {"type": "function", "function": {"name": "RecipeOutput", "parameters": generate_json_schema(self.RecipeOutput, strict=False)}}
+        assert tool_for_type(self.RecipeOutput) is tool  # generated only once
+        assert tool_choice_for_type(self.RecipeOutput) == {"type": "function", "function": {"name": "RecipeOutput"}}
+
+    def test_parse_json_response(self):
+        completion = json.dumps(
+            {
+                "title": "Pie",
+                "servings": None,
+                "tags": ["sweet", "baked"],
+                "ingredients": [{"name": "flour", "amount": 2}, {"name": "salt", "amount": None}],
+                "details": {"difficulty": 3, "is_vegan": True},
+            }
+        )
+        output = self.RecipeOutput.parse_json_response(completion)
+
+        assert output.to_dict() == {
+            "title": "Pie",
+            "servings": None,
+            "tags": ["sweet", "baked"],
+            "ingredients": [{"name": "flour", "amount": 2.0}, {"name": "salt", "amount": 1.0}],
+            "details": {"difficulty": 3, "is_vegan": True},
+        }
+        assert isinstance(output.ingredients[0].amount, float)
+        assert output.__raw_completion__ == completion
+
+        # equal to the result of the label parser
+        labeled_completion = "TITLE: Pie\nTAG 1: sweet\nTAG 2: baked\nINGREDIENT 1 NAME: flour\nINGREDIENT 1 AMOUNT: 2\nINGREDIENT 2 NAME: salt\nDETAILS DIFFICULTY: 3\nDETAILS IS VEGAN: true"
+        assert self.RecipeOutput.parse_response(labeled_completion).to_dict() == output.to_dict()
+
+    def test_parse_json_response_errors(self):
+        valid = {"title": "Pie", "servings": 2, "tags": ["sweet"], "ingredients": [{"name": "flour", "amount": 2}], "details": None}
+
+        with pytest.raises(LLMParseException) as exc_info:
+            self.RecipeOutput.parse_json_response('{"title": "Pie"')
+        assert exc_info.value.raw_completion == '{"title": "Pie"'
+
+        with pytest.raises(LLMOutputFieldMissing) as exc_info:
+            self.RecipeOutput.parse_json_response(json.dumps(valid | {"title": None}))
+        assert exc_info.value.field_name == "TITLE"
+
+        with pytest.raises(LLMOutputFieldMissing) as exc_info:
+            self.RecipeOutput.parse_json_response(json.dumps(valid | {"ingredients": [{"amount": 2}]}))
+        assert exc_info.value.field_name == "INGREDIENT 1 NAME"
+
+        with pytest.raises(LLMOutputFieldWrongType) as exc_info:
+            self.RecipeOutput.parse_json_response(json.dumps(valid | {"servings": "two"}))
+        assert exc_info.value.field_name == "SERVINGS"
+
+        with pytest.raises(LLMOutputFieldWrongType):
+            self.RecipeOutput.parse_json_response(json.dumps(valid | {"servings": True}))
+
+        with pytest.raises(LLMOutputFieldWrongType) as exc_info:
+            self.RecipeOutput.parse_json_response(json.dumps(valid | {"details": {"difficulty": 1, "is_vegan": "yes"}}))
+        assert exc_info.value.field_name == "DETAILS IS VEGAN"
+
+        with pytest.raises(LLMOutputFieldInvalidLength):
+            self.RecipeOutput.parse_json_response(json.dumps(valid | {"tags": ["a", "b", "c", "d"]}))
+
+        with pytest.raises(LLMOutputFieldWrongType):
+            self.RecipeOutput.parse_json_response("[]")
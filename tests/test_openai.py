@@ -5,17 +5,20 @@ myPath = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, myPath + "/../")
 
 from typing import List, Optional, Union
-from unittest.mock import Mock
+from unittest.mock import ANY, Mock
 
 import pytest
 from openai import AsyncOpenAI
+from openai._types import NOT_GIVEN
 from openai.types.chat import ChatCompletion
 from openai.types.chat.chat_completion import Choice
 from openai.types.chat.chat_completion_message import ChatCompletionMessage
+from openai.types.chat.chat_completion_message_tool_call import ChatCompletionMessageToolCall, Function
 
 from typegpt import BaseLLMResponse, LLMArrayOutput, LLMOutput, PromptTemplate
-from typegpt.exceptions import LLMOutputFieldWrongType, LLMTokenLimitExceeded
-from typegpt.openai import AsyncTypeAzureOpenAI, AsyncTypeOpenAI, OpenAIChatModel, TypeAzureOpenAI, TypeOpenAI
+from typegpt.exceptions import LLMOutputFieldWrongType, LLMParseBudgetExceeded, LLMParseException, LLMTokenLimitExceeded
+from typegpt.openai import AsyncTypeAzureOpenAI, AsyncTypeOpenAI, OpenAIChatModel, RetryStatistics, TypeAzureOpenAI, TypeOpenAI
+from typegpt.parser import ParseBudget
 
 
 class TestOpenAIChatCompletion:
@@ -404,6 +407,521 @@ class TestOpenAIChatCompletion:
         assert result.items == ["abc"]
         assert result.count == 42
 
+    @pytest.fixture
+    def mock_openai_feedback_completion(self, mocker):
+        requests: list[list[dict]] = []
+
+        def sync_mock(*args, **kwargs):
+            requests.append(kwargs["messages"])
+
+            if len(requests) == 1:
+                content_res = "TITLE: Some title\nCOUNT: many"  # wrong type
+            else:
+                content_res = "TITLE: Some title\nCOUNT: 42"
+
+            return ChatCompletion(
+                id="test",
+                model="gpt-3.5-turbo",
+                object="chat.completion",
+                created=123,
+                choices=[
+                    Choice(
+                        finish_reason="stop",
+                        index=1,
+                        message=ChatCompletionMessage(role="assistant", content=content_res),
+                    )
+                ],
+            )
+
+        mocker.patch("typegpt.openai._sync.chat_completion.TypeChatCompletion.create", new=sync_mock)
+        return requests
+
+    def test_mock_parse_retry_with_feedback(self, mock_openai_feedback_completion):
+        class FullExamplePrompt(PromptTemplate):
+            def system_prompt(self) -> str:
+                return "This is a random system prompt"
+
+            def user_prompt(self) -> str:
+                return "This is a random user prompt"
+
+            class Output(BaseLLMResponse):
+                title: str
+                count: int
+
+        client = TypeOpenAI(api_key="mock")
+        statistics = RetryStatistics()
+
+        result = client.chat.completions.generate_output(
+            model="gpt-3.5-turbo-0613",
+            prompt=FullExamplePrompt(),
+            max_output_tokens=100,
+            retry_on_parse_error=2,
+            retry_strategy="feedback",
+            retry_statistics=statistics,
+        )
+
+        assert isinstance(result, FullExamplePrompt.Output)
+        assert result.count == 42
+
+        first_request, second_request = mock_openai_feedback_completion
+        assert len(second_request) == len(first_request) + 2
+        assert second_request[: len(first_request)] == first_request
+        assert second_request[-2] == {"role": "assistant", "content": "TITLE: Some title\nCOUNT: many"}
+        assert second_request[-1]["role"] == "user"
+        assert '"COUNT"' in second_request[-1]["content"]
+        assert "not a valid integer" in second_request[-1]["content"]
+
+        assert statistics.attempts == [1, 1]
+        assert statistics.successes == [0, 1]
+        assert statistics.success_rate(0) == 0.0
+        assert statistics.fix_rate == 1.0
+
+    @pytest.fixture
+    def mock_openai_repair_completion(self, mocker):
+        requests: list[list[dict]] = []
+
+        async def async_mock(*args, **kwargs):
+            requests.append(kwargs["messages"])
+
+            if len(requests) == 1:
+                content_res = "TITLE: Some title\nDESCRIPTION: Some description\nCOUNT: many"  # wrong type
+            else:
+                content_res = "COUNT: 42"
+
+            return ChatCompletion(
+                id="test",
+                model="gpt-3.5-turbo",
+                object="chat.completion",
+                created=123,
+                choices=[
+                    Choice(
+                        finish_reason="stop",
+                        index=1,
+                        message=ChatCompletionMessage(role="assistant", content=content_res),
+                    )
+                ],
+            )
+
+        mocker.patch("typegpt.openai._async.chat_completion.AsyncTypeChatCompletion.create", new=async_mock)
+        return requests
+
+    @pytest.mark.asyncio
+    async def test_mock_parse_retry_with_repair(self, mock_openai_repair_completion):
+        class FullExamplePrompt(PromptTemplate):
+            def system_prompt(self) -> str:
+                return "This is a random system prompt"
+
+            def user_prompt(self) -> str:
+                return "This is a random user prompt"
+
+            class Output(BaseLLMResponse):
+                title: str
+                description: str
+                count: int
+
+        client = AsyncTypeOpenAI(api_key="mock")
+
+        result = await client.chat.completions.generate_output(
+            model="gpt-3.5-turbo-0613",
+            prompt=FullExamplePrompt(),
+            max_output_tokens=100,
+            retry_on_parse_error=1,
+            retry_strategy="repair",
+        )
+
+        assert isinstance(result, FullExamplePrompt.Output)
+        assert result.title == "Some title"
+        assert result.description == "Some description"
+        assert result.count == 42
+
+        first_request, repair_request = mock_openai_repair_completion
+        assert repair_request[: len(first_request)] == first_request
+        assert repair_request[-2]["role"] == "assistant"
+        assert repair_request[-1]["role"] == "user"
+        assert "COUNT: <Put the count here>" in repair_request[-1]["content"]
+        assert "TITLE: <Put the title here>" not in repair_request[-1]["content"]
+
+    @pytest.mark.asyncio
+    async def test_mock_parse_retry_with_failing_repair(self, mock_openai_repair_completion, mocker):
+        class FullExamplePrompt(PromptTemplate):
+            def system_prompt(self) -> str:
+                return "This is a random system prompt"
+
+            def user_prompt(self) -> str:
+                return "This is a random user prompt"
+
+            class Output(BaseLLMResponse):
+                title: str
+                description: str
+                count: int
+
+        mocker.patch("typegpt.repair.Parser.parse_partial", side_effect=LLMParseBudgetExceeded("Parse timeout exceeded"))
+        client = AsyncTypeOpenAI(api_key="mock")
+
+        # the completion can't be parsed partially, so it is regenerated instead of repaired
+        with pytest.raises(LLMParseException) as exc:
+            await client.chat.completions.generate_output(
+                model="gpt-3.5-turbo-0613",
+                prompt=FullExamplePrompt(),
+                max_output_tokens=100,
+                retry_on_parse_error=1,
+                retry_strategy="repair",
+            )
+
+        first_request, second_request = mock_openai_repair_completion
+        assert second_request == first_request
+        assert exc.value.raw_completion == "COUNT: 42"
+
+    @pytest.fixture
+    def mock_openai_oversized_completion(self, mocker):
+        requests: list[list[dict]] = []
+
+        def sync_mock(*args, **kwargs):
+            requests.append(kwargs["messages"])
+
+            if len(requests) == 1:
+                content_res = "TITLE: Some title\nCOUNT: 42\n" + "TITLE: spam\n" * 1000
+            else:
+                content_res = "TITLE: Some title\nCOUNT: 42"
+
+            return ChatCompletion(
+                id="test",
+                model="gpt-3.5-turbo",
+                object="chat.completion",
+                created=123,
+                choices=[
+                    Choice(
+                        finish_reason="stop",
+                        index=1,
+                        message=ChatCompletionMessage(role="assistant", content=content_res),
+                    )
+                ],
+            )
+
+        mocker.patch("typegpt.openai._sync.chat_completion.TypeChatCompletion.create", new=sync_mock)
+        return requests
+
+    def test_mock_parse_budget_retry(self, mock_openai_oversized_completion):
+        class FullExamplePrompt(PromptTemplate):
+            def system_prompt(self) -> str:
+                return "This is a random system prompt"
+
+            def user_prompt(self) -> str:
+                return "This is a random user prompt"
+
+            class Output(BaseLLMResponse):
+                title: str
+                count: int
+
+        client = TypeOpenAI(api_key="mock")
+        budget = ParseBudget(max_length=1000, timeout=1.0)
+
+        with pytest.raises(LLMParseBudgetExceeded):
+            client.chat.completions.generate_output(
+                model="gpt-3.5-turbo-0613", prompt=FullExamplePrompt(), max_output_tokens=100, parse_budget=budget
+            )
+
+        mock_openai_oversized_completion.clear()
+
+        # retried like any parse error, but the oversized completion is regenerated instead of repaired
+        result = client.chat.completions.generate_output(
+            model="gpt-3.5-turbo-0613",
+            prompt=FullExamplePrompt(),
+            max_output_tokens=100,
+            retry_on_parse_error=1,
+            retry_strategy="repair",
+            parse_budget=budget,
+        )
+
+        assert isinstance(result, FullExamplePrompt.Output)
+        assert result.count == 42
+
+        first_request, second_request = mock_openai_oversized_completion
+        assert second_request == first_request
+
+    @pytest.fixture
+    def mock_openai_truncated_completion(self, mocker):
+        requests: list[list[dict]] = []
+
+        def sync_mock(*args, **kwargs):
+            requests.append(kwargs["messages"])
+
+            if len(requests) == 1:
+                content_res, finish_reason = "TITLE: Some ti", "length"
+            else:
+                content_res, finish_reason = "tle\nCOUNT: 42", "stop"
+
+            return ChatCompletion(
+                id="test",
+                model="gpt-3.5-turbo",
+                object="chat.completion",
+                created=123,
+                choices=[
+                    Choice(
+                        finish_reason=finish_reason,
+                        index=1,
+                        message=ChatCompletionMessage(role="assistant", content=content_res),
+                    )
+                ],
+            )
+
+        mocker.patch("typegpt.openai._sync.chat_completion.TypeChatCompletion.create", new=sync_mock)
+        return requests
+
+    def test_mock_continue_truncated_completion(self, mock_openai_truncated_completion):
+        class FullExamplePrompt(PromptTemplate):
+            def system_prompt(self) -> str:
+                return "This is a random system prompt"
+
+            def user_prompt(self) -> str:
+                return "This is a random user prompt"
+
+            class Output(BaseLLMResponse):
+                title: str
+                count: int
+
+        client = TypeOpenAI(api_key="mock")
+
+        result = client.chat.completions.generate_output(
+            model="gpt-3.5-turbo-0613", prompt=FullExamplePrompt(), max_output_tokens=5, max_continuations=2
+        )
+
+        assert isinstance(result, FullExamplePrompt.Output)
+        assert result.title == "Some title"
+        assert result.count == 42
+        assert result.__raw_completion__ == "TITLE: Some title\nCOUNT: 42"
+
+        first_request, continuation_request = mock_openai_truncated_completion
+        assert continuation_request[: len(first_request)] == first_request
+        assert continuation_request[-2] == {"role": "assistant", "content": "TITLE: Some ti"}
+        assert continuation_request[-1]["role"] == "user"
+
+    @pytest.fixture
+    def mock_openai_completion_kwargs(self, mocker):
+        requests: list[dict] = []
+
+        def sync_mock(*args, **kwargs):
+            requests.append(kwargs)
+
+            return ChatCompletion(
+                id="test",
+                model="gpt-3.5-turbo",
+                object="chat.completion",
+                created=123,
+                choices=[
+                    Choice(
+                        finish_reason="stop",
+                        index=1,
+                        message=ChatCompletionMessage(role="assistant", content="TITLE: This is a test completion\nCOUNT: 09"),
+                    )
+                ],
+            )
+
+        mocker.patch("typegpt.openai._sync.chat_completion.TypeChatCompletion.create", new=sync_mock)
+        return requests
+
+    def test_mock_schema_stop_sequences(self, mock_openai_completion_kwargs):
+        class FullExamplePrompt(PromptTemplate):
+            def system_prompt(self) -> str:
+                return "This is a random system prompt"
+
+            def user_prompt(self) -> str:
+                return "This is a random user prompt"
+
+            class Output(BaseLLMResponse):
+                title: str
+                count: int
+
+        class MultilineExamplePrompt(FullExamplePrompt):
+            class Output(BaseLLMResponse):
+                title: str = LLMOutput("The title", multiline=True)
+                count: int
+
+        client = TypeOpenAI(api_key="mock")
+
+        client.chat.completions.generate_output(model="gpt-3.5-turbo-0613", prompt=FullExamplePrompt(), max_output_tokens=100)
+        client.chat.completions.generate_output(model="gpt-3.5-turbo-0613", prompt=MultilineExamplePrompt(), max_output_tokens=100)
+        client.chat.completions.generate_output(
+            model="gpt-3.5-turbo-0613", prompt=FullExamplePrompt(), max_output_tokens=100, use_stop_sequences=False
+        )
+
+        assert [request["stop"] for request in mock_openai_completion_kwargs] == [['\n"""'], NOT_GIVEN, NOT_GIVEN]
+
+    @pytest.fixture
+    def mock_openai_json_completion(self, mocker):
+        requests: list[dict] = []
+
+        def sync_mock(*args, **kwargs):
+            requests.append(kwargs)
+
+            return ChatCompletion(
+                id="test",
+                model="gpt-4o",
+                object="chat.completion",
+                created=123,
+                choices=[
+                    Choice(
+                        finish_reason="stop",
+                        index=1,
+                        message=ChatCompletionMessage(role="assistant", content='{"title": "This is a test completion", "count": 9}'),
+                    )
+                ],
+            )
+
+        mocker.patch("typegpt.openai._sync.chat_completion.TypeChatCompletion.create", new=sync_mock)
+        return requests
+
+    def test_mock_json_schema_output(self, mock_openai_json_completion):
+        class FullExamplePrompt(PromptTemplate):
+            def system_prompt(self) -> str:
+                return "This is a random system prompt"
+
+            def user_prompt(self) -> str:
+                return "This is a random user prompt"
+
+            class Output(BaseLLMResponse):
+                title: str
+                count: int
+
+        client = TypeOpenAI(api_key="mock")
+
+        result = client.chat.completions.generate_output(
+            model="gpt-4o", prompt=FullExamplePrompt(), max_output_tokens=100, output_format="json_schema"
+        )
+
+        assert isinstance(result, FullExamplePrompt.Output)
+        assert result.title == "This is a test completion"
+        assert result.count == 9
+
+        request = mock_openai_json_completion[0]
+        assert request["response_format"]["type"] == "json_schema"
+        assert request["response_format"]["json_schema"]["schema"]["required"] == ["title", "count"]
+        assert request["messages"][0]["content"] == "This is a random system prompt"  # no format instructions
+        assert request["stop"] is NOT_GIVEN
+
+    @pytest.fixture
+    def mock_openai_truncated_json_completion(self, mocker):
+        requests: list[dict] = []
+
+        def sync_mock(*args, **kwargs):
+            requests.append(kwargs)
+
+            if len(requests) == 1:
+                content_res, finish_reason = '{"title": "Some ti', "length"
+            else:
+                content_res, finish_reason = '{"title": "Some title", "count": 42}', "stop"
+
+            return ChatCompletion(
+                id="test",
+                model="gpt-4o",
+                object="chat.completion",
+                created=123,
+                choices=[
+                    Choice(
+                        finish_reason=finish_reason,
+                        index=1,
+                        message=ChatCompletionMessage(role="assistant", content=content_res),
+                    )
+                ],
+            )
+
+        mocker.patch("typegpt.openai._sync.chat_completion.TypeChatCompletion.create", new=sync_mock)
+        return requests
+
+    def test_mock_truncated_json_schema_output_is_not_continued(self, mock_openai_truncated_json_completion):
+        class FullExamplePrompt(PromptTemplate):
+            def system_prompt(self) -> str:
+                return "This is a random system prompt"
+
+            def user_prompt(self) -> str:
+                return "This is a random user prompt"
+
+            class Output(BaseLLMResponse):
+                title: str
+                count: int
+
+        client = TypeOpenAI(api_key="mock")
+
+        result = client.chat.completions.generate_output(
+            model="gpt-4o",
+            prompt=FullExamplePrompt(),
+            max_output_tokens=5,
+            max_continuations=2,
+            retry_on_parse_error=1,
+            output_format="json_schema",
+        )
+
+        assert isinstance(result, FullExamplePrompt.Output)
+        assert result.title == "Some title"
+        assert result.count == 42
+
+        # the truncated completion is regenerated instead of continued
+        first_request, retry_request = mock_openai_truncated_json_completion
+        assert retry_request["messages"] == first_request["messages"]
+        assert retry_request["response_format"] == first_request["response_format"]
+
+    @pytest.fixture
+    def mock_openai_tool_call_completion(self, mocker):
+        requests: list[dict] = []
+
+        def sync_mock(*args, **kwargs):
+            requests.append(kwargs)
+            tool_calls = [
+                ChatCompletionMessageToolCall(
+                    id="call_1", type="function", function=Function(name="Output", arguments='{"title": "This is a test completion", "count": 9}')
+                )
+            ]
+
+            return ChatCompletion(
+                id="test",
+                model="gpt-4-turbo",
+                object="chat.completion",
+                created=123,
+                choices=[
+                    Choice(
+                        finish_reason="stop",
+                        index=1,
+                        message=ChatCompletionMessage(role="assistant", content=None, tool_calls=tool_calls if len(requests) > 1 else None),
+                    )
+                ],
+            )
+
+        mocker.patch("typegpt.openai._sync.chat_completion.TypeChatCompletion.create", new=sync_mock)
+        return requests
+
+    def test_mock_tool_call_output(self, mock_openai_tool_call_completion):
+        class FullExamplePrompt(PromptTemplate):
+            def system_prompt(self) -> str:
+                return "This is a random system prompt"
+
+            def user_prompt(self) -> str:
+                return "This is a random user prompt"
+
+            class Output(BaseLLMResponse):
+                title: str
+                count: int
+
+        client = TypeOpenAI(api_key="mock")
+
+        # a completion without tool call fails to parse (and is retried like any other invalid completion)
+        with pytest.raises(LLMParseException):
+            client.chat.completions.generate_output(model="gpt-4-turbo", prompt=FullExamplePrompt(), max_output_tokens=100, output_format="tool_call")
+
+        result = client.chat.completions.generate_output(
+            model="gpt-4-turbo", prompt=FullExamplePrompt(), max_output_tokens=100, output_format="tool_call"
+        )
+
+        assert isinstance(result, FullExamplePrompt.Output)
+        assert result.title == "This is a test completion"
+        assert result.count == 9
+
+        request = mock_openai_tool_call_completion[1]
+        assert request["tools"] == [{"type": "function", "function": {"name": "Output", "parameters": ANY}}]
+        assert request["tool_choice"] == {"type": "function", "function": {"name": "Output"}}
+        assert request["response_format"] is NOT_GIVEN
+        assert request["messages"][0]["content"] == "This is a random system prompt"  # no format instructions
+        assert request["stop"] is NOT_GIVEN
+
     @pytest.mark.asyncio
     async def test_mock_reduce_prompt(self, mock_openai_completion):
         class NonAutomaticReducingPrompt(PromptTemplate):
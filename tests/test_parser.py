@@ -4,13 +4,26 @@ import sys
 myPath = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, myPath + "/../")
 
+import gc
 import logging
+import random
+import re
+import time
+import weakref
 
 import pytest
 
 from typegpt import BaseLLMArrayElement, BaseLLMResponse, LLMArrayElementOutput, LLMArrayOutput, LLMOutput, PromptTemplate
-from typegpt.exceptions import LLMOutputFieldInvalidLength, LLMOutputFieldMissing, LLMOutputFieldWrongType
-from typegpt.fields import ExamplePosition, LLMArrayOutputInfo
+from typegpt.dynamic import create_output_type
+from typegpt.example_builder import ExampleOutputFactory
+from typegpt.exceptions import (
+    LLMOutputFieldInvalidLength,
+    LLMOutputFieldMissing,
+    LLMOutputFieldWrongType,
+    LLMParseBudgetExceeded,
+)
+from typegpt.fields import ExamplePosition, LLMArrayOutputInfo, LLMFieldInfo
+from typegpt.parser import ParseBudget, Parser
 from typegpt.utils.internal_types import _NoDefault
 
 
@@ -339,6 +352,146 @@ SUBITEM TITLE: A subitem title (!!)
         assert parsed_output_2.subitem.title == "A subitem title (!!)"
         assert parsed_output_2.optional_subitem is None
 
+    def test_parse_error_field_name(self):
+        with pytest.raises(LLMOutputFieldMissing) as exc1:
+            self.SubtypeTestOutput.parse_response("TITLE: Hello world")
+
+        assert exc1.value.field_name == "SUBITEM TITLE"
+
+        completion_output = """
+TITLE: Hello world
+ITEM 1 SUBTITLE: subtitle one
+ITEM 1 DESCRIPTION: description one
+ITEM 2 DESCRIPTION: description two
+SUBITEM TITLE: A subitem title
+""".strip()
+
+        with pytest.raises(LLMOutputFieldMissing) as exc2:
+            self.SubtypeTestOutput.parse_response(completion_output)
+
+        assert exc2.value.field_name == "ITEM 2 SUBTITLE"
+
+        with pytest.raises(LLMOutputFieldWrongType) as exc3:
+            self.MultilineMultipleTestOutput.parse_response("TEXT: L1\nVALUE: 8xz")
+
+        assert exc3.value.field_name == "VALUE"
+
+    def test_construct_from_parsed_values(self):
+        output = self.SimpleTestOutput._construct(
+            {
+                "title": "Some title",
+                "tags": ["a", "b"],
+                "cool_integer": " 33",
+                "optional_bool": "(no)",
+                "connected_floats": ["1.5", "2"],
+            }
+        )
+        assert output.title == "Some title"
+        assert output.description is None
+        assert output.tags == ["a", "b"]
+        assert output.cool_integer == 33
+        assert output.optional_bool == False
+        assert output.connected_floats == [1.5, 2.0]
+        assert output.mice == []
+        assert output.sample_with_default == "some default value"
+        assert repr(output) == repr(self.SimpleTestOutput(**output.__dict__))
+
+        with pytest.raises(LLMOutputFieldWrongType) as exc:
+            self.SimpleTestOutput._construct({"title": "Some title", "cool_integer": "many"})
+        assert exc.value.field_name == "COOL INTEGER"
+
+        with pytest.raises(ValueError):
+            self.SimpleTestOutput._construct({"cool_integer": "3"})
+
+        with pytest.raises(LLMOutputFieldInvalidLength) as exc2:
+            self.LimitedArrayTestOutput._construct({"geese": ["one"]})
+        assert exc2.value.field_name == "GOOSE"
+
+    def test_parse_partial_output(self):
+        completion_output = """
+TITLE: Hello world
+STRING 1: s1
+ITEM 1 SUBTITLE: subtitle one
+ITEM 1 DESCRIPTION: description one
+ITEM 2 DESCRIPTION: description two
+OPTIONAL SUBITEM TITLE: Optional subitem title
+""".strip()
+
+        result = self.SubtypeTestOutput.parse_partial_response(completion_output)
+        assert not result.is_complete
+        assert result.values["title"] == "Hello world"
+        assert result.values["strings"] == ["s1"]
+        assert result.values["optional_subitem"].title == "Optional subitem title"
+        assert "items" not in result.values
+        assert "subitem" not in result.values
+
+        assert [error.key for error in result.errors] == ["items", "subitem"]
+        assert [error.name for error in result.errors] == ["ITEM 2 SUBTITLE", "SUBITEM TITLE"]
+        assert isinstance(result.errors[0].exception, LLMOutputFieldMissing)
+        assert result.errors[0].exception.raw_completion == completion_output
+
+        with pytest.raises(LLMOutputFieldMissing):
+            result.to_output()
+
+        result_2 = self.MultilineMultipleTestOutput.parse_partial_response("TEXT: L1\nVALUE: 8xz")
+        assert result_2.values == {"text": "L1"}
+        assert [error.key for error in result_2.errors] == ["value"]
+        assert isinstance(result_2.errors[0].exception, LLMOutputFieldWrongType)
+
+        result_3 = self.MultilineMultipleTestOutput.parse_partial_response("TEXT: L1\nVALUE: 8")
+        assert result_3.is_complete
+        output = result_3.to_output()
+        assert output.text == "L1"
+        assert output.value == 8
+        assert output.__raw_completion__ == "TEXT: L1\nVALUE: 8"
+
+    def test_repair_output(self):
+        from typegpt.repair import OutputRepair
+
+        completion_output = """
+TITLE: Hello world
+STRING 1: s1
+ITEM 1 SUBTITLE: subtitle one
+ITEM 1 DESCRIPTION: description one
+ITEM 2 DESCRIPTION: description two
+""".strip()
+
+        repair = OutputRepair(self.SubtypeTestOutput, completion_output)
+        assert repair.is_possible
+        assert [error.key for error in repair.parse_result.errors] == ["items", "subitem"]
+        assert list(repair.repair_type.__fields__) == ["items", "subitem"]
+        assert OutputRepair(self.SubtypeTestOutput, completion_output).repair_type is repair.repair_type  # shared by repairs of the same fields
+        assert repair.parse_result.values["title"] == "Hello world"
+        assert repair.parse_result.values["strings"] == ["s1"]
+
+        repair_output = """
+ITEM 1 SUBTITLE: subtitle one
+ITEM 1 DESCRIPTION: description one
+SUBITEM TITLE: A subitem title
+""".strip()
+
+        output = repair.merge(repair_output)
+        assert isinstance(output, self.SubtypeTestOutput)
+        assert output.title == "Hello world"
+        assert output.strings == ["s1"]
+        assert len(output.items) == 1
+        assert output.subitem.title == "A subitem title"
+
+        with pytest.raises(LLMOutputFieldMissing):
+            repair.merge("ITEM 1 SUBTITLE: subtitle one")
+
+    def test_repair_does_not_keep_output_types_alive(self):
+        from typegpt.repair import OutputRepair
+
+        output_type = create_output_type({"fields": [{"key": "title"}, {"key": "count", "type": "int"}]}, cache=None)
+        repair = OutputRepair(output_type, "TITLE: Hello world")
+        assert list(repair.repair_type.__fields__) == ["count"]
+
+        reference = weakref.ref(output_type)
+        del output_type, repair
+        gc.collect()
+        assert reference() is None
+
     # endregion
     # region - 8
     class UltraSubtypeTestOutput(BaseLLMResponse):
@@ -522,3 +675,302 @@ line 8
         assert parsed_output.items[0].multiline_text == ["line 1\nline 2", "line 3\nline 4\nline 5", "line 6\nline 7\nline 8"]
 
     # endregion
+    # region - 9
+
+    def test_parse_budget_max_length(self):
+        completion = "TITLE: x\nCOOL INTEGER: 3\n" + "".join(f"TAG {i}: tag\n" for i in range(1, 101))
+        budget = ParseBudget(max_length=len(completion) - 1)
+
+        with pytest.raises(LLMParseBudgetExceeded) as exc_info:
+            self.SimpleTestOutput.parse_response(completion, budget)
+        assert exc_info.value.raw_completion == completion
+
+        with pytest.raises(LLMParseBudgetExceeded):
+            self.SimpleTestOutput.parse_partial_response(completion, budget)
+
+        # within the budget
+        parsed_output = self.SimpleTestOutput.parse_response(completion, ParseBudget(max_length=len(completion), timeout=10))
+        assert parsed_output.title == "x"
+        assert len(parsed_output.tags) == 100
+
+    class TickClock:
+        """Deterministic clock for parse budgets, which advances by one second on every read"""
+
+        def __init__(self):
+            self.reads = 0
+
+        def __call__(self) -> float:
+            self.reads += 1
+            return float(self.reads)
+
+    def test_parse_budget_timeout(self, monkeypatch):
+        completion = "TITLE: x\nSUBITEM TITLE: y\n" + "".join(f"ITEM {i % 1000} INNER ELEMENT {i % 100} VALUE: {i}\n" for i in range(20_000))
+        monkeypatch.setattr("typegpt.parser._clock", self.TickClock())
+
+        with pytest.raises(LLMParseBudgetExceeded):
+            self.UltraSubtypeTestWithOptionalsOutput.parse_response(completion, ParseBudget(timeout=0.0))
+
+        # the exception is a parse error, so it's not collected as a field error of a partial parse
+        with pytest.raises(LLMParseBudgetExceeded):
+            self.UltraSubtypeTestWithOptionalsOutput.parse_partial_response(completion, ParseBudget(timeout=0.0))
+
+    class BudgetTestOutput(BaseLLMResponse):
+        class Item(BaseLLMArrayElement):
+            name: str | None
+            notes: list[str]
+            text: str | None = LLMArrayElementOutput(lambda _: "Put the text here", default=None, multiline=True)
+
+        title: str | None
+        summary: str | None = LLMOutput("Put the summary here", default=None, multiline=True)
+        tags: list[str]
+        items: list[Item]
+
+    def test_parse_budget_fuzzing(self, monkeypatch):
+        """Random completions with many field labels finish or abort at the first check after the time budget"""
+
+        names = ["TITLE", "SUMMARY", "TAG 1", "ITEM 1 NAME", "ITEM 1 NOTE 1", "ITEM 1 TEXT", "ITEM"]
+        budget = ParseBudget(max_length=1_000_000, timeout=20)  # in reads of the tick clock
+        rng = random.Random(42)
+        num_exceeded = 0
+
+        for _ in range(20):
+            lines = []
+            for _ in range(rng.randint(1, 30_000)):
+                name = rng.choice(names).replace("1", str(rng.randint(1, 999)))
+                lines.append(f"{name}: " + "".join(rng.choice("ab1. :\n'") for _ in range(rng.randint(0, 40))))
+            completion = "\n".join(lines)
+
+            clock = self.TickClock()
+            monkeypatch.setattr("typegpt.parser._clock", clock)
+            try:
+                self.BudgetTestOutput.parse_response(completion, budget)
+            except LLMParseBudgetExceeded:
+                num_exceeded += 1
+                assert clock.reads == budget.timeout + 2  # the start and every check up to the first one past the deadline
+            else:
+                assert clock.reads <= budget.timeout + 1
+
+        assert num_exceeded > 0
+
+    # endregion
+    # region - 10
+
+    class OverlappingNamesTestOutput(BaseLLMResponse):
+        item: str
+        items: list[str]
+        item_count: int | None
+        notes: str | None = LLMOutput("Put the notes here", default=None, multiline=True)
+
+    @staticmethod
+    def legacy_regex_for_field(fields: list[LLMFieldInfo], field: LLMFieldInfo) -> str:
+        """The lookahead pattern the parser used before it indexed the labels, which is the reference for its behavior"""
+
+        descriptor = field.descriptor
+        excluded_lookahead = ["^" + f.name for f in fields if f.key != field.key]
+        if not field.info.multiline and not descriptor.response_type and not descriptor.array_element_type:
+            excluded_lookahead.append("\n")
+        if isinstance(field.info, LLMArrayOutputInfo) or descriptor.response_type:
+            excluded_lookahead.append("\n" + field.name)
+        exclusion_cases_regex = f"(?!{'|'.join(excluded_lookahead)})"
+
+        if not isinstance(field.info, LLMArrayOutputInfo):
+            if descriptor.response_type:
+                return rf"(?:^|\n){field.name} (?P<subfield_name>((?!:|\n)[\S ])+): ?(?P<content>({exclusion_cases_regex}[\s\S])+)"
+            return rf"(?:^|\n){field.name}: *\n?(?P<content>({exclusion_cases_regex}[\s\S])+)"
+
+        count_regex = f"\\d{{1,{len(str(field.info.max_count))}}}" if field.info.max_count else "\\d{1,3}"
+        if descriptor.array_element_type:
+            return rf"(?:^|\n){field.name} (?P<i>{count_regex}) (?P<subfield_name>((?!:|\n)[\S ])+): ?(?P<content>({exclusion_cases_regex}[\s\S])+)"
+        return rf"(?:^|\n){field.name} {count_regex}: ?(?P<content>({exclusion_cases_regex}[\s\S])+)"
+
+    def test_parser_matches_legacy_patterns(self):
+        """The indexed parser finds exactly the labels and contents the old lookahead patterns found"""
+
+        output_types = [
+            self.SimpleTestOutput,
+            self.SubtypeTestOutput,
+            self.UltraSubtypeTestOutput,
+            self.BudgetTestOutput,
+            self.BudgetTestOutput.Item,
+            self.OverlappingNamesTestOutput,
+        ]
+        rng = random.Random(7)
+
+        for output_type in output_types:
+            fields = list(output_type.__fields__.values())
+            parser = Parser.for_type(output_type)
+            labels = [f"{f.name} 1 {f.name}" for f in fields] + [f"{f.name} 12" for f in fields] + [f.name for f in fields]
+
+            for _ in range(300):
+                lines = []
+                for _ in range(rng.randint(1, 12)):
+                    label = rng.choice(labels).replace("1", str(rng.randint(1, 120)), 1)
+                    lines.append(label + rng.choice(["", ":", ": ", ":  \n", " :"]) + "".join(rng.choice("ab1 :\n'") for _ in range(rng.randint(0, 8))))
+                response = parser._preprocess_response("\n".join(lines))
+                index = parser._index_labels(response)
+
+                for field in fields:
+                    legacy_matches = re.compile(self.legacy_regex_for_field(fields, field), re.MULTILINE).finditer(response)
+                    expected = [(m.groupdict().get("i"), m.groupdict().get("subfield_name"), m.group("content")) for m in legacy_matches]
+                    found = [(label.groupdict().get("i"), label.groupdict().get("subfield_name"), content) for label, content in parser._find_all(field, response, index)]
+                    assert found == expected, (output_type.__name__, field.key, response)
+
+    def test_parse_wide_output(self):
+        field_count = 1000
+        output_type = create_output_type(
+            {"name": "WideOutput", "fields": [{"key": f"field_{i}"} for i in range(field_count)] + [{"key": "values", "type": "list[int]"}]},
+            cache=None,
+        )
+        completion = "".join(f"FIELD {i}: value {i}\n" for i in range(field_count)) + "".join(f"VALUE {i}: {i}\n" for i in range(1, 101))
+
+        start = time.monotonic()
+        parsed_output = output_type.parse_response(completion)
+        assert time.monotonic() - start < 2
+
+        assert all(getattr(parsed_output, f"field_{i}") == f"value {i}" for i in range(field_count))
+        assert parsed_output.values == list(range(1, 101))
+
+    # endregion
+    # region - 11
+
+    class ShortLabelTestOutput(BaseLLMResponse, short_labels=True):
+        class Item(BaseLLMArrayElement, short_labels=True):
+            description_short: str
+            description_long: str = LLMArrayElementOutput(lambda _: "Put the description here", multiline=True)
+
+        title: str
+        tags: list[str]
+        summary: str = LLMOutput("Put the summary here", multiline=True)
+        items: list[Item]
+
+    def test_parse_short_labels(self):
+        completion = """
+T: Fruits
+TA 1: sweet
+TA 2: healthy
+S: The summary
+Two more lines
+S is the first letter of the summary
+
+I 1 DS: apple
+I 1 DL: A red apple
+Delicious
+
+I 2 DS: pear
+I 2 DL: DS are short descriptions
+"""
+        parsed_output = self.ShortLabelTestOutput.parse_response(completion)
+
+        assert parsed_output.title == "Fruits"
+        assert parsed_output.tags == ["sweet", "healthy"]
+        # lines that only start like a label don't end the content
+        assert parsed_output.summary == "The summary\nTwo more lines\nS is the first letter of the summary"
+        assert [item.description_short for item in parsed_output.items] == ["apple", "pear"]
+        assert [item.description_long for item in parsed_output.items] == ["A red apple\nDelicious", "DS are short descriptions"]
+
+        with pytest.raises(LLMOutputFieldMissing) as exc_info:
+            self.ShortLabelTestOutput.parse_response("TA 1: sweet\nS: summary")
+        assert exc_info.value.field_name == "T"
+
+    class ShortLabelRepairTestOutput(BaseLLMResponse, short_labels=True):
+        title: str
+        tags: list[str] = LLMArrayOutput((1, None), lambda pos: f"Put the {pos.ordinal} tag here")
+        count: int
+
+    def test_repair_short_labels(self):
+        from typegpt.repair import OutputRepair
+
+        repair = OutputRepair(self.ShortLabelRepairTestOutput, "T: Fruits\nC: 3")
+        assert repair.is_possible
+        assert [error.key for error in repair.parse_result.errors] == ["tags"]
+
+        # the labels of the original completion are kept, although "T" alone would be unique among the requested fields
+        assert repair.repair_type.__fields__["tags"].name == "TA"
+        request = repair.messages()[-1]["content"]
+        assert "- TA: " in request
+        assert "TA 1: <Put the first tag here>" in request
+
+        output = repair.merge("TA 1: sweet\nTA 2: healthy")
+        assert output.title == "Fruits"
+        assert output.tags == ["sweet", "healthy"]
+        assert output.count == 3
+
+    # endregion
+    # region - 12
+
+    class TabularTestOutput(BaseLLMResponse):
+        class Product(BaseLLMArrayElement):
+            name: str
+            price: float
+            is_available: bool | None
+
+        title: str
+        products: list[Product] = LLMArrayOutput((1, None), lambda _: "...", tabular=True)
+        notes: list[str]
+
+    def test_parse_tabular_array(self):
+        completion = """
+TITLE: Shop
+PRODUCT: NAME | PRICE | IS AVAILABLE
+Lamp \\| small | 19.5 | true
+"Desk" | 120 |
+Shelf \\\\ rack | 45 | no
+
+NOTE 1: cheap
+"""
+        parsed_output = self.TabularTestOutput.parse_response(completion)
+
+        assert parsed_output.title == "Shop"
+        assert [product.name for product in parsed_output.products] == ["Lamp | small", "Desk", "Shelf \\ rack"]
+        assert [product.price for product in parsed_output.products] == [19.5, 120.0, 45.0]
+        assert [product.is_available for product in parsed_output.products] == [True, None, False]
+        assert parsed_output.notes == ["cheap"]
+
+        # the order of the header is used, and without header the columns are in the order of the fields
+        reordered_output = self.TabularTestOutput.parse_response("TITLE: Shop\nPRODUCT:\nPRICE | NAME\n3 | Pen")
+        assert reordered_output.products[0].name == "Pen" and reordered_output.products[0].price == 3.0
+        headless_output = self.TabularTestOutput.parse_response("TITLE: Shop\nPRODUCT: Pen | 3")
+        assert headless_output.products[0].name == "Pen" and headless_output.products[0].price == 3.0
+
+    def test_parse_markdown_table(self):
+        completion = """
+TITLE: Shop
+PRODUCT:
+| NAME | PRICE | IS AVAILABLE |
+|------|------:|:------------:|
+| Desk lamp | 19.99 | true |
+| Pipe \\| | 3 | |
+"""
+        parsed_output = self.TabularTestOutput.parse_response(completion)
+
+        assert [product.name for product in parsed_output.products] == ["Desk lamp", "Pipe |"]
+        assert [product.price for product in parsed_output.products] == [19.99, 3.0]
+        assert [product.is_available for product in parsed_output.products] == [True, None]
+
+        # header on the line of the label, and a leading `|` without trailing one still stands for an empty first cell
+        inline_output = self.TabularTestOutput.parse_response("TITLE: Shop\nPRODUCT: | NAME | PRICE |\n| Pen | 3 |")
+        assert inline_output.products[0].name == "Pen" and inline_output.products[0].price == 3.0
+        with pytest.raises(LLMOutputFieldMissing):
+            self.TabularTestOutput.parse_response("TITLE: Shop\nPRODUCT: NAME | PRICE\n| 3")
+
+    def test_parse_tabular_array_errors(self):
+        with pytest.raises(LLMOutputFieldMissing) as exc_info:
+            self.TabularTestOutput.parse_response("TITLE: Shop\nPRODUCT: NAME | PRICE\nPen | 3\nPencil")
+        assert exc_info.value.field_name == "PRODUCT 2 PRICE"
+
+        with pytest.raises(LLMOutputFieldWrongType) as exc_info:
+            self.TabularTestOutput.parse_response("TITLE: Shop\nPRODUCT: NAME | PRICE\nPen | 3 | yes | 4")
+        assert exc_info.value.field_name == "PRODUCT 1"
+
+        with pytest.raises(LLMOutputFieldInvalidLength):
+            self.TabularTestOutput.parse_response("TITLE: Shop\nPRODUCT: NAME | PRICE")
+
+    def test_tabular_array_round_trip(self):
+        Product = self.TabularTestOutput.Product
+        values = ["plain", "with | pipe", "back\\slash", "line\nbreak", "\\|", "trailing \\"]
+        output = self.TabularTestOutput(title="Shop", products=[Product(name=value, price=1.0, is_available=None) for value in values], notes=[])
+
+        completion = ExampleOutputFactory(output).generate()
+        assert [product.name for product in self.TabularTestOutput.parse_response(completion).products] == values
+
+    # endregion
@@ -7,6 +7,7 @@ sys.path.insert(0, myPath + "/../")
 import pytest
 
 from typegpt import BaseLLMArrayElement, BaseLLMResponse, LLMArrayElementOutput, LLMArrayOutput, LLMOutput
+from typegpt.example_builder import ExampleOutputFactory
 from typegpt.fields import ExamplePosition, LLMArrayElementOutputInfo, LLMArrayOutputInfo
 from typegpt.prompt_builder import OutputPromptFactory
 
@@ -247,3 +248,112 @@ ITEM 2 INNER ELEMENT 2 VALUE: <Put the second value here>
 """.strip()
 
         assert prompt == expected_prompt
+
+    # -
+
+    class NestedMultilineTestOutput(BaseLLMResponse):
+        class Item(BaseLLMArrayElement):
+            text: str = LLMArrayElementOutput(lambda _: "...", multiline=True)
+
+        title: str
+        items: list[Item]
+
+    def test_stop_sequences(self):
+        def stop_sequences(output_type: type[BaseLLMResponse]) -> list[str]:
+            return OutputPromptFactory(list(output_type.__fields__.values())).stop_sequences()
+
+        assert stop_sequences(self.SimpleTestOutput) == ['\n"""']
+        assert stop_sequences(self.SubtypeTestOutput) == ['\n"""']
+        assert stop_sequences(self.CustomExplainedTestOutput) == []  # multiline field
+        assert stop_sequences(self.NestedMultilineTestOutput) == []  # multiline field inside array element
+
+    # -
+
+    class ShortLabelTestOutput(BaseLLMResponse, short_labels=True):
+        class Item(BaseLLMArrayElement, short_labels=True):
+            description_short: str
+            description_long: str
+
+        title: str
+        tags: list[str]
+        items: list[Item] = LLMArrayOutput((1, 2), lambda pos: f"The {pos.ordinal} item")
+
+    def test_short_labels(self):
+        fields = list(self.ShortLabelTestOutput.__fields__.values())
+        prompt = OutputPromptFactory(fields).generate()
+        expected_prompt = f"""
+Always return the answer in the following format:
+\"""
+T: <Put the title here>
+TA 1: <Put the first tag here>
+TA 2: <Put the second tag here>
+...
+
+I 1 DS: <Put the first description short here>
+I 1 DL: <Put the first description long here>
+
+I 2 DS: <Put the second description short here>
+I 2 DL: <Put the second description long here>
+\"""
+""".strip()
+
+        assert prompt == expected_prompt
+
+        example = self.ShortLabelTestOutput(
+            title="Fruits",
+            tags=["sweet"],
+            items=[self.ShortLabelTestOutput.Item(description_short="apple", description_long="A red apple")],
+        )
+        assert ExampleOutputFactory(example).generate() == "T: Fruits\nTA 1: sweet\n\nI 1 DS: apple\nI 1 DL: A red apple"
+
+    # -
+
+    class TabularTestOutput(BaseLLMResponse):
+        class Product(BaseLLMArrayElement):
+            name: str
+            price: float = LLMArrayElementOutput(lambda pos: f"Price of the {pos.ordinal} product")
+            is_available: bool | None
+
+        title: str
+        products: list[Product] = LLMArrayOutput((1, None), lambda _: "...", tabular=True)
+
+    def test_tabular_array(self):
+        fields = list(self.TabularTestOutput.__fields__.values())
+        prompt = OutputPromptFactory(fields).generate()
+        expected_prompt = f"""
+Always return the answer in the following format:
+\"""
+TITLE: <Put the title here>
+PRODUCT: NAME | PRICE | IS AVAILABLE
+<Put the first name here> | <Price of the first product> | <Put the first is available here>
+<Put the second name here> | <Price of the second product> | <Put the second is available here>
+...
+\"""
+Separate the values in each row of a table by "|". Write "\\|" for a "|" and "\\n" for a line break inside a value.
+""".strip()
+
+        assert prompt == expected_prompt
+        assert OutputPromptFactory(fields).stop_sequences() == ['\n"""']
+
+        example = self.TabularTestOutput(
+            title="Shop",
+            products=[
+                self.TabularTestOutput.Product(name="Lamp | small", price=19.5, is_available=True),
+                self.TabularTestOutput.Product(name="Desk", price=120.0, is_available=None),
+            ],
+        )
+        assert ExampleOutputFactory(example).generate() == "TITLE: Shop\n\nPRODUCT: NAME | PRICE | IS AVAILABLE\nLamp \\| small | 19.5 | true\nDesk | 120.0"
+
+    def test_tabular_array_requires_single_line_elements(self):
+        class Item(BaseLLMArrayElement):
+            tags: list[str]
+
+        with pytest.raises(TypeError, match="not a single-line value"):
+
+            class Output(BaseLLMResponse):
+                items: list[Item] = LLMArrayOutput(None, lambda _: "...", tabular=True)
+
+        with pytest.raises(TypeError, match="tabular"):
+
+            class StringOutput(BaseLLMResponse):
+                strings: list[str] = LLMArrayOutput(None, lambda _: "...", tabular=True)
@@ -4,6 +4,9 @@ import sys
 myPath = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, myPath + "/../")
 
+import pickle
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
 from typing import Any, List, Literal, Optional
 
 import pytest
@@ -88,6 +91,40 @@ class TestResponseObject:
         assert x.description is None
         assert x.tags == ["first tag", "second tag"]
 
+    def test_parameter_change_conversion(self):
+        class ConvertedOutput(BaseLLMResponse):
+            count: Optional[int]
+            is_valid: bool | None
+            scores: list[float] = LLMArrayOutput((1, 2), lambda pos: f"Put the {pos.ordinal} score here")
+
+        assert set(ConvertedOutput.__field_validators__) == {"count", "is_valid", "scores"}
+
+        x = ConvertedOutput(count=" 3", is_valid="<yes>", scores=["0.5"])
+        assert x.count == 3
+        assert x.is_valid == True
+        assert x.scores == [0.5]
+
+        x.count = None
+        x.is_valid = "no"
+        x.scores = ["1", 2.5]
+        assert x.count is None
+        assert x.is_valid == False
+        assert x.scores == [1.0, 2.5]
+
+        with pytest.raises(LLMOutputFieldWrongType) as exc:
+            x.count = "three"
+        assert str(exc.value) == '"three" is not a valid integer value'
+        assert exc.value.field_name == "COUNT"
+
+        with pytest.raises(LLMOutputFieldWrongType) as exc2:
+            x.scores = "1.0"
+        assert str(exc2.value) == '"ConvertedOutput" field "scores" must be a list'
+
+        with pytest.raises(LLMOutputFieldInvalidLength) as exc3:
+            x.scores = [1.0, 2.0, 3.0]
+        assert str(exc3.value) == '"ConvertedOutput" field "scores" must have at most 2 items'
+        assert exc3.value.field_name == "SCORE"
+
     # -
 
     class ExtendedTestOutput(BaseLLMResponse):
@@ -339,3 +376,251 @@ class TestResponseObject:
 
         #     class J(BaseLLMResponse):
         #         arr: list[str] = LLMArrayOutput((1, 3), lambda _: "test")
+
+    def test_compact_response(self):
+        class CompactItem(BaseLLMArrayElement, compact=True):
+            name: str
+            count: int = 1
+
+        class CompactOutput(BaseLLMResponse, compact=True):
+            title: str
+            subtitle: str | None
+            items: list[CompactItem] = LLMArrayOutput((0, 3), lambda pos: f"Put the {pos.ordinal} item here")
+
+        assert CompactOutput.__compact__
+        assert not CompactOutput.__fields__["items"].info.min_count
+
+        completion = "TITLE: Groceries\nITEM 1 NAME: apple\nITEM 1 COUNT: 3\nITEM 2 NAME: pear"
+        output = CompactOutput.parse_response(completion)
+
+        assert not hasattr(output, "__dict__")
+        assert not hasattr(output.items[0], "__dict__")
+        assert output.title == "Groceries"
+        assert output.subtitle is None
+        assert output.items[0].name == "apple"
+        assert output.items[0].count == 3
+        assert output.items[1].count == 1
+        assert output.__raw_completion__ == completion
+        assert repr(output) == "CompactOutput(title=Groceries, subtitle=None, items=[CompactItem(name=apple, count=3), CompactItem(name=pear, count=1)])"
+
+        output.subtitle = "Fruits"
+        assert output.subtitle == "Fruits"
+
+        with pytest.raises(LLMOutputFieldWrongType):
+            output.title = 5  # type: ignore
+
+        with pytest.raises(ValueError):
+            output.other = "test"  # type: ignore
+
+        with pytest.raises(LLMOutputFieldWrongType):
+            CompactItem(name="apple", count="many")  # type: ignore
+
+        assert output == output
+        assert output != CompactOutput.parse_response(completion)
+
+    def test_compact_response_subclass(self):
+        class CompactOutput(BaseLLMResponse, compact=True):
+            title: str
+
+        class InheritedOutput(CompactOutput):
+            pass
+
+        class ExtendedOutput(CompactOutput):
+            title: str
+            count: int
+
+        assert InheritedOutput.__compact__ and ExtendedOutput.__compact__
+
+        output = InheritedOutput(title="a")
+        assert not hasattr(output, "__dict__")
+        assert output.title == "a"
+        assert repr(output) == "InheritedOutput(title=a)"
+
+        parsed = InheritedOutput.parse_response("TITLE: Groceries")
+        assert parsed.title == "Groceries"
+        assert parsed.__raw_completion__ == "TITLE: Groceries"
+
+        extended = ExtendedOutput.parse_response("TITLE: Groceries\nCOUNT: 3")
+        assert not hasattr(extended, "__dict__")
+        assert (extended.title, extended.count) == ("Groceries", 3)
+        assert ExtendedOutput(title="b", count=1).count == 1
+
+        with pytest.raises(TypeError):
+
+            class NonCompactOutput(CompactOutput, compact=False):
+                pass
+
+    def test_dict_and_json_serialization(self):
+        class Item(BaseLLMArrayElement):
+            name: str
+            price: float | None
+
+        class Details(BaseLLMResponse):
+            is_vegan: bool
+
+        class Output(BaseLLMResponse):
+            title: str
+            count: int
+            details: Details | None
+            tags: list[str]
+            items: list[Item]
+
+        output = Output(title="Groceries", count=2, details=Details(is_vegan=True), tags=["a"], items=[Item(name="apple", price=1.5), Item(name="pear", price=None)])
+
+        data = output.to_dict()
+        assert data == {
+            "title": "Groceries",
+            "count": 2,
+            "details": {"is_vegan": True},
+            "tags": ["a"],
+            "items": [{"name": "apple", "price": 1.5}, {"name": "pear", "price": None}],
+        }
+
+        for restored in (Output.from_dict(data), Output.from_dict(data, validate=False), Output.from_json(output.to_json())):
+            assert isinstance(restored.details, Details)
+            assert isinstance(restored.items[1], Item)
+            assert repr(restored) == repr(output)
+
+        assert Output.from_dict({**data, "details": None}).details is None
+
+        with pytest.raises(LLMOutputFieldWrongType):
+            Output.from_dict({**data, "items": [{"name": "apple", "price": "free"}]})
+
+        with pytest.raises(ValueError):
+            Output.from_dict({**data, "unknown": 1})
+
+    def test_compact_response_pickle(self):
+        output = PicklableCompactOutput(title="Test", items=[PicklableCompactOutput.Item(name="a"), PicklableCompactOutput.Item(name="b")])
+        output._set_raw_completion("TITLE: Test")
+
+        unpickled = pickle.loads(pickle.dumps(output))
+
+        assert repr(unpickled) == repr(output)
+        assert unpickled.__raw_completion__ == "TITLE: Test"
+        assert isinstance(unpickled.items[0], PicklableCompactOutput.Item)
+
+    def test_pickle(self):
+        output = PicklableOutput.parse_response("TITLE: Test\nITEM 1 NAME: a\nITEM 1 PRICE: 1.5\nTAG 1: x")
+
+        unpickled = pickle.loads(pickle.dumps(output))
+        assert repr(unpickled) == repr(output)
+        assert unpickled.__raw_completion__ == output.__raw_completion__
+
+        # field infos are pickled by reference (their instructions might be lambdas)
+        fields = pickle.loads(pickle.dumps(PicklableOutput.__fields__))
+        assert fields["items"] is PicklableOutput.__fields__["items"]
+        assert fields["tags"].info.instruction(ExamplePosition(2)) == "Put the second tag here"
+
+        # default instructions are picklable on their own
+        instruction = pickle.loads(pickle.dumps(PicklableOutput.__fields__["tags"].info.instruction))
+        assert instruction(ExamplePosition(1)) == "Put the first tag here"
+
+        with pytest.raises(LLMOutputFieldMissing) as exc:
+            PicklableOutput.parse_response("ITEM 1 NAME: a")
+        exception = pickle.loads(pickle.dumps(exc.value))
+        assert isinstance(exception, LLMOutputFieldMissing)
+        assert str(exception) == str(exc.value)
+        assert exception.field_name == "TITLE"
+        assert exception.raw_completion == "ITEM 1 NAME: a"
+
+    def test_process_pool(self):
+        completions = [f"TITLE: Test {i}\nITEM 1 NAME: a\nITEM 1 PRICE: {i}" for i in range(8)] + ["ITEM 1 NAME: a"]
+
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(_parse_or_return_exception, completions))
+
+        for i, result in enumerate(results[:-1]):
+            assert isinstance(result, PicklableOutput)
+            assert result.title == f"Test {i}"
+            assert result.items[0].price == i
+            assert result.__raw_completion__ == completions[i]
+
+        assert isinstance(results[-1], LLMOutputFieldMissing)
+        assert results[-1].raw_completion == completions[-1]
+
+
+    def test_fingerprint(self):
+        fingerprint = PicklableOutput.__fingerprint__
+        assert len(fingerprint) == 64
+        assert PicklableOutput.parse_response("TITLE: Test").__fingerprint__ == fingerprint
+
+        # deterministic across processes
+        code = "import sys; sys.path.insert(0, sys.argv[1]); from test_response_object import PicklableOutput; print(PicklableOutput.__fingerprint__)"
+        result = subprocess.run([sys.executable, "-c", code, myPath], capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == fingerprint
+
+        # the same schema under another class name (compact classes are not a different schema either)
+        class OtherOutput(BaseLLMResponse, compact=True):
+            class Item(BaseLLMArrayElement):
+                name: str
+                price: float = LLMArrayElementOutput(lambda pos: f"Put the price of the {pos.ordinal} item here")
+
+            title: str
+            items: list[Item]
+            tags: list[str]
+
+        assert OtherOutput.__fingerprint__ == fingerprint
+
+        class ChangedInstruction(BaseLLMResponse):
+            class Item(BaseLLMArrayElement):
+                name: str
+                price: float = LLMArrayElementOutput(lambda pos: f"Put the cost of the {pos.ordinal} item here")
+
+            title: str
+            items: list[Item]
+            tags: list[str]
+
+        class ChangedNestedField(BaseLLMResponse):
+            class Item(BaseLLMArrayElement):
+                title: str
+                price: float = LLMArrayElementOutput(lambda pos: f"Put the price of the {pos.ordinal} item here")
+
+            title: str
+            items: list[Item]
+            tags: list[str]
+
+        class ChangedCount(BaseLLMResponse):
+            class Item(BaseLLMArrayElement):
+                name: str
+                price: float = LLMArrayElementOutput(lambda pos: f"Put the price of the {pos.ordinal} item here")
+
+            title: str
+            items: list[Item] = LLMArrayOutput((0, 3), lambda pos: f"Put the {pos.ordinal} item here")
+            tags: list[str]
+
+        class ChangedType(BaseLLMResponse):
+            class Item(BaseLLMArrayElement):
+                name: str
+                price: float = LLMArrayElementOutput(lambda pos: f"Put the price of the {pos.ordinal} item here")
+
+            title: str | None
+            items: list[Item]
+            tags: list[str]
+
+        fingerprints = {t.__fingerprint__ for t in (PicklableOutput, ChangedInstruction, ChangedNestedField, ChangedCount, ChangedType)}
+        assert len(fingerprints) == 5
+
+
+class PicklableOutput(BaseLLMResponse):
+    class Item(BaseLLMArrayElement):
+        name: str
+        price: float = LLMArrayElementOutput(lambda pos: f"Put the price of the {pos.ordinal} item here")
+
+    title: str
+    items: list[Item]
+    tags: list[str]
+
+
+def _parse_or_return_exception(completion: str) -> PicklableOutput | LLMOutputFieldMissing:
+    try:
+        return PicklableOutput.parse_response(completion)
+    except LLMOutputFieldMissing as e:
+        return e
+
+
+class PicklableCompactOutput(BaseLLMResponse, compact=True):
+    class Item(BaseLLMArrayElement, compact=True):
+        name: str
+
+    title: str
+    items: list[Item]
@@ -0,0 +1,85 @@
+import os
+import sys
+
+myPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, myPath + "/../")
+
+import json
+import subprocess
+import types
+
+from typegpt import BaseLLMArrayElement, BaseLLMResponse, LLMArrayOutput, PromptTemplate
+from typegpt.prompt_builder import OutputPromptFactory
+from typegpt.warmup import load_cache, warm_up
+
+
+def create_output_type():
+    class WarmUpOutput(BaseLLMResponse):
+        class Item(BaseLLMArrayElement):
+            name: str
+
+        title: str
+        items: list[Item] = LLMArrayOutput((1, 3), instruction=lambda pos: f"Put the {pos.ordinal} item here")
+
+    return WarmUpOutput
+
+
+class TestWarmUp:
+    def test_warm_up(self):
+        output_type = create_output_type()
+
+        class WarmUpPrompt(PromptTemplate):
+            def system_prompt(self) -> str:
+                return "system"
+
+            def user_prompt(self) -> str:
+                return "user"
+
+            Output = output_type
+
+        module = types.ModuleType("warmup_test_module")
+        module.WarmUpPrompt = WarmUpPrompt
+        WarmUpPrompt.__module__ = module.__name__
+
+        assert warm_up([module]) == [output_type]
+        assert len(output_type.__parser__._syntaxes) == 2
+        assert len(output_type.Item.__parser__._syntaxes) == 1
+        assert output_type.__prompt_factory__._prompt == OutputPromptFactory(list(output_type.__fields__.values())).generate()
+
+    def test_cache_file(self, tmp_path):
+        cache_path = tmp_path / "warmup.json"
+        output_type = create_output_type()
+        warm_up([output_type], cache_path=cache_path)
+
+        cache = json.loads(cache_path.read_text())
+        fingerprint = output_type.__fingerprint__
+        assert cache["schemas"][fingerprint]["schema_prompt"] == OutputPromptFactory.for_type(output_type).generate()
+        assert cache["singular_nouns"]["items"] == "item"
+
+        # a class with the same schema uses the persisted prompt
+        cache["schemas"][fingerprint]["schema_prompt"] = "persisted"
+        cache_path.write_text(json.dumps(cache))
+        other_output_type = create_output_type()
+        warm_up([other_output_type], cache_path=cache_path)
+        assert OutputPromptFactory.for_type(other_output_type).generate() == "persisted"
+
+        assert load_cache(tmp_path / "missing.json") == {}
+
+    def test_cache_skips_inflect(self, tmp_path):
+        cache_path = tmp_path / "warmup.json"
+        cache_path.write_text(json.dumps({"version": 1, "singular_nouns": {"geese": "goose"}, "schemas": {}}))
+
+        code = f"""
+import sys
+from typegpt.warmup import load_cache
+load_cache({str(cache_path)!r})
+
+from typegpt import BaseLLMResponse
+
+class Output(BaseLLMResponse):
+    geese: list[str]
+
+assert Output.__fields__["geese"].name == "GOOSE"
+assert "inflect" not in sys.modules
+"""
+        subprocess.run([sys.executable, "-c", code], cwd=myPath + "/../", check=True)
@@ -1,25 +1,90 @@
 from typing import TYPE_CHECKING, Any, ClassVar, TypeVar
 
-from .exceptions import LLMException, LLMOutputFieldInvalidLength, LLMOutputFieldMissing, LLMOutputFieldWrongType
+from . import serialization
+from .converters import FieldConverter, FieldValidator, validate_array_length
+from .exceptions import LLMException, LLMOutputFieldMissing, LLMParseException
 from .fields import ClassPlaceholder, LLMArrayElementOutputInfo, LLMArrayOutputInfo, LLMFieldInfo, LLMOutputInfo
+from .json_schema import parse_json_response
 from .meta import LLMArrayElementMeta, LLMBaseMeta
-from .parser import Parser
-from .utils.utils import symmetric_strip
+from .parser import ParseBudget, Parser, PartialParseResult
+from .serialization import FieldDeserializer, FieldSerializer
 
 if TYPE_CHECKING:
     from inspect import Signature
 
+    from .prompt_builder import OutputPromptFactory
+
 
 class _InternalBaseLLMResponse:
+    __slots__ = ()  # subclasses get a `__dict__` unless they are defined with `compact=True`
+
     if TYPE_CHECKING:
         # populated by the metaclass (ClassPlaceholder used to prevent showing up as type suggestion)
         __fields__: ClassVar[dict[str, LLMFieldInfo]] = ClassPlaceholder(init=False, value={})
         __signature__: ClassVar["Signature"] = ClassPlaceholder(init=False)
+        __compact__: ClassVar[bool] = ClassPlaceholder(init=False, value=False)
+        __short_labels__: ClassVar[bool] = ClassPlaceholder(init=False, value=False)  # displayed names are replaced by short labels
+        __fingerprint__: ClassVar[str] = ClassPlaceholder(init=False, value="")  # hash of the schema, also available on objects
+        __field_converters__: ClassVar[dict[str, FieldConverter]] = ClassPlaceholder(init=False, value={})
+        __field_validators__: ClassVar[dict[str, FieldValidator]] = ClassPlaceholder(init=False, value={})
+        __field_serializers__: ClassVar[dict[str, FieldSerializer | None]] = ClassPlaceholder(init=False, value={})
+        __field_deserializers__: ClassVar[dict[str, FieldDeserializer | None]] = ClassPlaceholder(init=False, value={})
+        __parser__: ClassVar[Parser]  # created on first parse
+        __repair_types__: ClassVar[dict[frozenset[str], type]]  # reduced classes of repairs, created on first repair of the fields
 
     def __init__(self, **data: Any):
         # print(data)
         data = self._prepare_and_validate_dict(data)
-        self.__dict__.update(data)
+        self._set_field_values(data)
+
+    def _set_field_values(self, data: dict[str, Any]):
+        """Sets already validated values without validating them again"""
+        if self.__compact__:
+            for key, value in data.items():
+                object.__setattr__(self, key, value)
+        else:
+            self.__dict__.update(data)
+
+    _Self = TypeVar("_Self", bound="_InternalBaseLLMResponse")
+
+    def __getstate__(self) -> tuple[Any, ...]:
+        # only the field values (and the raw completion of responses) are pickled, the class is pickled by reference
+        return tuple([getattr(self, key) for key in self.__fields__] + [getattr(self, "__raw_completion__", None)])
+
+    def __setstate__(self, state: tuple[Any, ...]):
+        self._set_field_values(dict(zip(self.__fields__, state)))  # values were validated before pickling (`zip` skips the raw completion)
+        if state[-1] is not None:
+            object.__setattr__(self, "__raw_completion__", state[-1])
+
+    @classmethod
+    def _construct(cls: type[_Self], __values: dict[str, Any]) -> _Self:
+        """
+        Fast constructor for values produced by the library itself (e.g. by the parser), which already have the right structure.
+        Values are only converted with the precomputed converters of the fields, and only missing fields and list lengths are checked
+        @throws LLMParseException, ValueError
+        """
+
+        data: dict[str, Any] = {}
+
+        for key, field in cls.__fields__.items():
+            if key not in __values:
+                data[key] = cls._default_field_value(field)
+                continue
+
+            try:
+                value = cls.__field_converters__[key](__values[key])
+                if isinstance(field.info, LLMArrayOutputInfo):
+                    validate_array_length(cls.__name__, field, value)
+            except LLMParseException as e:
+                if e.field_name is None:
+                    e.field_name = field.name
+                raise e
+
+            data[key] = value
+
+        obj = cls.__new__(cls)
+        obj._set_field_values(data)
+        return obj
 
     # don't allow setting of fields that aren't defined in IDE
     if not TYPE_CHECKING:
@@ -36,89 +101,70 @@ class _InternalBaseLLMResponse:
             super().__setattr__(__name, __value)
 
     def __repr__(self) -> str:
-        attrs = ", ".join(f"{k}={v}" for k, v in self.__dict__.items() if not k.startswith("_"))
+        if self.__compact__:
+            attrs = ", ".join(f"{k}={getattr(self, k)}" for k in self.__fields__)
+        else:
+            attrs = ", ".join(f"{k}={v}" for k, v in self.__dict__.items() if not k.startswith("_"))
         return f"{self.__class__.__name__}({attrs})"
 
-    def _prepare_field_value(self, value: Any, _type: type) -> Any:
-        """Converts single values from string to their type, otherwise leaves as is"""
-
-        from .utils.type_checker import if_optional
-
-        # unwrap optional type
-        if optional_type := if_optional(_type):
-            _type = optional_type
-
-        if _type == str:
-            return value
-
-        if isinstance(value, _type):
-            return value
-
-        if isinstance(value, str):
-            value = value.strip()
-            if _type == int:
-                try:
-                    return int(value)
-                except ValueError:
-                    raise LLMOutputFieldWrongType(f'"{value}" is not a valid integer value')
-            elif _type == float:
-                try:
-                    return float(value)
-                except ValueError:
-                    raise LLMOutputFieldWrongType(f'"{value}" is not a valid float value')
-            elif _type == bool:
-                value = symmetric_strip(value, [("<", ">"), ("(", ")")])
-                if value.lower() in ("true", "yes", "1"):
-                    return True
-                elif value.lower() in ("false", "no", "0"):
-                    return False
-                else:
-                    raise LLMOutputFieldWrongType(f'"{value}" is not a valid boolean value')
-
-        return value
-
-    def _prepare_and_validate_field(self, __name: str, __value: Any) -> Any:
-        if __name not in self.__fields__:
-            raise ValueError(f'"{self.__class__.__name__}" object has no field "{__name}"')
-
-        from .utils.type_checker import array_item_type
-
-        field_info = self.__fields__[__name]
-        if isinstance(field_info.info, LLMOutputInfo):
-            __value = self._prepare_field_value(__value, field_info.type_)
-
-            if __value is None and field_info.info.required:
-                raise TypeError(f'"{self.__class__.__name__}" field "{__name}" is required')
-            if not isinstance(__value, field_info.type_):
-                raise LLMOutputFieldWrongType(f'"{self.__class__.__name__}" field "{__name}" must be of type {field_info.type_}')
-
-        elif isinstance(field_info.info, LLMArrayOutputInfo):
-            item_type = array_item_type(field_info.type_)
-
-            if not isinstance(__value, list):
-                raise LLMOutputFieldWrongType(f'"{self.__class__.__name__}" field "{__name}" must be a list')
-            if field_info.info.min_count is not None and len(__value) < field_info.info.min_count:
-                raise LLMOutputFieldInvalidLength(
-                    f'"{self.__class__.__name__}" field "{__name}" must have at least {field_info.info.min_count} items'
-                )
-            if field_info.info.max_count is not None and len(__value) > field_info.info.max_count:
-                raise LLMOutputFieldInvalidLength(
-                    f'"{self.__class__.__name__}" field "{__name}" must have at most {field_info.info.max_count} items'
-                )
-
-            __value = [self._prepare_field_value(v, item_type) for v in __value]
-            if not all(isinstance(v, item_type) for v in __value):
-                raise LLMOutputFieldWrongType(f'"{self.__class__.__name__}" field "{__name}" must be a list of type {field_info.type_}')
-
-        elif isinstance(field_info.info, LLMArrayElementOutputInfo):
-            __value = self._prepare_field_value(__value, field_info.type_)
-
-            if __value is None and field_info.info.required:
-                raise TypeError(f'"{self.__class__.__name__}" field "{__name}" is required')
-            if not isinstance(__value, field_info.type_):
-                raise LLMOutputFieldWrongType(f'"{self.__class__.__name__}" field "{__name}" must be of type {field_info.type_}')
-
-        return __value
+    # - Serialization
+
+    def to_dict(self) -> dict[str, Any]:
+        """Converts the object into a dict of plain values (nested objects are converted to dicts as well)"""
+        return serialization.to_dict(self)
+
+    @classmethod
+    def from_dict(cls: type[_Self], data: dict[str, Any], validate: bool = True) -> _Self:
+        """
+        Creates the object from a dict as returned by `to_dict`
+        :param validate: whether to validate every value. Only disable it for data that was created by `to_dict` itself
+        @throws LLMParseException, ValueError, TypeError
+        """
+        return serialization.from_dict(cls, data, validate=validate)
+
+    def to_json(self) -> str:
+        """Serializes the object to JSON (uses `orjson` if installed)"""
+        return serialization.dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls: type[_Self], data: str | bytes, validate: bool = True) -> _Self:
+        """Creates the object from JSON as returned by `to_json`"""
+        return cls.from_dict(serialization.loads(data), validate=validate)
+
+    @classmethod
+    def _prepare_and_validate_field(cls, __name: str, __value: Any) -> Any:
+        validator = cls.__field_validators__.get(__name)
+        if validator is None:
+            raise ValueError(f'"{cls.__name__}" object has no field "{__name}"')
+
+        try:
+            return validator(__value)
+        except LLMParseException as e:
+            if e.field_name is None:
+                e.field_name = cls.__fields__[__name].name
+            raise e
+
+    @classmethod
+    def _default_field_value(cls, field: LLMFieldInfo) -> Any:
+        """Value of a field that is not given. @throws ValueError if the field is required"""
+
+        if isinstance(field.info, LLMOutputInfo):
+            if field.info.required:
+                raise ValueError(f'"{cls.__name__}" field "{field.key}" is required')
+            else:
+                return field.info.default
+
+        elif isinstance(field.info, LLMArrayOutputInfo):
+            if field.info.min_count > 0:
+                raise ValueError(f'"{cls.__name__}" field "{field.key}" requires at least {field.info.min_count} items')
+            else:
+                return []
+
+        elif isinstance(field.info, LLMArrayElementOutputInfo):
+            if field.info.required:
+                raise ValueError(f'"{cls.__name__}" field "{field.key}" is required')
+            else:
+                return field.info.default
 
     def _prepare_and_validate_dict(self, __values: dict[str, Any]) -> dict[str, Any]:
         # check every field if it's valid
@@ -130,31 +176,20 @@ class _InternalBaseLLMResponse:
             if field.key in __values:
                 continue
 
-            if isinstance(field.info, LLMOutputInfo):
-                if field.info.required:
-                    raise ValueError(f'"{self.__class__.__name__}" field "{field.key}" is required')
-                else:
-                    __values[field.key] = field.info.default
-
-            elif isinstance(field.info, LLMArrayOutputInfo):
-                if field.info.min_count > 0:
-                    raise ValueError(f'"{self.__class__.__name__}" field "{field.key}" requires at least {field.info.min_count} items')
-                else:
-                    __values[field.key] = []
-
-            elif isinstance(field.info, LLMArrayElementOutputInfo):
-                if field.info.required:
-                    raise ValueError(f'"{self.__class__.__name__}" field "{field.key}" is required')
-                else:
-                    __values[field.key] = field.info.default
+            __values[field.key] = self._default_field_value(field)
 
         return __values
 
 
 class BaseLLMResponse(_InternalBaseLLMResponse, metaclass=LLMBaseMeta):
+    __slots__ = ()
+
     if TYPE_CHECKING:
         # populated by the metaclass (ClassPlaceholder used to prevent showing up as type suggestion)
         __raw_completion__: str = ClassPlaceholder(init=False, value="")
+        __prompt_factory__: ClassVar[OutputPromptFactory]  # created when the schema is first rendered
+        __response_format__: ClassVar[dict[str, Any]]  # created when the JSON schema is first requested
+        __tool__: ClassVar[dict[str, Any]]  # created when the output is first requested as tool call
 
     def _set_raw_completion(self, completion: str):
         self.__raw_completion__ = completion
@@ -164,9 +199,30 @@ class BaseLLMResponse(_InternalBaseLLMResponse, metaclass=LLMBaseMeta):
     _Self = TypeVar("_Self", bound="BaseLLMResponse")  # backward compatibility for pre-Python 3.12
 
     @classmethod
-    def parse_response(cls: type[_Self], response: str) -> _Self:
+    def parse_response(cls: type[_Self], response: str, budget: ParseBudget | None = None) -> _Self:
+        """
+        :param budget: optional limits for the length of the response and the parse time
+        @throws LLMParseException (`LLMParseBudgetExceeded` if the budget is exceeded)
+        """
         try:
-            return Parser(cls).parse(response)
+            return Parser.for_type(cls).parse(response, budget)
+        except LLMException as e:
+            e.raw_completion = response
+            raise e
+
+    @classmethod
+    def parse_partial_response(cls: type[_Self], response: str, budget: ParseBudget | None = None) -> PartialParseResult[_Self]:
+        """Parses every field that is present and valid, and collects an error for every other field instead of raising"""
+        return Parser.for_type(cls).parse_partial(response, budget)
+
+    @classmethod
+    def parse_json_response(cls: type[_Self], response: str, budget: ParseBudget | None = None) -> _Self:
+        """
+        Parses a response that was generated with the JSON schema of the class (see `typegpt.json_schema`)
+        @throws LLMParseException (`LLMParseBudgetExceeded` if the response is too long)
+        """
+        try:
+            return parse_json_response(cls, response, budget)
         except LLMException as e:
             e.raw_completion = response
             raise e
@@ -176,6 +232,8 @@ class BaseLLMResponse(_InternalBaseLLMResponse, metaclass=LLMBaseMeta):
 
 
 class BaseLLMArrayElement(_InternalBaseLLMResponse, metaclass=LLMArrayElementMeta):
+    __slots__ = ()
+
     if TYPE_CHECKING:
         # populated by the metaclass (ClassPlaceholder used to prevent showing up as type suggestion)
         __fields__: ClassVar[dict[str, LLMFieldInfo]] = ClassPlaceholder(init=False, value={})
@@ -189,5 +247,10 @@ class BaseLLMArrayElement(_InternalBaseLLMResponse, metaclass=LLMArrayElementMet
     _Self = TypeVar("_Self", bound="BaseLLMArrayElement")  # backward compatibility for pre-Python 3.12
 
     @classmethod
-    def parse_response(cls: type[_Self], response: str) -> _Self:
-        return Parser(cls).parse(response)
+    def parse_response(cls: type[_Self], response: str, budget: ParseBudget | None = None) -> _Self:
+        return Parser.for_type(cls).parse(response, budget)
+
+    @classmethod
+    def parse_partial_response(cls: type[_Self], response: str, budget: ParseBudget | None = None) -> PartialParseResult[_Self]:
+        """Parses every field that is present and valid, and collects an error for every other field instead of raising"""
+        return Parser.for_type(cls).parse_partial(response, budget)
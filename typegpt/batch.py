@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import mmap
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import IO, Any, Generic, Iterable, Iterator, TypeVar
+
+from .base import BaseLLMResponse
+from .exceptions import LLMException, LLMParseException
+from .parser import ParseBudget, Parser
+
+_Output = TypeVar("_Output", bound=BaseLLMResponse)
+
+
+@dataclass
+class BatchParseResult(Generic[_Output]):
+    """
+    Args:
+        successes: parsed outputs with the index of their completion
+        failures: exceptions with the index of their completion (the completion itself is stored in `raw_completion`)
+    """
+
+    successes: list[tuple[int, _Output]] = field(default_factory=list)
+    failures: list[tuple[int, LLMException]] = field(default_factory=list)
+
+
+def _parse_chunk(output_type: type[_Output], completions: list[str], budget: ParseBudget | None = None) -> list[_Output | LLMException]:
+    parser = Parser.for_type(output_type)
+    results: list[_Output | LLMException] = []
+
+    for completion in completions:
+        try:
+            results.append(parser.parse(completion, budget))
+        except LLMException as e:
+            e.raw_completion = completion
+            results.append(e)
+
+    return results
+
+
+def iter_parse(
+    completions: Iterable[str], output_type: type[_Output], workers: int = 0, chunk_size: int = 1000, budget: ParseBudget | None = None
+) -> Iterator[tuple[int, _Output | LLMException]]:
+    """
+    Parses completions lazily and yields `(index, output or exception)` in the order of the completions
+
+    :param workers: number of worker processes. If 0, everything is parsed in the current process. The output type must be importable by the workers (or created by `create_output_type`)
+    :param chunk_size: number of completions sent to a worker at once. At most two chunks per worker are in flight, so memory stays bounded
+    :param budget: optional limits for the length and parse time of each completion. Completions exceeding them fail with `LLMParseBudgetExceeded`
+    """
+
+    iterator = iter(completions)
+    chunks = iter(lambda: list(islice(iterator, chunk_size)), [])
+    index = 0
+
+    if workers <= 0:
+        for chunk in chunks:
+            for result in _parse_chunk(output_type, chunk, budget):
+                yield index, result
+                index += 1
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: deque[Future[list[_Output | LLMException]]] = deque()
+
+        for chunk in chunks:
+            pending.append(executor.submit(_parse_chunk, output_type, chunk, budget))
+            if len(pending) < 2 * workers:
+                continue
+            for result in pending.popleft().result():
+                yield index, result
+                index += 1
+
+        while pending:
+            for result in pending.popleft().result():
+                yield index, result
+                index += 1
+
+
+def parse_batch(
+    completions: Iterable[str], output_type: type[_Output], workers: int = 0, chunk_size: int = 1000, budget: ParseBudget | None = None
+) -> BatchParseResult[_Output]:
+    """Parses all completions and returns the successfully parsed outputs and the failures separately (see `iter_parse`)"""
+
+    result: BatchParseResult[_Output] = BatchParseResult()
+    for index, output in iter_parse(completions, output_type, workers=workers, chunk_size=chunk_size, budget=budget):
+        if isinstance(output, LLMException):
+            result.failures.append((index, output))
+        else:
+            result.successes.append((index, output))
+    return result
+
+
+# - Command line
+
+
+def _import_output_type(path: str) -> type[BaseLLMResponse]:
+    """Imports a class given as "module:QualifiedName" (e.g. "my_module:MyPrompt.Output")"""
+
+    module_name, _, qualified_name = path.partition(":")
+    if not qualified_name:
+        raise ValueError(f'Output type must be given as "module:ClassName", got "{path}"')
+
+    obj: Any = importlib.import_module(module_name)
+    for name in qualified_name.split("."):
+        obj = getattr(obj, name)
+
+    if not isinstance(obj, type) or not issubclass(obj, BaseLLMResponse):
+        raise TypeError(f"{path} is not a subclass of BaseLLMResponse")
+    return obj
+
+
+def _read_completions(file: IO[bytes], key: str) -> Iterator[str]:
+    """Reads the completions line by line from a memory-mapped JSONL file (lines are strings or objects with the completion at `key`)"""
+
+    if file.seek(0, 2) == 0:  # empty files can't be memory-mapped
+        return
+
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+        for line in iter(mapped_file.readline, b""):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            yield entry if isinstance(entry, str) else entry[key]
+
+
+def _result_line(index: int, result: BaseLLMResponse | LLMException) -> dict[str, Any]:
+    if isinstance(result, LLMException):
+        error: dict[str, Any] = {"type": type(result).__name__, "message": str(result)}
+        if isinstance(result, LLMParseException):
+            error["field_name"] = result.field_name
+        return {"index": index, "error": error}
+    return {"index": index, "output": result.to_dict()}
+
+
+def main(argv: list[str] | None = None) -> int:
+    argument_parser = argparse.ArgumentParser(
+        prog="python -m typegpt.batch", description="Parses the completions of a JSONL file and writes one JSON result per line"
+    )
+    argument_parser.add_argument("output_type", help='output class as "module:ClassName", e.g. "my_module:MyPrompt.Output"')
+    argument_parser.add_argument("input", help="JSONL file with one completion per line (as string or object)")
+    argument_parser.add_argument("output", help="JSONL file the results are written to")
+    argument_parser.add_argument("--key", default="completion", help="key of the completion if lines are objects (default: completion)")
+    argument_parser.add_argument("--workers", type=int, default=0, help="number of worker processes (default: 0, i.e. no workers)")
+    argument_parser.add_argument("--chunk-size", type=int, default=1000, help="completions per worker task (default: 1000)")
+    argument_parser.add_argument("--max-length", type=int, default=None, help="maximum number of characters of a completion (default: no limit)")
+    argument_parser.add_argument("--timeout", type=float, default=None, help="maximum parse time per completion in seconds (default: no limit)")
+    args = argument_parser.parse_args(argv)
+
+    output_type = _import_output_type(args.output_type)
+    budget = ParseBudget(max_length=args.max_length, timeout=args.timeout)
+    num_successes = num_failures = 0
+
+    with open(args.input, "rb") as input_file, open(args.output, "w", encoding="utf-8") as output_file:
+        completions = _read_completions(input_file, args.key)
+        for index, result in iter_parse(completions, output_type, workers=args.workers, chunk_size=args.chunk_size, budget=budget):
+            output_file.write(json.dumps(_result_line(index, result), ensure_ascii=False) + "\n")
+            if isinstance(result, LLMException):
+                num_failures += 1
+            else:
+                num_successes += 1
+
+    print(f"Parsed {num_successes + num_failures} completions: {num_successes} succeeded, {num_failures} failed", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
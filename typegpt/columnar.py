@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Generic, Iterable, Iterator, TypeVar
+
+from .fields import LLMFieldInfo
+
+if TYPE_CHECKING:
+    from .base import _InternalBaseLLMResponse
+
+_Output = TypeVar("_Output", bound="_InternalBaseLLMResponse")
+
+# typecodes of typed arrays for numeric fields (values of other types are stored in lists)
+_TYPECODES: dict[type, str] = {bool: "b", int: "q", float: "d"}
+_PLACEHOLDERS: dict[type, Any] = {bool: False, int: 0, float: 0.0}
+
+
+@dataclass
+class Column:
+    """
+    Values of a single field
+
+    Args:
+        values: `array.array` for int, float and bool fields (or NumPy arrays if requested), otherwise a list
+        mask: only for optional values: true where the value is `None` (the value itself is then a placeholder)
+    """
+
+    values: Any
+    mask: Any | None = None
+
+
+@dataclass
+class ColumnBatch(Generic[_Output]):
+    """
+    Column-oriented data of a chunk of outputs
+
+    Columns of nested objects are named by their path (e.g. "details.title"). Lists are flattened: the values of
+    `columns["tags"]` that belong to row `i` are `values[offsets["tags"][i]:offsets["tags"][i + 1]]`. Columns inside a list of
+    array elements (e.g. "items.title") have one entry per element, and lists inside them are offset relative to the elements.
+    """
+
+    output_type: type[_Output]
+    num_rows: int
+    columns: dict[str, Column] = field(default_factory=dict)
+    offsets: dict[str, Any] = field(default_factory=dict)
+
+
+class _ColumnPlan:
+    """Column layout of an output class, derived once from its fields"""
+
+    def __init__(self, output_type: type[_InternalBaseLLMResponse], prefix: str = "", optional: bool = False):
+        self.output_type = output_type
+        self.entries: list[tuple[LLMFieldInfo, str, _ColumnPlan | None]] = []
+        self.leaves: list[tuple[str, type, bool]] = []  # (path, type, is optional) of every column
+        self.lists: list[str] = []  # paths of every list
+
+        for field_info in output_type.__fields__.values():
+            path = prefix + field_info.key
+            descriptor = field_info.descriptor
+
+            if element_type := descriptor.array_element_type:
+                subplan = _ColumnPlan(element_type, prefix=path + ".")
+                self.lists.append(path)
+                self.lists.extend(subplan.lists)
+                self.leaves.extend(subplan.leaves)
+            elif response_type := descriptor.response_type:
+                subplan = _ColumnPlan(response_type, prefix=path + ".", optional=optional or descriptor.is_optional)
+                self.lists.extend(subplan.lists)
+                self.leaves.extend(subplan.leaves)
+            elif descriptor.is_array:
+                subplan = None
+                self.lists.append(path)
+                self.leaves.append((path, descriptor.item_type, False))
+            else:
+                subplan = None
+                self.leaves.append((path, descriptor.base_type, optional or descriptor.is_optional))
+
+            self.entries.append((field_info, path, subplan))
+
+    def new_columns(self) -> tuple[dict[str, Column], dict[str, array]]:
+        columns = {
+            path: Column(
+                values=array(_TYPECODES[_type]) if _type in _TYPECODES else [],
+                mask=array("b") if optional else None,
+            )
+            for path, _type, optional in self.leaves
+        }
+        offsets = {path: array("q", [0]) for path in self.lists}
+        return columns, offsets
+
+    def append(self, obj: _InternalBaseLLMResponse | None, columns: dict[str, Column], offsets: dict[str, array]):
+        """Appends one row (`None` for a missing optional nested object)"""
+
+        for field_info, path, subplan in self.entries:
+            value = getattr(obj, field_info.key) if obj is not None else None
+            descriptor = field_info.descriptor
+
+            if descriptor.is_array:
+                items = value or []
+                if subplan is not None:
+                    for item in items:
+                        subplan.append(item, columns, offsets)
+                else:
+                    columns[path].values.extend(items)
+                list_offsets = offsets[path]
+                list_offsets.append(list_offsets[-1] + len(items))
+
+            elif subplan is not None:
+                subplan.append(value, columns, offsets)
+
+            else:
+                column = columns[path]
+                if column.mask is not None:
+                    column.mask.append(value is None)
+                    if value is None:
+                        value = _PLACEHOLDERS.get(descriptor.base_type, "")
+                column.values.append(value)
+
+
+def iter_columns(
+    outputs: Iterable[_Output], output_type: type[_Output] | None = None, chunk_size: int = 100_000, use_numpy: bool = False
+) -> Iterator[ColumnBatch[_Output]]:
+    """
+    Converts outputs of one class into column-oriented batches of at most `chunk_size` rows each, so memory stays bounded for any number of outputs
+    :param output_type: class of all outputs. If not specified, the class of the first output is used
+    :param use_numpy: whether to return NumPy arrays instead of `array.array` and lists (requires `numpy`)
+    @throws TypeError if an output is not an instance of the output type
+    """
+
+    iterator = iter(outputs)
+    plan: _ColumnPlan | None = _ColumnPlan(output_type) if output_type else None
+
+    while chunk := list(islice(iterator, chunk_size)):
+        if plan is None:
+            plan = _ColumnPlan(type(chunk[0]))
+
+        columns, offsets = plan.new_columns()
+        for output in chunk:
+            if not isinstance(output, plan.output_type):
+                raise TypeError(f"Expected output of type {plan.output_type.__name__}, got {type(output).__name__}")
+            plan.append(output, columns, offsets)
+
+        batch = ColumnBatch(output_type=plan.output_type, num_rows=len(chunk), columns=columns, offsets=offsets)
+        yield _to_numpy(batch) if use_numpy else batch
+
+
+def to_columns(outputs: Iterable[_Output], output_type: type[_Output] | None = None, use_numpy: bool = False) -> ColumnBatch[_Output]:
+    """Converts all outputs into a single column-oriented batch (see `iter_columns`)"""
+
+    outputs = list(outputs)
+    if output_type is None:
+        if not outputs:
+            raise ValueError("Output type must be specified if there are no outputs")
+        output_type = type(outputs[0])
+
+    if outputs:
+        return next(iter_columns(outputs, output_type, chunk_size=len(outputs), use_numpy=use_numpy))
+
+    columns, offsets = _ColumnPlan(output_type).new_columns()
+    batch = ColumnBatch(output_type=output_type, num_rows=0, columns=columns, offsets=offsets)
+    return _to_numpy(batch) if use_numpy else batch
+
+
+def _to_numpy(batch: ColumnBatch[_Output]) -> ColumnBatch[_Output]:
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("`use_numpy` requires numpy to be installed: pip install numpy")
+
+    def convert(values: Any) -> Any:
+        if isinstance(values, array):
+            if values.typecode == "b":
+                return numpy.frombuffer(values, dtype=numpy.int8).astype(numpy.bool_)
+            return numpy.frombuffer(values, dtype=numpy.int64 if values.typecode == "q" else numpy.float64)
+        return numpy.array(values, dtype=object)
+
+    for column in batch.columns.values():
+        column.values = convert(column.values)
+        if column.mask is not None:
+            column.mask = convert(column.mask)
+    batch.offsets = {path: convert(offsets) for path, offsets in batch.offsets.items()}
+    return batch
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+from .exceptions import LLMOutputFieldInvalidLength, LLMOutputFieldWrongType
+from .fields import LLMArrayOutputInfo, LLMFieldInfo
+from .utils.utils import symmetric_strip
+
+FieldConverter = Callable[[Any], Any]
+FieldValidator = Callable[[Any], Any]
+
+
+def _keep(value: Any) -> Any:
+    return value
+
+
+def _convert_int(value: Any) -> Any:
+    if isinstance(value, str):
+        value = value.strip()
+        try:
+            return int(value)
+        except ValueError:
+            raise LLMOutputFieldWrongType(f'"{value}" is not a valid integer value')
+    return value
+
+
+def _convert_float(value: Any) -> Any:
+    if isinstance(value, str):
+        value = value.strip()
+        try:
+            return float(value)
+        except ValueError:
+            raise LLMOutputFieldWrongType(f'"{value}" is not a valid float value')
+    return value
+
+
+def _convert_bool(value: Any) -> Any:
+    if isinstance(value, str):
+        value = symmetric_strip(value.strip(), [("<", ">"), ("(", ")")])
+        if value.lower() in ("true", "yes", "1"):
+            return True
+        elif value.lower() in ("false", "no", "0"):
+            return False
+        else:
+            raise LLMOutputFieldWrongType(f'"{value}" is not a valid boolean value')
+    return value
+
+
+_SCALAR_CONVERTERS: dict[type, FieldConverter] = {
+    int: _convert_int,
+    float: _convert_float,
+    bool: _convert_bool,
+}
+
+
+def scalar_converter(_type: type) -> FieldConverter:
+    """Returns the converter from string to the given (non-optional) type. Values of other types are returned as is"""
+    return _SCALAR_CONVERTERS.get(_type, _keep)
+
+
+def compile_field_converter(field: LLMFieldInfo) -> FieldConverter:
+    """Resolves the type of the field once and returns the converter for its values (or for every item of a list)"""
+
+    if isinstance(field.info, LLMArrayOutputInfo):
+        item_converter = scalar_converter(field.descriptor.item_type)
+        if item_converter is _keep:
+            return list
+        return lambda value: [item_converter(v) for v in value]
+
+    return scalar_converter(field.descriptor.base_type)
+
+
+def validate_array_length(owner: str, field: LLMFieldInfo, value: list[Any]):
+    """@throws LLMOutputFieldInvalidLength"""
+
+    assert isinstance(field.info, LLMArrayOutputInfo)
+
+    if field.info.min_count is not None and len(value) < field.info.min_count:
+        raise LLMOutputFieldInvalidLength(f'"{owner}" field "{field.key}" must have at least {field.info.min_count} items')
+    if field.info.max_count is not None and len(value) > field.info.max_count:
+        raise LLMOutputFieldInvalidLength(f'"{owner}" field "{field.key}" must have at most {field.info.max_count} items')
+
+
+def compile_field_validator(owner: str, field: LLMFieldInfo) -> FieldValidator:
+    """
+    Resolves the type of the field once and returns a callable that converts and validates any value assigned to the field
+    (the callable throws LLMParseException or TypeError)
+    """
+
+    key = field.key
+    field_type = field.type_
+
+    if isinstance(field.info, LLMArrayOutputInfo):
+        item_type = field.descriptor.item_type
+        convert_item = scalar_converter(item_type)
+
+        def validate_array(value: Any) -> Any:
+            if not isinstance(value, list):
+                raise LLMOutputFieldWrongType(f'"{owner}" field "{key}" must be a list')
+            validate_array_length(owner, field, value)
+
+            value = [convert_item(v) for v in value]
+            if not all(isinstance(v, item_type) for v in value):
+                raise LLMOutputFieldWrongType(f'"{owner}" field "{key}" must be a list of type {field_type}')
+            return value
+
+        return validate_array
+
+    convert = scalar_converter(field.descriptor.base_type)
+    required = field.info.required
+
+    def validate(value: Any) -> Any:
+        value = convert(value)
+        if value is None and required:
+            raise TypeError(f'"{owner}" field "{key}" is required')
+        if not isinstance(value, field_type):
+            raise LLMOutputFieldWrongType(f'"{owner}" field "{key}" must be of type {field_type}')
+        return value
+
+    return validate
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import copyreg
+import hashlib
+import json
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from .base import BaseLLMArrayElement, BaseLLMResponse
+from .fields import ExamplePosition, LLMArrayElementOutput, LLMArrayOutput, LLMOutput
+from .meta import LLMArrayElementMeta, LLMBaseMeta, LLMMeta
+from .utils.internal_types import _NoDefault
+
+_SCALAR_TYPES: dict[str, type] = {"str": str, "int": int, "float": float, "bool": bool}
+_FIELD_SPEC_KEYS = {"key", "type", "optional", "instruction", "default", "multiline", "count", "tabular", "name", "fields"}
+
+
+@dataclass(frozen=True)
+class TemplateInstruction:
+    """Instruction of array items given as template, with the placeholders `{ordinal}` (e.g. "first") and `{position}` (e.g. "1")"""
+
+    template: str
+
+    def __call__(self, position: ExamplePosition) -> str:
+        return self.template.format(ordinal=position.ordinal, position=position)
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _normalize_fields(fields: Any, path: str) -> list[dict[str, Any]]:
+    if not isinstance(fields, list) or not fields:
+        raise ValueError(f'"{path}fields" must be a non-empty list of field specs')
+    return [_normalize_field(field, path) for field in fields]
+
+
+def _normalize_field(field: Any, path: str) -> dict[str, Any]:
+    """Validates a field spec and fills in all defaults, so equivalent specs are equal"""
+
+    if not isinstance(field, dict) or not isinstance(field.get("key"), str) or not field["key"].isidentifier():
+        raise ValueError(f'Every field spec in "{path}fields" needs a "key" that is a valid identifier, got {field!r}')
+    key = field["key"]
+    if unknown_keys := set(field) - _FIELD_SPEC_KEYS:
+        raise ValueError(f'Field "{path}{key}" has unknown spec keys: {", ".join(sorted(unknown_keys))}')
+
+    type_name = field.get("type", "str")
+    if not isinstance(type_name, str):
+        raise ValueError(f'Field "{path}{key}" has unsupported type {type_name!r}')
+    is_array = type_name.startswith("list[") and type_name.endswith("]")
+    item_type_name = type_name[5:-1] if is_array else type_name
+    if item_type_name not in _SCALAR_TYPES and item_type_name != "object":
+        raise ValueError(f'Field "{path}{key}" has unsupported type "{type_name}"')
+
+    normalized: dict[str, Any] = {"key": key, "type": type_name, "instruction": field.get("instruction"), "multiline": bool(field.get("multiline"))}
+
+    if item_type_name == "object":
+        if field.get("instruction") is not None or "default" in field or normalized["multiline"]:
+            raise ValueError(f'Field "{path}{key}" is an object, so it can\'t have an instruction, default or multiline setting')
+        normalized["name"] = field.get("name") or "".join(part.capitalize() for part in key.split("_"))
+        normalized["fields"] = _normalize_fields(field.get("fields"), f"{path}{key}.")
+    elif "fields" in field:
+        raise ValueError(f'Field "{path}{key}" has nested fields, but its type is "{type_name}" instead of "object" or "list[object]"')
+
+    if is_array:
+        if field.get("optional") or "default" in field:
+            raise ValueError(f'Field "{path}{key}" is a list, so it can\'t be optional or have a default (it is empty if missing)')
+        count = field.get("count", [0, None])
+        if _is_int(count):
+            count = [count, count]
+        elif not (isinstance(count, (list, tuple)) and len(count) == 2 and _is_int(count[0]) and (count[1] is None or _is_int(count[1]))):
+            raise ValueError(f'Field "{path}{key}" has invalid count {count!r}, expected a number or [min, max] (max can be null)')
+        normalized["count"] = list(count)
+        if item_type_name == "object":
+            normalized["tabular"] = bool(field.get("tabular"))
+        elif "tabular" in field:
+            raise ValueError(f'Field "{path}{key}" is not a list of objects, so it can\'t be tabular')
+    else:
+        if "count" in field or "tabular" in field:
+            raise ValueError(f'Field "{path}{key}" is not a list, so it can\'t have a count or be tabular')
+        normalized["optional"] = bool(field.get("optional"))
+        if "default" in field:
+            normalized["default"] = field["default"]
+
+    return normalized
+
+
+def normalize_spec(spec: dict[str, Any] | str | bytes) -> dict[str, Any]:
+    """
+    Validates a declarative output spec (as dict or JSON) and fills in all defaults
+
+    A spec has a class `name`, optionally `compact: true` and `short_labels: true` (both apply to nested classes too) and a
+    list of `fields`. Each field has a `key` and optionally a `type` ("str" (default), "int", "float", "bool", "object" or a list
+    of them like "list[str]"), `optional`, `instruction`, `default`, `multiline` and, for lists, `count` (a number or
+    [min, max]) and, for "list[object]", `tabular`. Instructions of lists and of fields inside "list[object]" are templates with
+    the placeholders `{ordinal}` and `{position}`. Objects have `fields` of their own and optionally a class `name`.
+    @throws ValueError if the spec is invalid
+    """
+
+    if isinstance(spec, (str, bytes)):
+        spec = json.loads(spec)
+    if not isinstance(spec, dict):
+        raise ValueError(f"Output spec must be an object, got {type(spec).__name__}")
+    if unknown_keys := set(spec) - {"name", "compact", "short_labels", "fields"}:
+        raise ValueError(f'Output spec has unknown keys: {", ".join(sorted(unknown_keys))}')
+
+    return {
+        "name": spec.get("name", "Output"),
+        "compact": bool(spec.get("compact")),
+        "short_labels": bool(spec.get("short_labels")),
+        "fields": _normalize_fields(spec.get("fields"), ""),
+    }
+
+
+def spec_fingerprint(spec: dict[str, Any]) -> str:
+    """Hash of a normalized spec"""
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+def _create_class(name: str, fields: list[dict[str, Any]], compact: bool, short_labels: bool, is_array_element: bool) -> type[Any]:
+    annotations: dict[str, Any] = {}
+    namespace: dict[str, Any] = {"__module__": __name__, "__qualname__": name, "__annotations__": annotations}
+
+    for field in fields:
+        key = field["key"]
+        is_array = field["type"].startswith("list[")
+        item_type_name = field["type"][5:-1] if is_array else field["type"]
+
+        if item_type_name == "object":
+            item_type = _create_class(field["name"], field["fields"], compact, short_labels, is_array_element=is_array)
+        else:
+            item_type = _SCALAR_TYPES[item_type_name]
+
+        if is_array:
+            annotations[key] = list[item_type]
+            if field["instruction"] is not None:
+                instruction = TemplateInstruction(field["instruction"])
+            else:
+                instruction = LLMMeta.generate_default_array_instruction(LLMMeta.generate_field_name(key, is_array=True))
+            namespace[key] = LLMArrayOutput(tuple(field["count"]), instruction, multiline=field["multiline"], tabular=field.get("tabular", False))
+            continue
+
+        annotations[key] = item_type | None if field["optional"] else item_type
+        if item_type_name == "object":
+            continue
+
+        default = field.get("default", None if field["optional"] else _NoDefault)
+        if field["instruction"] is None and not field["multiline"]:
+            if default is not _NoDefault:
+                namespace[key] = default
+            continue
+
+        if is_array_element:
+            if field["instruction"] is not None:
+                instruction = TemplateInstruction(field["instruction"])
+            else:
+                instruction = LLMMeta.generate_default_array_element_instruction(LLMMeta.generate_field_name(key))
+            namespace[key] = LLMArrayElementOutput(instruction, default=default, multiline=field["multiline"])
+        else:
+            instruction = field["instruction"] or LLMMeta.generate_default_instruction(LLMMeta.generate_field_name(key), item_type)
+            namespace[key] = LLMOutput(instruction, default=default, multiline=field["multiline"])
+
+    base = BaseLLMArrayElement if is_array_element else BaseLLMResponse
+    return type(base)(name, (base,), namespace, compact=compact, short_labels=short_labels)
+
+
+def _create_output_type(spec: dict[str, Any]) -> type[BaseLLMResponse]:
+    output_type = _create_class(spec["name"], spec["fields"], spec["compact"], spec["short_labels"], is_array_element=False)
+    _set_origin(output_type, spec, ())
+    return output_type
+
+
+# - Pickling
+# generated classes can't be found under their qualified name, so they are pickled as their spec and recreated when unpickled
+
+
+def _set_origin(output_type: type[Any], spec: dict[str, Any], path: tuple[str, ...]):
+    """Stores the spec and the path of field keys from the output class to the (nested) class"""
+    output_type.__dynamic_origin__ = (spec, path)
+    for key, field in output_type.__fields__.items():
+        if nested_type := field.descriptor.array_element_type or field.descriptor.response_type:
+            _set_origin(nested_type, spec, path + (key,))
+
+
+def _dynamic_class(spec: dict[str, Any], path: tuple[str, ...]) -> type[Any]:
+    """Recreates a pickled class through the default cache, so it is shared with all other classes of the same spec"""
+    output_type: type[Any] = create_output_type(spec)
+    for key in path:
+        descriptor = output_type.__fields__[key].descriptor
+        output_type = descriptor.array_element_type or descriptor.response_type
+    return output_type
+
+
+def _reduce_class(cls: type[Any]) -> str | tuple[Any, ...]:
+    origin = cls.__dict__.get("__dynamic_origin__")
+    if origin is None:
+        return cls.__qualname__  # pickled by reference as usual
+    return _dynamic_class, origin
+
+
+for _meta in (LLMBaseMeta, LLMArrayElementMeta):
+    copyreg.pickle(_meta, _reduce_class)
+
+
+class OutputTypeCache:
+    """
+    Creates output classes from specs and shares them between identical specs. The most recently used `maxsize` classes are
+    kept alive, older ones only as long as they are still referenced elsewhere (e.g. by parsed objects), so memory stays bounded
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._recent: OrderedDict[str, type[BaseLLMResponse]] = OrderedDict()
+        self._alive: weakref.WeakValueDictionary[str, type[BaseLLMResponse]] = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._alive)
+
+    def get(self, spec: dict[str, Any] | str | bytes) -> type[BaseLLMResponse]:
+        """@throws ValueError if the spec is invalid, TypeError if it results in an invalid output class"""
+
+        spec = normalize_spec(spec)
+        fingerprint = spec_fingerprint(spec)
+
+        with self._lock:
+            output_type = self._recent.get(fingerprint) or self._alive.get(fingerprint)
+            if output_type is None:
+                output_type = self._alive[fingerprint] = _create_output_type(spec)
+
+            self._recent[fingerprint] = output_type
+            self._recent.move_to_end(fingerprint)
+            if len(self._recent) > self.maxsize:
+                self._recent.popitem(last=False)
+
+        return output_type
+
+    def clear(self):
+        with self._lock:
+            self._recent.clear()
+            self._alive.clear()
+
+
+_default_cache = OutputTypeCache()
+
+
+def create_output_type(spec: dict[str, Any] | str | bytes, cache: OutputTypeCache | None = _default_cache) -> type[BaseLLMResponse]:
+    """
+    Creates an output class from a declarative spec (see `normalize_spec`). Identical specs return the same class.
+    Objects of the class can be pickled, e.g. to parse them with multiple workers. The class is recreated from the spec when
+    unpickled (through the default cache)
+
+    :param cache: cache the class is shared through. If `None`, a new class is created every time
+    @throws ValueError if the spec is invalid, TypeError if it results in an invalid output class
+    """
+
+    if cache is None:
+        return _create_output_type(normalize_spec(spec))
+    return cache.get(spec)
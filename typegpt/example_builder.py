@@ -1,9 +1,9 @@
 from typing import TypeVar
 
-from typegpt.base import BaseLLMResponse
+from typegpt.base import BaseLLMArrayElement, BaseLLMResponse
 from typegpt.fields import LLMArrayElementOutputInfo, LLMArrayOutputInfo, LLMOutputInfo
-from typegpt.utils.type_checker import SupportedBaseTypes, if_array_element_list_type, if_response_type, is_response_type
-from typegpt.utils.utils import limit_newlines
+from typegpt.utils.type_checker import SupportedBaseTypes
+from typegpt.utils.utils import TABLE_DELIMITER, escape_table_cell, limit_newlines
 
 BaseTypeT = TypeVar("BaseTypeT", bound=SupportedBaseTypes)
 
@@ -19,6 +19,18 @@ class ExampleOutputFactory:
             return "true" if value else "false"
         return value
 
+    def _generate_table(self, field_name: str, element_type: type[BaseLLMArrayElement], elements: list[BaseLLMArrayElement]) -> list[str]:
+        """Lines of a table with a header line and one row per element (empty cells for missing values, omitted at the end of a row)"""
+        columns = list(element_type.__fields__.values())
+        lines = [f"{field_name}: " + TABLE_DELIMITER.join(column.name for column in columns)]
+        for element in elements:
+            values = [getattr(element, column.key) for column in columns]
+            cells = ["" if value is None else escape_table_cell(str(self._transform_value(value))) for value in values]
+            while cells and not cells[-1]:
+                cells.pop()  # missing cells at the end are empty, and a trailing `|` would look like a markdown-style row
+            lines.append(TABLE_DELIMITER.join(cells))
+        return lines
+
     def generate(self) -> str:
         lines: list[str] = []
 
@@ -28,7 +40,7 @@ class ExampleOutputFactory:
             if isinstance(field.info, LLMOutputInfo):
                 value = getattr(self.example, field.key)
 
-                if is_response_type(field.type_):
+                if field.descriptor.response_type:
                     subelement_factory = ExampleOutputFactory(value, name_prefixes=self.name_prefixes + [field.name])
                     lines.append("")  # add a newline before each subelement
                     lines.append(subelement_factory.generate())
@@ -40,7 +52,14 @@ class ExampleOutputFactory:
                     lines.append(f"{field_name}: {value}")
 
             elif isinstance(field.info, LLMArrayOutputInfo):
-                if if_array_element_list_type(field.type_):
+                if field.info.tabular:
+                    elements = getattr(self.example, field.key)
+                    if elements:
+                        lines.append("")
+                        lines.extend(self._generate_table(field_name, field.descriptor.array_element_type, elements))
+                        lines.append("")
+
+                elif field.descriptor.array_element_type:
                     lines.append("")
                     for i, subelement in enumerate(getattr(self.example, field.key)):
                         subelement_factory = ExampleOutputFactory(subelement, name_prefixes=self.name_prefixes + [field.name, str(i + 1)])
@@ -60,7 +79,7 @@ class ExampleOutputFactory:
             elif isinstance(field.info, LLMArrayElementOutputInfo):
                 value = getattr(self.example, field.key)
 
-                if is_response_type(field.type_):
+                if field.descriptor.response_type:
                     subelement_factory = ExampleOutputFactory(value, name_prefixes=self.name_prefixes + [field.name])
                     lines.append("")
                     lines.append(subelement_factory.generate())
@@ -10,7 +10,18 @@ class LLMException(Exception):
 class LLMTokenLimitExceeded(LLMException): ...
 
 
-class LLMParseException(LLMException): ...
+class LLMParseException(LLMException):
+
+    def __init__(
+        self,
+        message: str,
+        system_prompt: str | None = None,
+        user_prompt: str | None = None,
+        raw_completion: str | None = None,
+        field_name: str | None = None,
+    ):
+        super().__init__(message, system_prompt=system_prompt, user_prompt=user_prompt, raw_completion=raw_completion)
+        self.field_name = field_name  # displayed name of the field that failed (e.g. "ITEM 2 TITLE"), if known
 
 
 class LLMOutputFieldMissing(LLMParseException): ...
@@ -20,3 +31,6 @@ class LLMOutputFieldWrongType(LLMParseException): ...
 
 
 class LLMOutputFieldInvalidLength(LLMParseException): ...
+
+
+class LLMParseBudgetExceeded(LLMParseException): ...
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Any, Callable, Generic, TypeVar
 
 from .utils.internal_types import _NoDefault, _NoDefaultType
@@ -20,6 +20,16 @@ class ExamplePosition:
         return {1: "first", 2: "second", 3: "third"}.get(self._position, f"{self._position}th")
 
 
+@dataclass(frozen=True)
+class OrdinalInstruction:
+    """Default instruction for array items (a class instead of a closure, so it can be pickled)"""
+
+    name: str
+
+    def __call__(self, position: ExamplePosition) -> str:
+        return f"Put the {position.ordinal} {self.name} here"
+
+
 @dataclass
 class LLMOutputInfo(Generic[T]):
     instruction: str
@@ -34,6 +44,7 @@ class LLMArrayOutputInfo(Generic[T]):
     min_count: int
     max_count: int | None
     multiline: bool
+    tabular: bool = False  # elements are returned as rows of a table (only for elements with single-line values)
 
 
 @dataclass
@@ -50,6 +61,23 @@ class LLMFieldInfo(Generic[T]):
     name: str
     type_: type[T]
     info: LLMOutputInfo[T] | LLMArrayOutputInfo[T] | LLMArrayElementOutputInfo[T]
+    descriptor: TypeDescriptor = field(init=False, repr=False, compare=False)
+    owner: type | None = field(default=None, repr=False, compare=False)  # class that defines the field, set by the metaclass
+
+    def __post_init__(self):
+        from .utils.type_checker import describe_type
+
+        self.descriptor = describe_type(self.type_)
+
+    def __reduce_ex__(self, protocol: Any):
+        # pickled as reference to the defining class, as instructions are often lambdas
+        if self.owner is not None and getattr(self.owner, "__fields__", {}).get(self.key) is self:
+            return (_field_info_of, (self.owner, self.key))
+        return super().__reduce_ex__(protocol)
+
+
+def _field_info_of(owner: type, key: str) -> LLMFieldInfo:
+    return owner.__fields__[key]
 
 
 def LLMOutput(
@@ -65,6 +93,7 @@ def LLMArrayOutput(
     expected_count: int | None | tuple[int | None, int | None],
     instruction: Callable[[ExamplePosition], str],
     multiline: bool = False,
+    tabular: bool = False,
 ) -> Any:
     min_count, max_count = 0, None
     if isinstance(expected_count, tuple):
@@ -74,7 +103,7 @@ def LLMArrayOutput(
         min_count = expected_count
         max_count = expected_count
 
-    return LLMArrayOutputInfo(instruction=instruction, min_count=min_count, max_count=max_count, multiline=multiline)
+    return LLMArrayOutputInfo(instruction=instruction, min_count=min_count, max_count=max_count, multiline=multiline, tabular=tabular)
 
 
 def LLMArrayElementOutput(
@@ -90,4 +119,4 @@ def ClassPlaceholder(init: bool, value: Any = None) -> Any:
 
 
 if TYPE_CHECKING:
-    from .utils.type_checker import SupportedBaseTypes, array_item_type
+    from .utils.type_checker import SupportedBaseTypes, TypeDescriptor, array_item_type
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from .exceptions import LLMOutputFieldMissing, LLMOutputFieldWrongType, LLMParseException
+from .fields import LLMArrayOutputInfo, LLMFieldInfo, LLMOutputInfo
+from .parser import ParseBudget, _prefixed_field_name, _start_budget
+from .serialization import loads
+
+if TYPE_CHECKING:
+    from .base import _InternalBaseLLMResponse
+
+_Output = TypeVar("_Output", bound="_InternalBaseLLMResponse")
+
+_JSON_TYPES: dict[type, str] = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+
+def _count_description(info: LLMArrayOutputInfo) -> str | None:
+    if info.max_count is None:
+        return f"at least {info.min_count} items" if info.min_count else None
+    if info.min_count == info.max_count:
+        return f"exactly {info.max_count} items"
+    if info.min_count:
+        return f"between {info.min_count} and {info.max_count} items"
+    return f"at most {info.max_count} items"
+
+
+def _scalar_schema(_type: type) -> dict[str, Any]:
+    for base_type, json_type in _JSON_TYPES.items():
+        if issubclass(_type, base_type) and not (base_type is int and issubclass(_type, bool)):
+            return {"type": json_type}
+    raise TypeError(f"Type {_type} has no JSON schema")
+
+
+def _field_schema(field: LLMFieldInfo, strict: bool) -> dict[str, Any]:
+    descriptor = field.descriptor
+
+    if isinstance(field.info, LLMArrayOutputInfo):
+        if element_type := descriptor.array_element_type:
+            items = generate_json_schema(element_type, strict)
+        else:
+            items = _scalar_schema(descriptor.item_type)
+        schema: dict[str, Any] = {"type": "array", "items": items}
+
+        if strict:  # item counts are not supported by strict schemas, so they are described and checked while parsing
+            if description := _count_description(field.info):
+                schema["description"] = description
+        else:
+            if field.info.min_count:
+                schema["minItems"] = field.info.min_count
+            if field.info.max_count is not None:
+                schema["maxItems"] = field.info.max_count
+        return schema
+
+    if response_type := descriptor.response_type:
+        schema = generate_json_schema(response_type, strict)
+    else:
+        schema = _scalar_schema(descriptor.base_type)
+        if isinstance(field.info, LLMOutputInfo):  # instructions of array elements depend on their position
+            schema["description"] = field.info.instruction
+
+    if not field.info.required:
+        schema = {"anyOf": [schema, {"type": "null"}]}
+    return schema
+
+
+def generate_json_schema(output_type: type[_InternalBaseLLMResponse], strict: bool = True) -> dict[str, Any]:
+    """
+    JSON schema of the objects of an output class, with the field keys as properties
+
+    :param strict: whether to follow the restrictions of strict structured outputs: all properties are required (optional
+        fields are nullable instead) and item counts of arrays are only described
+    """
+
+    properties = {key: _field_schema(field, strict) for key, field in output_type.__fields__.items()}
+    if strict:
+        required = list(properties)
+    else:
+        required = [key for key, field in output_type.__fields__.items() if isinstance(field.info, LLMArrayOutputInfo) or field.info.required]
+
+    return {"type": "object", "properties": properties, "required": required, "additionalProperties": False}
+
+
+def _schema_name(output_type: type[_InternalBaseLLMResponse]) -> str:
+    return re.sub(r"[^a-zA-Z0-9_-]", "_", output_type.__name__)[:64]
+
+
+def response_format_for_type(output_type: type[_InternalBaseLLMResponse]) -> dict[str, Any]:
+    """Returns the shared `response_format` of the chat completion API for the output class, which generates the schema only once"""
+
+    response_format = output_type.__dict__.get("__response_format__")  # not inherited from parent classes
+    if response_format is None:
+        json_schema = {"name": _schema_name(output_type), "schema": generate_json_schema(output_type), "strict": True}
+        response_format = {"type": "json_schema", "json_schema": json_schema}
+        output_type.__response_format__ = response_format
+    return response_format
+
+
+def tool_for_type(output_type: type[_InternalBaseLLMResponse]) -> dict[str, Any]:
+    """
+    Returns the shared function tool of the chat completion API whose arguments are the output class. The schema is not strict,
+    as the tool is meant for models without structured outputs, so it also contains the item counts of arrays
+    """
+
+    tool = output_type.__dict__.get("__tool__")  # not inherited from parent classes
+    if tool is None:
+        function = {"name": _schema_name(output_type), "parameters": generate_json_schema(output_type, strict=False)}
+        tool = {"type": "function", "function": function}
+        output_type.__tool__ = tool
+    return tool
+
+
+def tool_choice_for_type(output_type: type[_InternalBaseLLMResponse]) -> dict[str, Any]:
+    """`tool_choice` that forces the model to call the tool of the output class"""
+    return {"type": "function", "function": {"name": tool_for_type(output_type)["function"]["name"]}}
+
+
+# - Parsing
+
+
+def _json_value(field: LLMFieldInfo, _type: type, value: Any) -> Any:
+    """@throws LLMOutputFieldWrongType"""
+
+    if issubclass(_type, float) and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)  # JSON doesn't distinguish integral floats
+    if not isinstance(value, _type) or (isinstance(value, bool) and not issubclass(_type, bool)):
+        raise LLMOutputFieldWrongType(f'{value!r} is not a valid {_type.__name__} value', field_name=field.name)
+    return value
+
+
+def _object_from_json(output_type: type[_Output], data: Any) -> _Output:
+    """@throws LLMParseException"""
+
+    if not isinstance(data, dict):
+        raise LLMOutputFieldWrongType(f"Expected a JSON object for {output_type.__name__}, got {type(data).__name__}")
+
+    field_values: dict[str, Any] = {}
+    for key, field in output_type.__fields__.items():
+        value = data.get(key)
+        descriptor = field.descriptor
+
+        if value is None:
+            if not isinstance(field.info, LLMArrayOutputInfo) and field.info.required:
+                raise LLMOutputFieldMissing(f'Field "{field.name}" is missing in {output_type.__name__}', field_name=field.name)
+            continue  # default of the field
+
+        if isinstance(field.info, LLMArrayOutputInfo):
+            if not isinstance(value, list):
+                raise LLMOutputFieldWrongType(f'Field "{field.name}" must be a list', field_name=field.name)
+            if element_type := descriptor.array_element_type:
+                elements = []
+                for i, item in enumerate(value):
+                    with _prefixed_field_name(f"{field.name} {i + 1}"):
+                        elements.append(_object_from_json(element_type, item))
+                value = elements
+            else:
+                value = [_json_value(field, descriptor.item_type, item) for item in value]
+        elif response_type := descriptor.response_type:
+            with _prefixed_field_name(field.name):
+                value = _object_from_json(response_type, value)
+        else:
+            value = _json_value(field, descriptor.base_type, value)
+
+        field_values[key] = value
+
+    return output_type._construct(field_values)  # only checks the item counts, as all values have the right types
+
+
+def parse_json_response(output_type: type[_Output], response: str, budget: ParseBudget | None = None) -> _Output:
+    """
+    Parses a completion that was generated with the JSON schema of the output class, with a single JSON decode whose values are
+    mapped straight into the object
+    @throws LLMParseException (`LLMParseBudgetExceeded` if the completion is longer than the budget allows)
+    """
+
+    _start_budget(response, budget)
+
+    try:
+        data = loads(response)
+    except ValueError as e:  # also raised by orjson
+        raise LLMParseException(f"Completion is not valid JSON: {e}")
+
+    output = _object_from_json(output_type, data)
+    output._set_raw_completion(response)
+    return output
@@ -16,15 +16,15 @@ EncodedMessage = dict[str, str]
 
 
 class MessageCollectionFactory(Generic[Prompt]):
-    def __init__(self, prompt: Prompt, token_counter: Callable[[list[EncodedMessage]], int]):
+    def __init__(self, prompt: Prompt, token_counter: Callable[[list[EncodedMessage]], int], json_output: bool = False):
+        """:param json_output: whether the output is requested as JSON through a schema, so no format instructions are needed"""
         self.prompt = prompt
         self.token_counter = token_counter
-        self.output_prompt_factory = OutputPromptFactory(
-            list(prompt.Output.__fields__.values())
-        )  #  TODO: add config for `threaten` and more
+        self.json_output = json_output
+        self.output_prompt_factory = OutputPromptFactory.for_type(prompt.Output)  #  TODO: add config for `threaten` and more
 
     def _generate_single_fewshot_example_messages(self, example: FewShotExample) -> list[EncodedMessage]:
-        encoded_output = ExampleOutputFactory(example.output).generate()
+        encoded_output = example.output.to_json() if self.json_output else ExampleOutputFactory(example.output).generate()
         return [
             {"role": "system", "name": "example_user", "content": example.input},
             {"role": "system", "name": "example_assistant", "content": encoded_output},
@@ -36,7 +36,7 @@ class MessageCollectionFactory(Generic[Prompt]):
     def _generate_messages_from_prompt(self, prompt: Prompt) -> list[EncodedMessage]:
         system_prompt = prompt.system_prompt()
 
-        if not prompt.settings.disable_formatting_instructions:
+        if not prompt.settings.disable_formatting_instructions and not self.json_output:
             system_prompt += "\n\n"
             system_prompt += self.output_prompt_factory.generate()
 
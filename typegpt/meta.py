@@ -1,15 +1,17 @@
 from __future__ import annotations
 
+import hashlib
 import inspect
+import json
 from abc import ABCMeta
 from typing import TYPE_CHECKING, Any, Callable
 
-import inflect
 from typing_extensions import dataclass_transform, override
 
 from .fields import (
     ClassPlaceholder,
     ExamplePosition,
+    OrdinalInstruction,
     LLMArrayElementOutput,
     LLMArrayElementOutputInfo,
     LLMArrayOutput,
@@ -21,7 +23,24 @@ from .fields import (
 from .helper import ClassAttribute, generate_model_signature
 from .utils.internal_types import _NoDefault
 
-inflect_engine = inflect.engine()
+if TYPE_CHECKING:
+    import inflect
+
+_inflect_engine: inflect.engine | None = None  # created on first use, as importing inflect is slow
+_singular_nouns: dict[str, str | None] = {}  # results by noun, can be preloaded from a warm-up cache (see `typegpt.warmup`)
+
+
+def _singular_noun(name: str) -> str | None:
+    """Returns the singular of a plural noun, or `None` if it isn't plural"""
+    global _inflect_engine
+    if name in _singular_nouns:
+        return _singular_nouns[name]
+    if _inflect_engine is None:
+        import inflect
+
+        _inflect_engine = inflect.engine()
+    singular = _singular_nouns[name] = _inflect_engine.singular_noun(name) or None
+    return singular
 
 
 class LLMMeta(ABCMeta):
@@ -29,11 +48,37 @@ class LLMMeta(ABCMeta):
     def _is_array_element() -> bool:
         return False
 
-    def __new__(mcls: type, name: str, bases: tuple[type, ...], namespace: dict[str, Any], **kwargs: Any) -> "LLMMeta":
-        cls = super().__new__(mcls, name, bases, namespace, **kwargs)
-
+    def __new__(
+        mcls: type,
+        name: str,
+        bases: tuple[type, ...],
+        namespace: dict[str, Any],
+        compact: bool | None = None,
+        short_labels: bool = False,
+        field_names: dict[str, str] | None = None,
+        **kwargs: Any,
+    ) -> "LLMMeta":
         annotations: dict[str, type] = namespace.get("__annotations__", {})
 
+        # subclasses of compact classes must be compact too, as the inherited slots take precedence over entries in `__dict__`
+        has_compact_base = any(getattr(base, "__compact__", False) for base in bases)
+        if compact is None:
+            compact = has_compact_base
+        elif not compact and has_compact_base:
+            raise TypeError(f"{name} can't be defined with `compact=False`, because it subclasses a compact class")
+
+        class_namespace = namespace
+        if compact:
+            # store fields in slots instead of a per-instance `__dict__` (defaults would conflict with the slots, but are only needed from `namespace`)
+            class_namespace = {k: v for k, v in namespace.items() if k not in annotations}
+            slots = tuple(annotations)
+            if not mcls._is_array_element() and not has_compact_base:
+                slots += ("__raw_completion__",)
+            class_namespace["__slots__"] = slots
+
+        cls = super().__new__(mcls, name, bases, class_namespace, **kwargs)
+        cls.__compact__ = compact
+
         fields: dict[str, LLMFieldInfo] = {}
 
         for field_name, field_type in annotations.items():
@@ -102,8 +147,36 @@ class LLMMeta(ABCMeta):
 
             fields[field_name] = LLMMeta._verify_and_fix_field_info(fields[field_name])
 
+        if short_labels:
+            for field, label in zip(fields.values(), LLMMeta.generate_short_labels([field.name for field in fields.values()])):
+                field.name = label
+
+        if field_names:  # displayed names taken over from another class (e.g. to keep its short labels)
+            for key, displayed_name in field_names.items():
+                fields[key].name = displayed_name
+
+        if fields:
             cls.__fields__ = fields
 
+        for field in fields.values():
+            field.owner = cls
+
+        if fields or not hasattr(cls, "__short_labels__"):
+            cls.__short_labels__ = short_labels  # otherwise the same as the inherited fields
+
+        if fields or not hasattr(cls, "__fingerprint__"):
+            cls.__fingerprint__ = LLMMeta.generate_fingerprint(fields)
+
+        if fields:
+            from .converters import compile_field_converter, compile_field_validator
+            from .serialization import compile_field_deserializer, compile_field_serializer
+
+            # type annotations are resolved once here, so converting and validating values doesn't depend on their complexity
+            cls.__field_converters__ = {key: compile_field_converter(field) for key, field in fields.items()}
+            cls.__field_validators__ = {key: compile_field_validator(name, field) for key, field in fields.items()}
+            cls.__field_serializers__ = {key: compile_field_serializer(field) for key, field in fields.items()}
+            cls.__field_deserializers__ = {key: compile_field_deserializer(field) for key, field in fields.items()}
+
         for var_name, value in namespace.items():
             if var_name.startswith("__"):
                 continue
@@ -112,9 +185,10 @@ class LLMMeta(ABCMeta):
             if var_name in (
                 "_Self",
                 "parse_response",
+                "parse_partial_response",
+                "parse_json_response",
                 "_prepare_and_validate_field",
                 "_prepare_and_validate_dict",
-                "_prepare_field_value",
                 "_set_raw_completion",
             ):
                 continue
@@ -131,10 +205,67 @@ class LLMMeta(ABCMeta):
     def generate_field_name(key: str, is_array: bool = False) -> str:
         name = key.replace("_", " ")
         if is_array:
-            if singular_name := inflect_engine.singular_noun(name):
+            if singular_name := _singular_noun(name):
                 name = singular_name
         return name.upper()
 
+    @staticmethod
+    def generate_short_labels(names: list[str]) -> list[str]:
+        """
+        Short unique labels for the displayed names of the fields of a class: the initials of their words (e.g. "DS" for
+        "DESCRIPTION SHORT"), extended by the following letters of the last word or a number if they are already taken
+        """
+
+        labels: list[str] = []
+        for name in names:
+            words = name.split()
+            initials = "".join(word[0] for word in words)
+            candidates = [initials + words[-1][1:i] for i in range(1, len(words[-1]) + 1)]
+            label = next((candidate for candidate in candidates if candidate not in labels), None)
+            number = 2
+            while label is None:
+                if (candidate := f"{initials}{number}") not in labels:
+                    label = candidate
+                number += 1
+            labels.append(label)
+        return labels
+
+    @staticmethod
+    def generate_fingerprint(fields: dict[str, LLMFieldInfo]) -> str:
+        """
+        Hash of the schema: keys, displayed names, types, field settings and instructions, and the fingerprints of nested classes.
+        Class names are not part of it, so classes with the same schema share their fingerprint
+        """
+
+        def render(instruction: Callable[[ExamplePosition], str], position: int) -> str:
+            try:
+                return instruction(ExamplePosition(position))
+            except Exception as e:  # some instructions only support the positions they are shown at
+                return f"<{type(e).__name__}>"
+
+        parts: list[Any] = []
+        for field in fields.values():
+            info = field.info
+            descriptor = field.descriptor
+
+            if isinstance(info, LLMOutputInfo):
+                settings = [info.instruction, repr(info.default), info.required, info.multiline]
+            elif isinstance(info, LLMArrayElementOutputInfo):
+                settings = [[render(info.instruction, i) for i in (1, 2, 3)], repr(info.default), info.required, info.multiline]
+            else:
+                settings = [[render(info.instruction, i) for i in (1, 2, 3)], info.min_count, info.max_count, info.multiline]
+                if info.tabular:
+                    settings.append("tabular")  # only added if set, so fingerprints of other arrays stay the same
+
+            if nested_type := descriptor.response_type or descriptor.array_element_type:
+                type_name = nested_type.__fingerprint__
+            else:
+                type_name = (descriptor.item_type if descriptor.is_array else descriptor.base_type).__name__
+
+            parts.append([field.key, field.name, type_name, descriptor.is_array, descriptor.is_optional, type(info).__name__, settings])
+
+        return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
     @staticmethod
     def generate_default_instruction(name: str, _type: type) -> str:
         if _type is bool:
@@ -143,13 +274,13 @@ class LLMMeta(ABCMeta):
 
     @staticmethod
     def generate_default_array_element_instruction(name: str) -> Callable[[ExamplePosition], str]:
-        return lambda position: f"Put the {position.ordinal} {name.lower()} here"
+        return OrdinalInstruction(name.lower())
 
     @staticmethod
     def generate_default_array_instruction(name: str) -> Callable[[ExamplePosition], str]:
-        # singular_word = inflect_engine.singular_noun(name.lower())
+        # singular_word = _singular_noun(name.lower())
         singular_word = name.lower()
-        return lambda position: f"Put the {position.ordinal} {singular_word} here"
+        return OrdinalInstruction(singular_word)
 
     # - Verification
 
@@ -157,8 +288,6 @@ class LLMMeta(ABCMeta):
     def _verify_and_fix_field_info(field: LLMFieldInfo) -> LLMFieldInfo:
         """@throws ValueError, TypeError"""
 
-        from .utils.type_checker import is_optional
-
         # TODO: check types and more
 
         if isinstance(field.info, LLMOutputInfo) or isinstance(field.info, LLMArrayElementOutputInfo):
@@ -171,12 +300,22 @@ class LLMMeta(ABCMeta):
                 if not isinstance(field.info.default, field.type_):
                     raise TypeError(f'"{field.key}" default value ({field.info.default}) must be of specified type {field.type_}')
 
-            elif is_optional(field.type_):  # optional, but no default
+            elif field.descriptor.is_optional:  # optional, but no default
                 field.info.default = None
                 field.info.required = False
                 # raise ValueError(f'"{field.key}" is optional but has no default value. Use e.g. `None` as default value')
 
-        # TODO: arrays
+        if isinstance(field.info, LLMArrayOutputInfo) and field.info.tabular:
+            element_type = field.descriptor.array_element_type
+            if element_type is None:
+                raise TypeError(f'"{field.key}" is tabular, but its items are not subclasses of `BaseLLMArrayElement`')
+            if field.info.multiline:
+                raise ValueError(f'"{field.key}" is tabular, so it can\'t be multiline')
+            for subfield in element_type.__fields__.values():
+                if subfield.descriptor.is_array or subfield.descriptor.response_type or subfield.info.multiline:
+                    raise TypeError(f'"{field.key}" is tabular, but "{subfield.key}" of {element_type.__name__} is not a single-line value')
+
+        # TODO: other checks of arrays
 
         return field
 
@@ -1,3 +1,16 @@
 from ._async.client import AsyncTypeAzureOpenAI, AsyncTypeOpenAI
 from ._sync.client import TypeAzureOpenAI, TypeOpenAI
-from .views import AzureChatModel, AzureConfig, OpenAIChatModel
+from .views import AzureChatModel, AzureConfig, OpenAIChatModel, OutputFormat, RetryStatistics, RetryStrategy
+
+__all__ = [
+    "AsyncTypeAzureOpenAI",
+    "AsyncTypeOpenAI",
+    "TypeAzureOpenAI",
+    "TypeOpenAI",
+    "AzureChatModel",
+    "AzureConfig",
+    "OpenAIChatModel",
+    "OutputFormat",
+    "RetryStatistics",
+    "RetryStrategy",
+]
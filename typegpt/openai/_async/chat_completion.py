@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TypeVar, cast, overload
+from typing import Any, TypeVar, cast, overload
 
 from openai import BadRequestError, resources
 from openai._types import NOT_GIVEN, NotGiven
@@ -10,14 +10,19 @@ from openai.types.chat import (
     ChatCompletionToolParam,
     completion_create_params,
 )
+from openai.types.chat.chat_completion import Choice
 
 from ...base import BaseLLMResponse
-from ...exceptions import LLMException, LLMParseException
+from ...exceptions import LLMException, LLMParseBudgetExceeded, LLMParseException
+from ...json_schema import response_format_for_type, tool_choice_for_type, tool_for_type
+from ...message_collection_builder import EncodedMessage
+from ...parser import ParseBudget
 from ...prompt_definition.prompt_template import PromptTemplate
+from ...repair import OutputRepair
 from ...utils.internal_types import _UseDefault, _UseDefaultType
 from ..base_chat_completion import BaseChatCompletions
 from ..exceptions import AzureContentFilterException
-from ..views import AzureChatModel, OpenAIChatModel
+from ..views import AzureChatModel, OpenAIChatModel, OutputFormat, RetryStatistics, RetryStrategy
 
 # Prompt = TypeVar("Prompt", bound=PromptTemplate)
 _Output = TypeVar("_Output", bound=BaseLLMResponse)
@@ -45,6 +50,33 @@ class AsyncTypeChatCompletion(resources.chat.AsyncCompletions, BaseChatCompletio
         user: str | NotGiven = NOT_GIVEN,
         timeout: float | None | NotGiven = NOT_GIVEN,
     ) -> str:
+        choice = await self._generate_choice(
+            model=model,
+            messages=messages,
+            frequency_penalty=frequency_penalty,
+            function_call=function_call,
+            functions=functions,
+            logit_bias=logit_bias,
+            max_tokens=max_tokens,
+            n=n,
+            presence_penalty=presence_penalty,
+            response_format=response_format,
+            seed=seed,
+            stop=stop,
+            temperature=temperature,
+            tool_choice=tool_choice,
+            tools=tools,
+            top_p=top_p,
+            user=user,
+            timeout=timeout,
+        )
+        return choice.message.content or ""
+
+    async def _generate_choice(
+        self, model: OpenAIChatModel | AzureChatModel, messages: list[ChatCompletionMessageParam], **kwargs: Any
+    ) -> Choice:
+        """Calls the chat completion API and returns the first choice (keyword arguments are passed to `create`)"""
+
         raw_model: OpenAIChatModel | str
         if isinstance(model, AzureChatModel):
             raw_model = model.deployment_id
@@ -54,32 +86,12 @@ class AsyncTypeChatCompletion(resources.chat.AsyncCompletions, BaseChatCompletio
             is_azure = False
 
         try:
-            result = await self.create(
-                model=raw_model,
-                messages=messages,
-                frequency_penalty=frequency_penalty,
-                function_call=function_call,
-                functions=functions,
-                logit_bias=logit_bias,
-                max_tokens=max_tokens,
-                n=n,
-                presence_penalty=presence_penalty,
-                response_format=response_format,
-                seed=seed,
-                stop=stop,
-                stream=False,
-                temperature=temperature,
-                tool_choice=tool_choice,
-                tools=tools,
-                top_p=top_p,
-                user=user,
-                timeout=timeout,
-            )
+            result = await self.create(model=raw_model, messages=messages, stream=False, **kwargs)
 
             if is_azure and result.choices[0].finish_reason == "content_filter":
                 raise AzureContentFilterException(reason="completion")
 
-            return result.choices[0].message.content or ""
+            return result.choices[0]
 
         except BadRequestError as e:
             if is_azure and e.code == "content_filter":
@@ -91,6 +103,40 @@ class AsyncTypeChatCompletion(resources.chat.AsyncCompletions, BaseChatCompletio
             else:
                 raise e
 
+    async def _generate_continued_completion(
+        self,
+        model: OpenAIChatModel | AzureChatModel,
+        messages: list[EncodedMessage],
+        max_continuations: int,
+        token_limit: int,
+        from_tool_call: bool = False,
+        **kwargs: Any,
+    ) -> str:
+        """
+        Generates a completion and, as long as it was cut off by the token limit, requests up to `max_continuations` continuations,
+        which are appended to the completion
+        :param from_tool_call: whether the completion is the arguments of the first tool call instead of the message content (tool calls can't be continued)
+        """
+
+        choice = await self._generate_choice(model, cast(list[ChatCompletionMessageParam], messages), **kwargs)
+        if from_tool_call:
+            return self._tool_call_arguments(choice)
+
+        completion = choice.message.content or ""
+
+        for _ in range(max_continuations):
+            if choice.finish_reason != "length":
+                break
+
+            continuation_messages = messages + self._continuation_messages(completion)
+            if self.num_tokens_from_messages(continuation_messages, model=self._token_counting_model(model)) > token_limit:
+                break
+
+            choice = await self._generate_choice(model, cast(list[ChatCompletionMessageParam], continuation_messages), **kwargs)
+            completion += choice.message.content or ""
+
+        return completion
+
     @overload
     async def generate_output(
         self,
@@ -107,6 +153,12 @@ class AsyncTypeChatCompletion(resources.chat.AsyncCompletions, BaseChatCompletio
         top_p: float | NotGiven = NOT_GIVEN,
         timeout: float | None | NotGiven = NOT_GIVEN,
         retry_on_parse_error: int = 0,
+        retry_strategy: RetryStrategy = "regenerate",
+        retry_statistics: RetryStatistics | None = None,
+        max_continuations: int = 0,
+        use_stop_sequences: bool = True,
+        parse_budget: ParseBudget | None = None,
+        output_format: OutputFormat = "text",
     ) -> _Output: ...
 
     @overload
@@ -125,6 +177,12 @@ class AsyncTypeChatCompletion(resources.chat.AsyncCompletions, BaseChatCompletio
         top_p: float | NotGiven = NOT_GIVEN,
         timeout: float | None | NotGiven = NOT_GIVEN,
         retry_on_parse_error: int = 0,
+        retry_strategy: RetryStrategy = "regenerate",
+        retry_statistics: RetryStatistics | None = None,
+        max_continuations: int = 0,
+        use_stop_sequences: bool = True,
+        parse_budget: ParseBudget | None = None,
+        output_format: OutputFormat = "text",
     ) -> BaseLLMResponse: ...
 
     async def generate_output(
@@ -142,6 +200,12 @@ class AsyncTypeChatCompletion(resources.chat.AsyncCompletions, BaseChatCompletio
         top_p: float | NotGiven = NOT_GIVEN,
         timeout: float | None | NotGiven = NOT_GIVEN,
         retry_on_parse_error: int = 0,
+        retry_strategy: RetryStrategy = "regenerate",
+        retry_statistics: RetryStatistics | None = None,
+        max_continuations: int = 0,
+        use_stop_sequences: bool = True,
+        parse_budget: ParseBudget | None = None,
+        output_format: OutputFormat = "text",
     ) -> _Output | BaseLLMResponse:
         """
         Calls OpenAI Chat API, generates assistant response, and fits it into the output class
@@ -153,62 +217,100 @@ class AsyncTypeChatCompletion(resources.chat.AsyncCompletions, BaseChatCompletio
         :param max_input_tokens: maximum number of tokens to use from the prompt. If not specified, the maximum number of tokens is calculated automatically
         :param request_timeout: timeout for the request in seconds
         :param retry_on_parse_error: number of retries if the response cannot be parsed (i.e. any `LLMParseException`). If set to 0, it has no effect.
+        :param retry_strategy: how to retry: "regenerate" sends the same messages again, "feedback" additionally sends the failed completion and the parse error to the model, "repair" keeps the valid fields and only requests the missing or invalid ones
+        :param retry_statistics: optional statistics object that records the parse outcome of every attempt
+        :param max_continuations: maximum number of continuation requests if a completion is cut off because it reached `max_output_tokens`. The pieces are joined before parsing. If set to 0, it has no effect. JSON output formats are never continued.
+        :param use_stop_sequences: whether to stop generating at the closing delimiter of the output schema (only applied if no field is multiline)
+        :param parse_budget: optional limits for the length of a completion and its parse time. Exceeding them raises `LLMParseBudgetExceeded`, which is retried like any other parse error
+        :param output_format: "text" for the labeled format described in the system prompt, or "json_schema" to send the JSON schema of the output class as `response_format` (structured outputs, requires a model that supports it), or "tool_call" to declare the output class as a single tool that the model is forced to call (function calling, for models without structured outputs). The JSON is decoded once and mapped into the output object, and no format instructions are added to the prompt. The "repair" retry strategy falls back to "regenerate" for JSON, and JSON completions are never continued
         :param config: additional OpenAI/Azure config if needed (e.g. no global api key)
         """
 
-        if isinstance(model, AzureChatModel):
-            model_type = model.base_model
-        else:
-            model_type = model
+        model_type = self._token_counting_model(model)
 
         max_prompt_length = self.max_tokens_of_model(model_type) - max_output_tokens
 
         if max_input_tokens:
             max_prompt_length = min(max_prompt_length, max_input_tokens)
 
+        is_json = output_format != "text"
+        is_tool_call = output_format == "tool_call"
         messages = prompt.generate_messages(
-            token_limit=max_prompt_length, token_counter=lambda messages: self.num_tokens_from_messages(messages, model=model_type)
+            token_limit=max_prompt_length,
+            token_counter=lambda messages: self.num_tokens_from_messages(messages, model=model_type),
+            json_output=is_json,
         )
 
-        completion = await self.generate_completion(
-            model=model,
-            messages=cast(list[ChatCompletionMessageParam], messages),
-            max_tokens=max_output_tokens,
-            frequency_penalty=frequency_penalty,
-            n=n,
-            presence_penalty=presence_penalty,
-            temperature=temperature,
-            seed=seed,
-            top_p=top_p,
-            timeout=timeout,
-        )
+        output_class = prompt.Output if isinstance(output_type, _UseDefaultType) else output_type
+        stop = self._schema_stop_sequences(prompt, model_type) if use_stop_sequences and not is_json else NOT_GIVEN
+        response_format = response_format_for_type(output_class) if output_format == "json_schema" else NOT_GIVEN
+        tools = [tool_for_type(output_class)] if is_tool_call else NOT_GIVEN
+        tool_choice = tool_choice_for_type(output_class) if is_tool_call else NOT_GIVEN
 
-        try:
-            if isinstance(output_type, _UseDefaultType):
-                return prompt.Output.parse_response(completion)
-            else:
-                return output_type.parse_response(completion)
-        except LLMParseException as e:
-            if retry_on_parse_error > 0:
-                return await self.generate_output(
-                    model=model,
-                    prompt=prompt,
-                    max_output_tokens=max_output_tokens,
-                    output_type=output_type,
-                    max_input_tokens=max_input_tokens,
-                    frequency_penalty=frequency_penalty,
-                    n=n,
-                    presence_penalty=presence_penalty,
-                    temperature=temperature,
-                    seed=seed,
-                    top_p=top_p,
-                    timeout=timeout,
-                    retry_on_parse_error=retry_on_parse_error - 1,
-                )
-            else:
+        request_messages = messages
+        repair: OutputRepair | None = None
+        attempt = 0
+
+        while True:
+            completion = await self._generate_continued_completion(
+                model=model,
+                messages=request_messages,
+                max_continuations=0 if is_json else max_continuations,  # a continuation can't extend a strict JSON object
+                token_limit=max_prompt_length,
+                from_tool_call=is_tool_call,
+                max_tokens=max_output_tokens,
+                frequency_penalty=frequency_penalty,
+                n=n,
+                presence_penalty=presence_penalty,
+                stop=stop,
+                response_format=response_format,
+                tools=tools,
+                tool_choice=tool_choice,
+                temperature=temperature,
+                seed=seed,
+                top_p=top_p,
+                timeout=timeout,
+            )
+
+            try:
+                if repair is not None:
+                    output = repair.merge(completion)
+                elif is_json:
+                    output = output_class.parse_json_response(completion, parse_budget)
+                else:
+                    output = output_class.parse_response(completion, parse_budget)
+            except LLMParseException as e:
+                if retry_statistics is not None:
+                    retry_statistics.record(attempt, success=False)
+
+                if attempt >= retry_on_parse_error:
+                    self._inject_exception_details(e, messages, completion)
+                    raise e
+
+                attempt += 1
+
+                if retry_strategy == "feedback":
+                    request_messages = messages + self._parse_error_feedback_messages(completion, e)
+                elif retry_strategy == "repair" and not is_json and not isinstance(e, LLMParseBudgetExceeded):
+                    if repair is None:  # otherwise the repair request itself failed and is sent again
+                        repair = self._create_repair(output_class, completion, parse_budget)
+                    if repair is not None and repair.is_possible:
+                        request_messages = messages + repair.messages()
+                    else:
+                        repair = None
+
+                if request_messages is not messages:
+                    if self.num_tokens_from_messages(request_messages, model=model_type) > max_prompt_length:
+                        request_messages = messages  # follow-up doesn't fit, so fall back to regenerating
+                        repair = None
+
+                continue
+
+            except LLMException as e:
                 self._inject_exception_details(e, messages, completion)
                 raise e
 
-        except LLMException as e:
-            self._inject_exception_details(e, messages, completion)
-            raise e
+            if retry_statistics is not None:
+                retry_statistics.record(attempt, success=True)
+
+            return output
@@ -1,9 +1,15 @@
-import tiktoken
+from openai._types import NOT_GIVEN, NotGiven
+from openai.types.chat.chat_completion import Choice
 
-from typegpt.exceptions import LLMException
+from typegpt.exceptions import LLMException, LLMParseException
 
+from ..base import BaseLLMResponse
 from ..message_collection_builder import EncodedMessage
-from .views import OpenAIChatModel
+from ..parser import ParseBudget
+from ..prompt_builder import OutputPromptFactory
+from ..prompt_definition.prompt_template import PromptTemplate
+from ..repair import OutputRepair
+from .views import AzureChatModel, OpenAIChatModel
 
 
 class BaseChatCompletions:
@@ -38,6 +44,12 @@ class BaseChatCompletions:
             ):
                 return 128_000
 
+    @staticmethod
+    def _token_counting_model(model: OpenAIChatModel | AzureChatModel) -> OpenAIChatModel:
+        if isinstance(model, AzureChatModel):
+            return model.base_model
+        return model
+
     # copied from OpenAI: https://github.com/openai/openai-cookbook/blob/main/examples/How_to_count_tokens_with_tiktoken.ipynb
     @classmethod
     def num_tokens_from_messages(cls, messages: list[EncodedMessage], model: OpenAIChatModel | None = None) -> int:
@@ -45,6 +57,8 @@ class BaseChatCompletions:
         if model is None:
             model = "gpt-3.5-turbo-0613"  # default model
 
+        import tiktoken  # imported on first use to keep the import of the package fast
+
         try:
             encoding = tiktoken.encoding_for_model(model)
         except KeyError:
@@ -103,6 +117,19 @@ class BaseChatCompletions:
         num_tokens += 3  # every reply is primed with <|start|>assistant<|message|>
         return num_tokens
 
+    # - Stop Sequences
+
+    @staticmethod
+    def _schema_stop_sequences(prompt: PromptTemplate, model: OpenAIChatModel) -> list[str] | NotGiven:
+        """Stop sequences derived from the output schema of the prompt, if they are safe to use"""
+
+        if prompt.settings.disable_formatting_instructions:
+            return NOT_GIVEN  # no delimiters are shown to the model
+        if model.startswith("o1"):
+            return NOT_GIVEN  # reasoning models don't support stop sequences
+
+        return OutputPromptFactory.for_type(prompt.Output).stop_sequences() or NOT_GIVEN
+
     # - Exception Handling
 
     def _inject_exception_details(self, e: LLMException, messages: list[EncodedMessage], raw_completion: str):
@@ -112,3 +139,42 @@ class BaseChatCompletions:
         e.system_prompt = system_prompt
         e.user_prompt = user_prompt
         e.raw_completion = raw_completion
+
+    # - Retrying
+
+    @staticmethod
+    def _parse_error_feedback_messages(completion: str, e: LLMParseException) -> list[EncodedMessage]:
+        """Messages appended to the original conversation to ask the model to correct a completion that failed to parse"""
+        if e.field_name:
+            feedback = f'Your answer could not be parsed because of the field "{e.field_name}": {e}'
+        else:
+            feedback = f"Your answer could not be parsed: {e}"
+
+        feedback += "\nReturn the complete answer again in the required format and fix this error."
+
+        return [
+            {"role": "assistant", "content": completion},
+            {"role": "user", "content": feedback},
+        ]
+
+    @staticmethod
+    def _create_repair(output_type: type[BaseLLMResponse], completion: str, budget: ParseBudget | None) -> OutputRepair | None:
+        """Repair of a failed completion, or `None` if it can't even be parsed partially (e.g. within the budget), so it is regenerated"""
+        try:
+            return OutputRepair(output_type, completion, budget)
+        except LLMParseException:
+            return None
+
+    @staticmethod
+    def _tool_call_arguments(choice: Choice) -> str:
+        """Arguments of the first tool call of a choice, which are empty (and fail to parse) if the model didn't call a tool"""
+        tool_calls = choice.message.tool_calls
+        return tool_calls[0].function.arguments if tool_calls else ""
+
+    @staticmethod
+    def _continuation_messages(completion: str) -> list[EncodedMessage]:
+        """Messages appended to the original conversation to request the rest of a completion that was cut off"""
+        return [
+            {"role": "assistant", "content": completion},
+            {"role": "user", "content": "Your answer was cut off. Continue exactly where it ends, without repeating any of it."},
+        ]
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Literal, TypedDict
 
 OpenAIChatModel = Literal[
@@ -48,4 +48,51 @@ class AzureConfig:
     api_type: str = "azure"
 
 
+RetryStrategy = Literal[
+    "regenerate",  # sends the same messages again
+    "feedback",  # appends the failed completion and the parse error, so the model can correct itself
+    "repair",  # keeps the valid fields and only requests the missing or invalid fields in a follow-up request
+]
+
+OutputFormat = Literal[
+    "text",  # labeled text described by format instructions in the system prompt
+    "json_schema",  # JSON enforced by the JSON schema of the output class (structured outputs)
+    "tool_call",  # JSON arguments of a forced call of a tool whose parameters are the output class (function calling)
+]
+
+
+@dataclass
+class RetryStatistics:
+    """
+    Parse outcomes per attempt, where attempt 0 is the initial request and every following index is a retry.
+    Pass the same instance to multiple `generate_output` calls to compare retry strategies.
+    """
+
+    attempts: list[int] = field(default_factory=list)
+    successes: list[int] = field(default_factory=list)
+
+    def record(self, attempt: int, success: bool):
+        while len(self.attempts) <= attempt:
+            self.attempts.append(0)
+            self.successes.append(0)
+
+        self.attempts[attempt] += 1
+        if success:
+            self.successes[attempt] += 1
+
+    def success_rate(self, attempt: int) -> float:
+        """Share of parsable completions at the given attempt"""
+        if attempt >= len(self.attempts) or self.attempts[attempt] == 0:
+            return 0.0
+        return self.successes[attempt] / self.attempts[attempt]
+
+    @property
+    def fix_rate(self) -> float:
+        """Share of retries that produced a parsable completion"""
+        num_retries = sum(self.attempts[1:])
+        if num_retries == 0:
+            return 0.0
+        return sum(self.successes[1:]) / num_retries
+
+
 EncodedFunction = dict[str, "EncodedFunction | str | list[str] | list[EncodedFunction] | list[str] | None"]
@@ -1,44 +1,156 @@
 from __future__ import annotations
 
 import re
-from typing import TYPE_CHECKING, Generic, TypeVar
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Generic, Iterator, TypeVar
 
-from .exceptions import LLMOutputFieldMissing, LLMOutputFieldWrongType
+from .exceptions import LLMOutputFieldMissing, LLMOutputFieldWrongType, LLMParseBudgetExceeded, LLMParseException
 from .fields import LLMArrayOutputInfo, LLMFieldInfo, LLMOutputInfo, LLMArrayElementOutputInfo
-from .utils.utils import symmetric_strip
+from .utils.internal_types import _NoDefault
+from .utils.utils import is_table_separator_row, split_table_row, symmetric_strip
 
 _Output = TypeVar("_Output", bound="BaseLLMResponse | BaseLLMArrayElement")
 
 
+@dataclass(frozen=True)
+class ParseBudget:
+    """
+    Limits for parsing a single completion, so huge or adversarial completions can't block a worker for long
+
+    Args:
+        max_length: maximum number of characters of the completion. Longer completions are rejected before parsing
+        timeout: maximum parse time in seconds. It's checked between fields and array items, so a single field can still
+            exceed it. Its duration grows with the length of the completion, which is why both limits should be set together
+    """
+
+    max_length: int | None = None
+    timeout: float | None = None
+
+
+_clock: Callable[[], float] = time.monotonic  # clock of the parse budget, looked up on every use so tests can replace it
+
+
+class _Deadline:
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.end = _clock() + timeout
+
+    def check(self):
+        """@throws LLMParseBudgetExceeded"""
+        if _clock() > self.end:
+            raise LLMParseBudgetExceeded(f"Parsing exceeded the time budget of {self.timeout} seconds")
+
+
+def _start_budget(response: str, budget: ParseBudget | None) -> _Deadline | None:
+    """@throws LLMParseBudgetExceeded if the response is too long"""
+
+    if budget is None:
+        return None
+    if budget.max_length is not None and len(response) > budget.max_length:
+        raise LLMParseBudgetExceeded(f"Completion has {len(response)} characters, but at most {budget.max_length} are parsed")
+    return _Deadline(budget.timeout) if budget.timeout is not None else None
+
+
+@dataclass(frozen=True)
+class _FieldSyntax:
+    """
+    How a field appears in a completion, derived once per field
+
+    Args:
+        label: matched right after the displayed name, up to the colon (e.g. " 2 TITLE:" after "ITEM")
+        content_on_next_line: whether the content of a single value may start on the line after an empty label
+        stops_at_newline: whether the content ends at the end of the line
+        stops_before_own_name: whether the content ends before the next line that starts with the name of the field itself (arrays and nested objects)
+    """
+
+    label: re.Pattern[str]
+    content_on_next_line: bool
+    stops_at_newline: bool
+    stops_before_own_name: bool
+
+
+class _LabelIndex:
+    """Line starts at which displayed names of fields begin, found in a single pass over the response"""
+
+    def __init__(
+        self, response: str, names_by_length: list[tuple[int, frozenset[str]]], labels: dict[str, re.Pattern[str]] | None = None
+    ):
+        """:param labels: if given, a name only counts where it's followed by the label of its field"""
+
+        self.starts: dict[str, list[int]] = {}  # line starts by name
+        self.positions: list[int] = []  # sorted line starts at which any name begins
+        self.names: list[list[str]] = []  # names that begin at each of these line starts
+
+        position = 0
+        while True:
+            names = [
+                candidate
+                for length, candidates in names_by_length
+                if (candidate := response[position : position + length]) in candidates
+                and (labels is None or labels[candidate].match(response, position + length))
+            ]
+            if names:
+                self.positions.append(position)
+                self.names.append(names)
+                for name in names:
+                    self.starts.setdefault(name, []).append(position)
+
+            newline = response.find("\n", position)
+            if newline == -1:
+                break
+            position = newline + 1
+
+
 class Parser(Generic[_Output]):
+    """
+    Finds the fields by their displayed names at the beginning of lines. The content of a field ends at the next line that
+    starts with the name of another field (or at the end of the line for single-line values). All names are indexed in a single
+    pass, so parsing scales linearly with the number of fields instead of comparing every position against every other field
+    """
+
     def __init__(self, output_type: type[_Output]):
         self.output_type = output_type
         self.fields = self.output_type.__fields__.values()
+        self._syntaxes: dict[str, _FieldSyntax] = {}
 
-    def _regex_for_field(self, field: LLMFieldInfo) -> str:
-        from .utils.type_checker import if_response_type, is_response_type, is_array_element_list_type, if_array_element_list_type
-
-        other_fields = [f for f in self.fields if f.key != field.key]
-        other_field_names = ["^" + f.name for f in other_fields]
+        names = [field.name for field in self.fields]
+        self._shared_names = {name for name in names if names.count(name) > 1} if len(set(names)) < len(names) else set()
+        lengths = sorted({len(name) for name in names})
+        self._names_by_length = [(length, frozenset(name for name in names if len(name) == length)) for length in lengths]
 
-        excluded_lookahead = other_field_names
+        # short labels (e.g. "T") are often the beginning of ordinary lines, so only complete labels end the content of a field
+        self._labels: dict[str, re.Pattern[str]] | None = None
+        if output_type.__short_labels__:
+            self._labels = {field.name: self._syntax_for_field(field).label for field in self.fields}
 
-        if not field.info.multiline and not is_response_type(field.type_) and not is_array_element_list_type(field.type_):
-            excluded_lookahead.append("\n")
+    @classmethod
+    def for_type(cls, output_type: type[_Output]) -> Parser[_Output]:
+        """Returns the shared parser of the output type, which derives the syntax of each field only once"""
+        parser = output_type.__dict__.get("__parser__")  # not inherited from parent classes
+        if parser is None:
+            parser = cls(output_type)
+            output_type.__parser__ = parser
+        return parser
 
-        # also add current field if it's an array
-        if isinstance(field.info, LLMArrayOutputInfo) or is_response_type(field.type_):
-            excluded_lookahead.append("\n" + field.name)
+    def _syntax_for_field(self, field: LLMFieldInfo) -> _FieldSyntax:
+        syntax = self._syntaxes.get(field.key)
+        if syntax is None:
+            syntax = self._syntaxes[field.key] = self._derive_syntax(field)
+        return syntax
 
-        exclusion_cases_regex = "|".join(excluded_lookahead)
-        if exclusion_cases_regex:
-            exclusion_cases_regex = f"(?!{exclusion_cases_regex})"
+    def _derive_syntax(self, field: LLMFieldInfo) -> _FieldSyntax:
+        descriptor = field.descriptor
+        is_nested = bool(descriptor.response_type or descriptor.array_element_type)
+        subfield_regex = r"(?P<subfield_name>(?:(?!:|\n)[\S ])+):"
 
         if isinstance(field.info, LLMOutputInfo) or isinstance(field.info, LLMArrayElementOutputInfo):
-            if field_type := if_response_type(field.type_):
-                return rf"(?:^|\n){field.name} (?P<subfield_name>((?!:|\n)[\S ])+): ?(?P<content>({exclusion_cases_regex}[\s\S])+)"
+            if descriptor.response_type:
+                label = " " + subfield_regex
             else:
-                return rf"(?:^|\n){field.name}: *\n?(?P<content>({exclusion_cases_regex}[\s\S])+)"
+                label = ":"
 
         elif isinstance(field.info, LLMArrayOutputInfo):
             if max_count := field.info.max_count:
@@ -47,78 +159,303 @@ class Parser(Generic[_Output]):
             else:
                 count_regex = "\\d{1,3}"
 
-            if field_type := if_array_element_list_type(field.type_):
-                return rf"(?:^|\n){field.name} (?P<i>{count_regex}) (?P<subfield_name>((?!:|\n)[\S ])+): ?(?P<content>({exclusion_cases_regex}[\s\S])+)"
+            if field.info.tabular:
+                label = ":"  # followed by the header and the rows
+            elif descriptor.array_element_type:
+                label = f" (?P<i>{count_regex}) " + subfield_regex
+            else:
+                label = f" {count_regex}:"
+
+        else:
+            raise ValueError(f"Invalid field info type: {field.info}")
+
+        return _FieldSyntax(
+            label=re.compile(label),
+            content_on_next_line=label == ":",
+            stops_at_newline=not field.info.multiline and not is_nested,
+            stops_before_own_name=(isinstance(field.info, LLMArrayOutputInfo) and not field.info.tabular) or bool(descriptor.response_type),
+        )
+
+    def _preprocess_response(self, response: str) -> str:
+        return symmetric_strip(response.strip(), ["'", '"', "`"])
+
+    def _index_labels(self, response: str) -> _LabelIndex:
+        return _LabelIndex(response, self._names_by_length, self._labels)
+
+    @staticmethod
+    def _content_starts(response: str, label_end: int, syntax: _FieldSyntax) -> Iterator[int]:
+        """Possible starts of the content in order of preference (i.e. the label is followed by `: *\\n?` or `: ?`)"""
+
+        if syntax.content_on_next_line:
+            position = label_end
+            while response.startswith(" ", position):
+                position += 1
+            if response.startswith("\n", position):
+                yield position + 1
+            yield from range(position, label_end - 1, -1)
+        else:
+            if response.startswith(" ", label_end):
+                yield label_end + 1
+            yield label_end
+
+    def _content_end(self, field: LLMFieldInfo, syntax: _FieldSyntax, response: str, labels: _LabelIndex, start: int) -> int:
+        """End of the content that starts at `start` (equal to `start` if the content would be empty)"""
+
+        end = len(response)
+        if syntax.stops_at_newline:
+            newline = response.find("\n", start)
+            if newline != -1:
+                end = newline
+
+        i = bisect_left(labels.positions, start)
+        while i < len(labels.positions) and labels.positions[i] <= end:
+            position = labels.positions[i]
+            names = labels.names[i]
+            if syntax.stops_before_own_name and field.name in names and position - 1 >= start:
+                return position - 1  # the content ends before the line break
+            if any(name != field.name or name in self._shared_names for name in names):
+                return position
+            i += 1
+
+        return end
+
+    def _find_all(self, field: LLMFieldInfo, response: str, labels: _LabelIndex) -> Iterator[tuple[re.Match[str], str]]:
+        """Yields the label and the raw content of every occurrence of the field that has content, in order"""
+
+        syntax = self._syntax_for_field(field)
+        name_length = len(field.name)
+        previous_end = 0
+
+        for position in labels.starts.get(field.name, ()):
+            if position < previous_end:
+                continue
+            label = syntax.label.match(response, position + name_length)
+            if not label:
+                continue
+
+            for start in self._content_starts(response, label.end(), syntax):
+                end = self._content_end(field, syntax, response, labels, start)
+                if end > start:
+                    yield label, response[start:end]
+                    previous_end = end
+                    break
+
+    def _extract_field_value(self, field: LLMFieldInfo, response: str, labels: _LabelIndex, deadline: _Deadline | None = None) -> Any:
+        """
+        Extracts the unvalidated value of a single field from the preprocessed response
+        @returns: the value, or `_NoDefault` if the field is not present and not required
+        @throws LLMParseException
+        """
+
+        if deadline:
+            deadline.check()
+
+        if isinstance(field.info, LLMOutputInfo) or isinstance(field.info, LLMArrayElementOutputInfo):
+            if field_type := field.descriptor.response_type:
+                inner_lines: list[str] = []
+                for label, content in self._find_all(field, response, labels):
+                    if deadline:
+                        deadline.check()
+                    inner_lines.append(f"{label.group('subfield_name')}: {content}")
+                inner_response = "\n".join(inner_lines)
+
+                if field.info.required:
+                    with _prefixed_field_name(field.name):
+                        return Parser.for_type(field_type)._parse(inner_response, deadline)
+                else:
+                    try:
+                        return Parser.for_type(field_type)._parse(inner_response, deadline)
+                    except LLMParseBudgetExceeded:
+                        raise
+                    except:
+                        return _NoDefault
+
+            else:
+                match = next(self._find_all(field, response, labels), None)
+                if match:
+                    return symmetric_strip(match[1].strip(), ["'", '"', "`"]).strip()
+                elif field.info.required:
+                    raise LLMOutputFieldMissing(f'Field "{field.name}" is missing in {self.output_type.__name__}', field_name=field.name)
+                else:
+                    return _NoDefault
+
+        elif isinstance(field.info, LLMArrayOutputInfo):
+            if field.info.tabular:
+                match = next(self._find_all(field, response, labels), None)
+                return self._parse_table(field, match[1] if match else "", deadline)
+
+            elif field_type := field.descriptor.array_element_type:
+                inner_responses: dict[int, str] = {}
+                for label, content in self._find_all(field, response, labels):
+                    if deadline:
+                        deadline.check()
+                    i = int(label.group("i"))
+                    if not i in inner_responses:
+                        inner_responses[i] = ""
+                    inner_responses[i] += "\n" + label.group("subfield_name") + ": " + content
+
+                # sort by index
+                inner_responses = dict(sorted(inner_responses.items(), key=lambda x: x[0]))
+
+                array_items: list[BaseLLMArrayElement] = []
+                for i, inner_response in inner_responses.items():
+                    with _prefixed_field_name(f"{field.name} {i}"):
+                        item = Parser.for_type(field_type)._parse(inner_response, deadline)
+                    array_items.append(item)
+
+                return array_items
+
             else:
-                return rf"(?:^|\n){field.name} {count_regex}: ?(?P<content>({exclusion_cases_regex}[\s\S])+)"
+                items: list[str] = [content.strip() for _, content in self._find_all(field, response, labels)]
+                items = [symmetric_strip(item, ["'", '"', "`"]).strip() for item in items]
+                items = [i for i in items if i]
+                return items
 
         else:
             raise ValueError(f"Invalid field info type: {field.info}")
 
-    def parse(self, response: str) -> _Output:
-        from .utils.type_checker import if_response_type, if_array_element_list_type
+    def _parse_table(self, field: LLMFieldInfo, content: str, deadline: _Deadline | None) -> list[BaseLLMArrayElement]:
+        """
+        Parses the rows of a tabular array in a single pass. The first line is the header if it only contains column names,
+        otherwise the columns are in the order of the fields. Markdown-style rows with outer pipes and separator rows are accepted
+        @throws LLMParseException
+        """
+
+        element_parser = Parser.for_type(field.descriptor.array_element_type)
+        columns = list(element_parser.fields)
+        rows = [split_table_row(line) for line in content.splitlines() if line.strip() and not is_table_separator_row(line)]
+
+        columns_by_name = {column.name: column for column in columns}
+        if rows and all(cell in columns_by_name for cell in rows[0]):
+            columns = [columns_by_name[cell] for cell in rows.pop(0)]
+
+        elements: list[BaseLLMArrayElement] = []
+        for i, row in enumerate(rows, start=1):
+            if deadline:
+                deadline.check()
+            with _prefixed_field_name(f"{field.name} {i}"):
+                elements.append(element_parser._parse_row(columns, row))
+        return elements
+
+    def _parse_row(self, columns: list[LLMFieldInfo], cells: list[str]) -> _Output:
+        """@throws LLMParseException"""
+
+        if len(cells) > len(columns):
+            raise LLMOutputFieldWrongType(f"Row has {len(cells)} values, but the table only has {len(columns)} columns")
+
+        field_values: dict[str, str] = {}
+        for column, cell in zip(columns, cells):  # missing cells at the end are empty
+            if value := symmetric_strip(cell, ["'", '"', "`"]).strip():
+                field_values[column.key] = value
+
+        for field in self.fields:
+            if field.key not in field_values and field.info.required:
+                raise LLMOutputFieldMissing(f'Field "{field.name}" is missing in {self.output_type.__name__}', field_name=field.name)
+
+        return self.output_type._construct(field_values)
+
+    def parse(self, response: str, budget: ParseBudget | None = None) -> _Output:
+        """@throws LLMParseException (`LLMParseBudgetExceeded` if the budget is exceeded)"""
+        return self._parse(response, _start_budget(response, budget))
 
+    def _parse(self, response: str, deadline: _Deadline | None) -> _Output:
         field_values: dict[str, str | list[str] | BaseLLMResponse | list[BaseLLMArrayElement]] = {}
 
         # preprocess full response
         raw_response = response
-        response = symmetric_strip(response.strip(), ["'", '"', "`"])
+        response = self._preprocess_response(response)
 
+        labels = self._index_labels(response)
         for field in self.fields:
-            pattern = self._regex_for_field(field)
+            value = self._extract_field_value(field, response, labels, deadline)
+            if value is not _NoDefault:
+                field_values[field.key] = value
 
-            if isinstance(field.info, LLMOutputInfo) or isinstance(field.info, LLMArrayElementOutputInfo):
-                if field_type := if_response_type(field.type_):
-                    matches = re.finditer(pattern, response, re.MULTILINE)
-                    inner_response = "\n".join(f"{m.group('subfield_name')}: {m.group('content')}" for m in matches)
+        output = self.output_type._construct(field_values)
+        output._set_raw_completion(raw_response)
+        return output
 
-                    if field.info.required:
-                        field_values[field.key] = field_type.parse_response(inner_response)
-                    else:
-                        try:
-                            field_values[field.key] = field_type.parse_response(inner_response)
-                        except:
-                            pass
+    def parse_partial(self, response: str, budget: ParseBudget | None = None) -> PartialParseResult[_Output]:
+        """
+        Parses and validates every field on its own without raising, so a single invalid field doesn't discard all others
+        @throws LLMParseBudgetExceeded if the budget is exceeded (as the remaining fields can't be parsed either)
+        """
 
-                else:
-                    match = re.search(pattern, response, re.MULTILINE)
-                    if match:
-                        field_values[field.key] = symmetric_strip(match.group("content").strip(), ["'", '"', "`"]).strip()
-                    else:
-                        if field.info.required:
-                            raise LLMOutputFieldMissing(f'Field "{field.name}" is missing in {self.output_type.__name__}')
-
-            elif isinstance(field.info, LLMArrayOutputInfo):
-                if field_type := if_array_element_list_type(field.type_):
-                    matches = re.finditer(pattern, response, re.MULTILINE)
-                    inner_responses: dict[int, str] = {}
-                    for m in matches:
-                        i = int(m.group("i"))
-                        if not i in inner_responses:
-                            inner_responses[i] = ""
-                        inner_responses[i] += "\n" + m.group("subfield_name") + ": " + m.group("content")
-
-                    # sort by index
-                    inner_responses = dict(sorted(inner_responses.items(), key=lambda x: x[0]))
-
-                    array_items: list[BaseLLMArrayElement] = []
-                    for i, inner_response in inner_responses.items():
-                        item = field_type.parse_response(inner_response)
-                        array_items.append(item)
-
-                    field_values[field.key] = array_items
+        deadline = _start_budget(response, budget)
+        field_values: dict[str, Any] = {}
+        errors: list[FieldParseError] = []
 
-                else:
-                    matches = re.finditer(pattern, response, re.MULTILINE)
-                    items: list[str] = [m.group("content").strip() for m in matches]
-                    items = [symmetric_strip(item, ["'", '"', "`"]).strip() for item in items]
-                    items = [i for i in items if i]
-                    field_values[field.key] = items
+        raw_response = response
+        response = self._preprocess_response(response)
+        labels = self._index_labels(response)
 
-        output = self.output_type(**field_values)
-        output._set_raw_completion(raw_response)
+        for field in self.fields:
+            try:
+                value = self._extract_field_value(field, response, labels, deadline)
+                if value is not _NoDefault:
+                    field_values[field.key] = self.output_type._prepare_and_validate_field(field.key, value)
+            except LLMParseBudgetExceeded as e:
+                e.raw_completion = raw_response
+                raise e
+            except LLMParseException as e:
+                e.raw_completion = raw_response
+                errors.append(FieldParseError(key=field.key, name=e.field_name or field.name, exception=e))
+
+        return PartialParseResult(output_type=self.output_type, values=field_values, errors=errors, raw_completion=raw_response)
+
+
+@dataclass
+class FieldParseError:
+    key: str
+    name: str  # displayed name, including the path to nested fields (e.g. "ITEM 2 TITLE")
+    exception: LLMParseException
+
+    @property
+    def message(self) -> str:
+        return str(self.exception)
+
+
+@dataclass
+class PartialParseResult(Generic[_Output]):
+    """
+    Result of a best-effort parse
+
+    Args:
+        values: parsed and validated values by field key. Fields that are not present in the completion are omitted
+        errors: one error for every field that is missing or invalid
+    """
+
+    output_type: type[_Output]
+    values: dict[str, Any]
+    errors: list[FieldParseError]
+    raw_completion: str
+
+    @property
+    def is_complete(self) -> bool:
+        return not self.errors
+
+    def to_output(self) -> _Output:
+        """
+        Creates the output object (with defaults for omitted fields)
+        @throws LLMParseException of the first invalid field
+        """
+        if self.errors:
+            raise self.errors[0].exception
+
+        output = self.output_type._construct(self.values)
+        output._set_raw_completion(self.raw_completion)
         return output
 
 
+@contextmanager
+def _prefixed_field_name(prefix: str) -> Iterator[None]:
+    """Prefixes the field name of parse errors raised inside nested outputs, so they refer to the full displayed name"""
+    try:
+        yield
+    except LLMParseException as e:
+        e.field_name = f"{prefix} {e.field_name}" if e.field_name else prefix
+        raise e
+
+
 if TYPE_CHECKING:
     from .base import BaseLLMResponse, BaseLLMArrayElement
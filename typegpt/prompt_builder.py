@@ -1,20 +1,41 @@
-from typegpt.utils.utils import limit_newlines
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Callable
+
+from typegpt.utils.utils import TABLE_DELIMITER, limit_newlines
 from .example_formatter import LimitedExampleListFormatter
 from .fields import ExamplePosition, LLMArrayElementOutputInfo, LLMArrayOutputInfo, LLMFieldInfo, LLMOutputInfo
-from .utils.type_checker import if_array_element_list_type, if_response_type
+
+if TYPE_CHECKING:
+    from .base import BaseLLMResponse
 
 
 class OutputPromptFactory:
+    DELIMITER = '"""'
+
     def __init__(self, fields: list[LLMFieldInfo], threaten: bool = False, name_prefixes: list[str] = []):
         self.fields = fields
         self.threaten = threaten
         self.name_prefixes = name_prefixes
+        self._prompt: str | None = None
+
+    @classmethod
+    def for_type(cls, output_type: type[BaseLLMResponse]) -> OutputPromptFactory:
+        """Returns the shared factory of the output type, which renders the schema only once"""
+        factory = output_type.__dict__.get("__prompt_factory__")  # not inherited from parent classes
+        if factory is None:
+            factory = cls(list(output_type.__fields__.values()))
+            output_type.__prompt_factory__ = factory
+        return factory
 
     def _generate_array(self, field: LLMFieldInfo, info: LLMArrayOutputInfo) -> str:
         is_unlimited = info.max_count is None
         max_count = info.max_count or 2
 
-        if element_type := if_array_element_list_type(field.type_):
+        if info.tabular:
+            return self._generate_table(field, info, max_count)
+
+        if element_type := field.descriptor.array_element_type:
             subfields = list(element_type.__fields__.values())
             # subprompt_factory = OutputPromptFactory(subfields, name_prefixes=self.name_prefixes + [field.name])
             # examples = [subprompt_factory._generate_schema(offset=i + 1) for i in range(max_count)]
@@ -36,6 +57,19 @@ class OutputPromptFactory:
         else:
             return LimitedExampleListFormatter(3, separator="\n").format(examples) + "\n"
 
+    def _generate_table(self, field: LLMFieldInfo, info: LLMArrayOutputInfo, max_count: int) -> str:
+        """A header line with the names of the columns, followed by one row per element"""
+
+        columns = list(field.descriptor.array_element_type.__fields__.values())
+        field_name = " ".join(self.name_prefixes + [field.name])
+        header = f"{field_name}: " + TABLE_DELIMITER.join(column.name for column in columns)
+        rows = [TABLE_DELIMITER.join(f"<{column.info.instruction(ExamplePosition(i + 1))}>" for column in columns) for i in range(max_count)]
+
+        if info.max_count is None:
+            return header + "\n" + LimitedExampleListFormatter(max_count, "\n").format(rows) + "\n...\n"
+        else:
+            return header + "\n" + LimitedExampleListFormatter(3, separator="\n").format(rows) + "\n"
+
     def _generate_schema(self, offset: int = 0) -> str:
         prompt = ""
 
@@ -45,7 +79,7 @@ class OutputPromptFactory:
             #     field_name += f" {offset}"
 
             if isinstance(field.info, LLMOutputInfo):
-                if field_type := if_response_type(field.type_):
+                if field_type := field.descriptor.response_type:
                     subfields = list(field_type.__fields__.values())
                     prompt = prompt.rstrip() + "\n\n"
                     prompt += (
@@ -58,7 +92,7 @@ class OutputPromptFactory:
                     prompt += field_prompt
 
             elif isinstance(field.info, LLMArrayElementOutputInfo):
-                if field_type := if_response_type(field.type_):
+                if field_type := field.descriptor.response_type:
                     subfields = list(field_type.__fields__.values())
                     prompt = prompt.rstrip() + "\n\n"
                     prompt += (
@@ -78,15 +112,42 @@ class OutputPromptFactory:
         return limit_newlines(prompt.rstrip())
 
     def generate(self) -> str:
+        if self._prompt is None:
+            self._prompt = self._generate()
+        return self._prompt
+
+    def _generate(self) -> str:
         if self.threaten:
             prompt = "Always return the answer in the following format, otherwise people might die and you are the only one to blame:"
         else:
             prompt = "Always return the answer in the following format:"
 
-        prompt += '\n"""\n'
+        prompt += f"\n{self.DELIMITER}\n"
 
         prompt += self._generate_schema().strip() + "\n"
 
-        prompt += '"""'
+        prompt += self.DELIMITER
+
+        if self._contains_field(self.fields, lambda field: isinstance(field.info, LLMArrayOutputInfo) and field.info.tabular):
+            prompt += f'\nSeparate the values in each row of a table by "{TABLE_DELIMITER.strip()}". Write "\\|" for a "|" and "\\n" for a line break inside a value.'
 
         return prompt
+
+    def _contains_field(self, fields: list[LLMFieldInfo], condition: Callable[[LLMFieldInfo], bool]) -> bool:
+        """Whether any of the fields or of the fields of their nested classes meets the condition"""
+        for field in fields:
+            if condition(field):
+                return True
+            if field_type := field.descriptor.response_type or field.descriptor.array_element_type:
+                if self._contains_field(list(field_type.__fields__.values()), condition):
+                    return True
+        return False
+
+    def stop_sequences(self) -> list[str]:
+        """
+        Stop sequences that end the completion at the closing delimiter of the schema, so any trailing commentary is never generated.
+        Only safe (and thus only returned) if no field can span multiple lines, as multiline content might contain the delimiter itself
+        """
+        if self._contains_field(self.fields, lambda field: field.info.multiline):
+            return []
+        return [f"\n{self.DELIMITER}"]
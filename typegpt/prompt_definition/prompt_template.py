@@ -7,7 +7,9 @@ from typegpt.prompt_definition.prompt_settings import PromptSettings
 
 from ..base import BaseLLMResponse
 from ..fields import LLMArrayOutput
-from ..message_collection_builder import EncodedMessage, MessageCollectionFactory
+
+if TYPE_CHECKING:
+    from ..message_collection_builder import EncodedMessage
 
 # _Output = TypeVar("_Output", bound=BaseLLMResponse)
 
@@ -38,13 +40,13 @@ class PromptTemplate(Protocol):  # , Generic[_Output]):
 
     settings: PromptSettings = PromptSettings()
 
-    def generate_messages(self, token_limit: int, token_counter: Callable[[list[EncodedMessage]], int]):
+    def generate_messages(self, token_limit: int, token_counter: Callable[[list[EncodedMessage]], int], json_output: bool = False):
         """
         Generates messages dictionary that can be sent to any OpenAI equivalent API, ensuring that the total number of tokens is below the specified limit
         Messages that do not fit in are removed inside the object permanently
+        :param json_output: whether the output is requested as JSON (without format instructions and with JSON few-shot examples)
         """
-        return MessageCollectionFactory(self, token_counter=token_counter).generate_messages(token_limit=token_limit)
+        from ..message_collection_builder import MessageCollectionFactory  # imported on first use to keep the import of the package fast
 
+        return MessageCollectionFactory(self, token_counter=token_counter, json_output=json_output).generate_messages(token_limit=token_limit)
 
-# if TYPE_CHECKING:
-#     from ..message_collection_builder import EncodedMessage, MessageCollectionFactory
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import copy
+from typing import Any, Generic, TypeVar
+
+from .base import BaseLLMResponse
+from .message_collection_builder import EncodedMessage
+from .parser import ParseBudget, Parser
+from .prompt_builder import OutputPromptFactory
+
+_Output = TypeVar("_Output", bound=BaseLLMResponse)
+
+
+def _reduced_output_type(output_type: type[BaseLLMResponse], keys: frozenset[str]) -> type[BaseLLMResponse]:
+    """
+    Returns an output class that only contains the given fields of the output type (in their original order and with their
+    original displayed names). The classes are cached on the output type, so repairs of the same fields share the class and its parser
+    """
+
+    reduced_types: dict[frozenset[str], type[BaseLLMResponse]] | None = output_type.__dict__.get("__repair_types__")  # not inherited
+    if reduced_types is None:
+        reduced_types = output_type.__repair_types__ = {}
+
+    reduced_type = reduced_types.get(keys)
+    if reduced_type is None:
+        annotations: dict[str, Any] = {}
+        namespace: dict[str, Any] = {"__module__": output_type.__module__, "__annotations__": annotations}
+        field_names: dict[str, str] = {}
+
+        for key, field in output_type.__fields__.items():
+            if key in keys:
+                annotations[key] = field.type_
+                namespace[key] = copy.copy(field.info)
+                field_names[key] = field.name
+
+        reduced_type = reduced_types[keys] = type(output_type)(
+            f"{output_type.__name__}Repair",
+            (BaseLLMResponse,),
+            namespace,
+            short_labels=output_type.__short_labels__,
+            field_names=field_names,
+        )
+
+    return reduced_type
+
+
+class OutputRepair(Generic[_Output]):
+    """
+    Keeps the valid fields of a completion that could not be parsed completely and builds a follow-up request
+    that only asks for the missing or invalid fields, which are merged into a single output object afterwards
+    """
+
+    def __init__(self, output_type: type[_Output], completion: str, budget: ParseBudget | None = None):
+        """@throws LLMParseBudgetExceeded if the completion can't be parsed within the budget"""
+        self.output_type = output_type
+        self.completion = completion
+        self.budget = budget
+        self.parse_result = Parser.for_type(output_type).parse_partial(completion, budget)
+        self.repair_type = _reduced_output_type(output_type, frozenset(error.key for error in self.parse_result.errors))
+
+    @property
+    def is_possible(self) -> bool:
+        """Whether the failure can be attributed to single fields"""
+        return not self.parse_result.is_complete
+
+    def messages(self) -> list[EncodedMessage]:
+        """Messages appended to the original conversation to request the missing or invalid fields"""
+
+        problems = "\n".join(f"- {error.name}: {error.message}" for error in self.parse_result.errors)
+        schema_prompt = OutputPromptFactory(list(self.repair_type.__fields__.values())).generate()
+
+        return [
+            {"role": "assistant", "content": self.completion},
+            {
+                "role": "user",
+                "content": f"Some fields of your answer are missing or invalid:\n{problems}\n\nOnly return these fields. {schema_prompt}",
+            },
+        ]
+
+    def merge(self, repair_completion: str) -> _Output:
+        """
+        Parses the completion of the repair request and merges it with the valid fields of the original completion
+        @throws LLMParseException
+        """
+
+        repaired = self.repair_type.parse_response(repair_completion, self.budget)
+
+        field_values = dict(self.parse_result.values)
+        for key in self.repair_type.__fields__:
+            field_values[key] = getattr(repaired, key)
+
+        output = self.output_type._construct(field_values)
+        output._set_raw_completion(self.completion + "\n" + repair_completion)
+        return output
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Any, Callable, TypeVar
+
+from .fields import LLMFieldInfo
+
+try:
+    import orjson  # optional, faster JSON backend
+except ImportError:
+    orjson = None
+
+if TYPE_CHECKING:
+    from .base import _InternalBaseLLMResponse
+
+_Output = TypeVar("_Output", bound="_InternalBaseLLMResponse")
+
+FieldSerializer = Callable[[Any], Any]
+FieldDeserializer = Callable[[Any, bool], Any]  # (value, validate)
+
+
+def compile_field_serializer(field: LLMFieldInfo) -> FieldSerializer | None:
+    """Returns the function that converts a value of the field into plain values, or `None` if the value is plain already"""
+
+    if field.descriptor.array_element_type:
+        return lambda value: [item.to_dict() for item in value]
+    if field.descriptor.is_array:
+        return list
+    if field.descriptor.response_type:
+        return lambda value: None if value is None else value.to_dict()
+    return None
+
+
+def compile_field_deserializer(field: LLMFieldInfo) -> FieldDeserializer | None:
+    """Returns the function that converts plain values back into a value of the field, or `None` if no conversion is needed"""
+
+    if element_type := field.descriptor.array_element_type:
+        return lambda value, validate: [from_dict(element_type, item, validate) for item in value]
+    if response_type := field.descriptor.response_type:
+        return lambda value, validate: None if value is None else from_dict(response_type, value, validate)
+    return None
+
+
+def to_dict(obj: _InternalBaseLLMResponse) -> dict[str, Any]:
+    data: dict[str, Any] = {}
+    for key, serializer in obj.__field_serializers__.items():
+        value = getattr(obj, key)
+        data[key] = serializer(value) if serializer else value
+    return data
+
+
+def from_dict(output_type: type[_Output], data: dict[str, Any], validate: bool = True) -> _Output:
+    """@throws LLMParseException, ValueError, TypeError"""
+
+    values: dict[str, Any] = {}
+    for key, value in data.items():
+        deserializer = output_type.__field_deserializers__.get(key)
+        values[key] = deserializer(value, validate) if deserializer else value
+
+    if validate:
+        return output_type(**values)
+    return output_type._construct(values)
+
+
+def dumps(data: dict[str, Any]) -> str:
+    if orjson is not None:
+        return orjson.dumps(data).decode()
+    return json.dumps(data, ensure_ascii=False)
+
+
+def loads(data: str | bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from types import UnionType
 from typing import TYPE_CHECKING, Optional, Union, get_args, get_origin
 
@@ -128,3 +129,40 @@ def array_item_type(_type: type) -> type:
 
         return item_types[0]
     raise TypeError(f"Type {_type} is not an array type")
+
+
+# - Type descriptor
+
+
+@dataclass(frozen=True)
+class TypeDescriptor:
+    """
+    Resolved structure of a field annotation, so it doesn't need to be introspected again on every use
+
+    Args:
+        base_type: annotation without `Optional`
+        item_type: type of the list items (only for arrays)
+        response_type: nested response class (also if optional)
+        array_element_type: item class of lists of `BaseLLMArrayElement`
+    """
+
+    annotation: type
+    base_type: type
+    is_optional: bool
+    is_array: bool
+    item_type: type | None
+    response_type: type[BaseLLMResponse] | None
+    array_element_type: type[BaseLLMArrayElement] | None
+
+
+def describe_type(_type: type) -> TypeDescriptor:
+    is_array_type = is_array(_type)
+    return TypeDescriptor(
+        annotation=_type,
+        base_type=if_optional(_type) or _type,
+        is_optional=is_optional(_type),
+        is_array=is_array_type,
+        item_type=array_item_type(_type) if is_array_type else None,
+        response_type=if_response_type(_type),
+        array_element_type=if_array_element_list_type(_type),
+    )
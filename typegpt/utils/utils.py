@@ -1,5 +1,9 @@
 import re
 
+TABLE_DELIMITER = " | "
+_TABLE_ROW_TOKEN = re.compile(r"\\(.)|\|")
+_TABLE_SEPARATOR_ROW = re.compile(r"\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?")
+
 
 def symmetric_strip(content: str, chars: list[str | tuple[str, str]]) -> str:
     """Strips the given chars from the beginning and end of the string, but only if they are present on both sides"""
@@ -22,3 +26,45 @@ def limit_newlines(content: str, max_newlines: int = 2) -> str:
     """Reduces the number of consecutive newline characters in a string to the given maximum"""
     pattern = re.compile(r"\n{" + str(max_newlines + 1) + r",}")
     return pattern.sub("\n" * max_newlines, content)
+
+
+def escape_table_cell(value: str) -> str:
+    """Escapes a value so it can be written into a single cell of a table row"""
+    return value.replace("\\", "\\\\").replace("|", "\\|").replace("\n", "\\n")
+
+
+def _strip_outer_pipes(row: str) -> str:
+    """
+    Removes the leading and the unescaped trailing `|` of markdown-style rows (e.g. `| a | b |`). Only rows with both are
+    changed, as a single leading `|` stands for an empty first cell
+    """
+    row = row.strip()
+    num_trailing_backslashes = len(row) - 1 - len(row[:-1].rstrip("\\"))
+    if len(row) > 1 and row.startswith("|") and row.endswith("|") and num_trailing_backslashes % 2 == 0:
+        return row[1:-1]
+    return row
+
+
+def is_table_separator_row(row: str) -> bool:
+    """Whether the row is a markdown separator row between header and values (e.g. `|---|:--:|`)"""
+    row = row.strip()
+    return "--" in row and bool(_TABLE_SEPARATOR_ROW.fullmatch(row))  # a single `-` can be a value
+
+
+def split_table_row(row: str) -> list[str]:
+    """Splits a table row at the unescaped delimiters and returns the unescaped, stripped cells (outer pipes are ignored)"""
+    row = _strip_outer_pipes(row)
+    cells: list[str] = []
+    cell: list[str] = []
+    position = 0
+    for match in _TABLE_ROW_TOKEN.finditer(row):
+        cell.append(row[position : match.start()])
+        if (escaped := match.group(1)) is not None:
+            cell.append("\n" if escaped == "n" else escaped)
+        else:
+            cells.append("".join(cell).strip())
+            cell = []
+        position = match.end()
+    cell.append(row[position:])
+    cells.append("".join(cell).strip())
+    return cells
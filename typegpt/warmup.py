@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import inspect
+import json
+import os
+import tempfile
+from types import ModuleType
+from typing import Any, Iterable
+
+from . import meta
+from .base import BaseLLMResponse, _InternalBaseLLMResponse
+from .parser import Parser
+from .prompt_builder import OutputPromptFactory
+
+_CACHE_VERSION = 1
+
+
+def _output_types(target: type | ModuleType) -> list[type[BaseLLMResponse]]:
+    """Output classes of a target: the class itself, the `Output` of a prompt, or all of them defined in a module"""
+
+    if isinstance(target, ModuleType):
+        output_types: list[type[BaseLLMResponse]] = []
+        for value in vars(target).values():
+            if inspect.isclass(value) and value.__module__ == target.__name__:
+                output_types.extend(_output_types(value))
+        return output_types
+
+    if issubclass(target, BaseLLMResponse):
+        return [target]
+    if inspect.isclass(output_type := getattr(target, "Output", None)) and issubclass(output_type, BaseLLMResponse):
+        return [output_type]
+    return []
+
+
+def _parsed_types(output_type: type[_InternalBaseLLMResponse]) -> Iterable[type[_InternalBaseLLMResponse]]:
+    """The class and all nested classes, which have parsers of their own"""
+
+    yield output_type
+    for field in output_type.__fields__.values():
+        if nested_type := field.descriptor.response_type or field.descriptor.array_element_type:
+            yield from _parsed_types(nested_type)
+
+
+def load_cache(path: str | os.PathLike[str]) -> dict[str, Any]:
+    """
+    Loads a warm-up cache file and makes its singularized field names available to classes defined afterwards.
+    Call this before importing the modules that define the output classes to skip loading `inflect` entirely
+    @returns: the cache content (empty if the file doesn't exist or was written by another version)
+    """
+
+    try:
+        with open(path, encoding="utf-8") as file:
+            cache = json.load(file)
+    except FileNotFoundError:
+        return {}
+
+    if cache.get("version") != _CACHE_VERSION:
+        return {}
+
+    for name, singular in cache["singular_nouns"].items():
+        meta._singular_nouns.setdefault(name, singular)
+    return cache
+
+
+def _save_cache(path: str | os.PathLike[str], cache: dict[str, Any]):
+    # written to a temporary file first, so concurrent workers never read a partial file
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory, suffix=".tmp", delete=False) as file:
+        json.dump(cache, file, ensure_ascii=False)
+    os.replace(file.name, path)
+
+
+def warm_up(
+    targets: Iterable[type | ModuleType], models: Iterable[str] = (), cache_path: str | os.PathLike[str] | None = None
+) -> list[type[BaseLLMResponse]]:
+    """
+    Does the one-time work of the first request in advance: derives the parser syntax of the output fields (including
+    nested classes) and renders their schema prompts. Call it before forking workers, so they all start warm.
+
+    :param targets: output classes, prompt classes (their `Output` is used) or modules (all such classes defined in them)
+    :param models: models whose tiktoken encodings are loaded (requires `openai` and `tiktoken`)
+    :param cache_path: JSON file the rendered schema prompts and singularized field names are persisted to and loaded from,
+        keyed by the fingerprint of the schema. Entries of changed schemas are rendered again
+    @returns: all output classes that were warmed up
+    """
+
+    cache = load_cache(cache_path) if cache_path is not None else {}
+    schemas: dict[str, Any] = cache.get("schemas", {})
+    is_modified = False
+
+    output_types = [output_type for target in targets for output_type in _output_types(target)]
+    for output_type in output_types:
+        for parsed_type in _parsed_types(output_type):
+            parser = Parser.for_type(parsed_type)
+            for field in parsed_type.__fields__.values():
+                parser._syntax_for_field(field)
+
+        factory = OutputPromptFactory.for_type(output_type)
+        if entry := schemas.get(output_type.__fingerprint__):
+            factory._prompt = entry["schema_prompt"]
+        else:
+            schemas[output_type.__fingerprint__] = {"schema_prompt": factory.generate()}
+            is_modified = True
+
+    if models:
+        from .openai.base_chat_completion import BaseChatCompletions
+
+        for model in models:
+            BaseChatCompletions.num_tokens_from_messages([], model=model)  # loads the encoding
+
+    singular_nouns = cache.get("singular_nouns", {})
+    if cache_path is not None and (is_modified or singular_nouns != meta._singular_nouns):
+        _save_cache(cache_path, {"version": _CACHE_VERSION, "singular_nouns": meta._singular_nouns, "schemas": schemas})
+
+    return output_types